@@ -1,460 +1,439 @@
-import sqlite3
+import time
+_STARTED = time.perf_counter()
+
 import os
-import random
+import sys
 import datetime
-import csv
-import json
+import bisect
+import threading
+import queue
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
 import customtkinter as ctk
 import tkinter as tk
 
-try:
-    import bcrypt
-except Exception:
-    bcrypt = None
-
 from tkinter import ttk, messagebox, simpledialog, filedialog
+from apart_core import (DORM_MAX_OCCUPANTS, NOTICE_PERIOD_DAYS, PAYMENT_STATUSES, TENANT_SUGGESTIONS, UNIT_TYPES,
+                        Database, EventBus, StartupTimer, ChangeMonitor, TenantIndex, TenantModel, PaymentModel, UnitModel,
+                        MaintenanceModel, StaffModel, AuthController, BillingController, ExportController, ImportController,
+                        MaintenanceController, MoveOutController, LoginThrottled, UnitFull, InvalidRow, ExportCancelled,
+                        ImportCancelled, clean_payment, clean_tenant)
 
 ctk.set_appearance_mode("System")
 ctk.set_default_color_theme("blue")
 
-DB_FILE = "apartment_system.db"
-
-DORM_MAX_OCCUPANTS = 4
-NOTICE_PERIOD_DAYS = 30
-
-def ensure_column(db_conn, table, column, col_def):
-    cur = db_conn.cursor()
-    cur.execute(f"PRAGMA table_info({table})")
-    cols = [r[1] for r in cur.fetchall()]
-    if column not in cols:
-        cur.execute(f"ALTER TABLE {table} ADD COLUMN {column} {col_def}")
-        db_conn.commit()
-
-class Database:
-    def __init__(self, db_file=DB_FILE):
-        self.db_file = db_file
-        first_time = not os.path.exists(db_file)
-        self.conn = sqlite3.connect(db_file, check_same_thread=False)
-        self.conn.row_factory = sqlite3.Row
-        self.setup_tables(first_time)
-
-    def setup_tables(self, first_time=False):
-        cur = self.conn.cursor()
-        cur.execute("""
-        CREATE TABLE IF NOT EXISTS users (
-            user_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE,
-            password TEXT,
-            role TEXT
-        );
-        """)
-        cur.execute("""
-        CREATE TABLE IF NOT EXISTS owners (
-            owner_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT,
-            contact TEXT,
-            address TEXT
-        );
-        """)
-        cur.execute("""
-        CREATE TABLE IF NOT EXISTS units (
-            unit_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            unit_code TEXT,
-            type TEXT,
-            price REAL,
-            status TEXT
-        );
-        """)
-        cur.execute("""
-        CREATE TABLE IF NOT EXISTS tenants (
-            tenant_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT,
-            contact TEXT,
-            unit_id INTEGER,
-            tenant_type TEXT,
-            move_in DATE,
-            move_out DATE,
-            status TEXT,
-            guardian_name TEXT,
-            guardian_contact TEXT,
-            guardian_relation TEXT,
-            emergency_contact TEXT,
-            advance_paid REAL DEFAULT 0,
-            deposit_paid REAL DEFAULT 0,
-            FOREIGN KEY(unit_id) REFERENCES units(unit_id)
-        );
-        """)
-        cur.execute("""
-        CREATE TABLE IF NOT EXISTS deleted_tenants (
-            deleted_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            tenant_id INTEGER,
-            name TEXT,
-            contact TEXT,
-            unit_id INTEGER,
-            tenant_type TEXT,
-            move_in DATE,
-            move_out DATE,
-            status TEXT,
-            guardian_name TEXT,
-            guardian_contact TEXT,
-            guardian_relation TEXT,
-            emergency_contact TEXT,
-            deleted_date DATE,
-            reason TEXT
-        );
-        """)
-        cur.execute("""
-        CREATE TABLE IF NOT EXISTS payments (
-            payment_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            tenant_id INTEGER,
-            rent REAL,
-            electricity REAL,
-            water REAL,
-            total REAL,
-            date_paid DATE,
-            status TEXT,
-            note TEXT,
-            FOREIGN KEY(tenant_id) REFERENCES tenants(tenant_id)
-        );
-        """)
-        cur.execute("""
-        CREATE TABLE IF NOT EXISTS maintenance (
-            request_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            tenant_id INTEGER,
-            description TEXT,
-            priority TEXT,
-            date_requested DATE,
-            status TEXT,
-            assigned_staff INTEGER,
-            fee REAL DEFAULT 0,
-            FOREIGN KEY(tenant_id) REFERENCES tenants(tenant_id)
-        );
-        """)
-        cur.execute("""
-        CREATE TABLE IF NOT EXISTS staff (
-            staff_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT,
-            role TEXT,
-            contact TEXT
-        );
-        """)
-        cur.execute("""
-        CREATE TABLE IF NOT EXISTS reports (
-            report_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            type TEXT,
-            generated_date DATE,
-            filepath TEXT
-        );
-        """)
-        self.conn.commit()
-
-        ensure_column(self.conn, "tenants", "guardian_name", "TEXT DEFAULT ''")
-        ensure_column(self.conn, "tenants", "guardian_contact", "TEXT DEFAULT ''")
-        ensure_column(self.conn, "tenants", "guardian_relation", "TEXT DEFAULT ''")
-        ensure_column(self.conn, "tenants", "emergency_contact", "TEXT DEFAULT ''")
-        ensure_column(self.conn, "tenants", "advance_paid", "REAL DEFAULT 0")
-        ensure_column(self.conn, "tenants", "deposit_paid", "REAL DEFAULT 0")
-        ensure_column(self.conn, "payments", "note", "TEXT DEFAULT ''")
-
-        self.seed_defaults()
-
-        if bcrypt:
+CHANGE_POLL_MS = 1000
+TARGETED_RELOAD_LIMIT = 200
+# more changed tenants than this rebuild the payment type-ahead index in the background
+TENANT_INDEX_PATCH_LIMIT = 10
+MOVEOUT_CHECK_INTERVAL_MS = 60 * 60 * 1000
+# APART_STARTUP_TIMING=1 (or --timings) prints where launch time went to stderr.
+STARTUP_TIMING = bool(os.environ.get("APART_STARTUP_TIMING")) or "--timings" in sys.argv
+# slow-query threshold (ms) and an optional file the slow queries and their plans are appended to
+SLOW_QUERY_MS_ENV = "APART_SLOW_QUERY_MS"
+SLOW_QUERY_LOG_ENV = "APART_SLOW_QUERY_LOG"
+OVERDUE_PAGE_SIZE = 200
+UNIT_DETAIL_PREFETCH = 5
+SEARCH_DELAY_MS = 250
+
+class BackgroundLoader:
+    # Runs model queries on worker threads and hands results back to Tk on the main loop.
+    # Each job has a key (one per tab); submitting again under the same key makes the
+    # earlier job stale, so only the newest result for a key is ever applied.
+    POLL_MS = 30
+
+    def __init__(self, widget, max_workers=3):
+        self.widget = widget
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="loader")
+        self._results = queue.Queue()
+        self._generation = {}
+        self._futures = {}
+        self._busy_callbacks = {}
+        self._polling = False
+        self._closed = False
+
+    def submit(self, key, fetch, apply, on_error=None, busy=None):
+        if self._closed:
+            return
+        gen = self._generation.get(key, 0) + 1
+        self._generation[key] = gen
+        old = self._futures.get(key)
+        if old is not None:
+            old.cancel()
+        if busy:
+            self._busy_callbacks[key] = busy
+            busy(True)
+        def run():
             try:
-                self.migrate_user_passwords_to_bcrypt()
-            except Exception:
-                pass
-
-    def seed_defaults(self):
-        cur = self.conn.cursor()
-        cur.execute("SELECT COUNT(*) as c FROM users")
-        if cur.fetchone()["c"] == 0:
-            cur.execute("INSERT INTO users (username,password,role) VALUES (?,?,?)", ("admin","admin","admin"))
-        cur.execute("SELECT COUNT(*) as sc FROM staff")
-        if cur.fetchone()["sc"] == 0:
-            staff_names = [("Carlos", "Technician"), ("Liza", "Caretaker"), ("Rob", "Electrician")]
-            for n, r in staff_names:
-                cur.execute("INSERT INTO staff (name, role, contact) VALUES (?,?,?)", (n, r, "0917123456"))
-        cur.execute("SELECT COUNT(*) as uc FROM units")
-        if cur.fetchone()["uc"] == 0:
-            unit_types = ["Family","Solo","Dorm"]
-            for floor in range(1, 6):
-                for i in range(1,6):
-                    code = f"{chr(64+floor)}{i}"
-                    utype = random.choice(unit_types)
-                    price = random.choice([4500,5000,5500,6000,7000,8000])
-                    cur.execute("INSERT INTO units (unit_code,type,price,status) VALUES (?,?,?,?)", (code, utype, price, "Vacant"))
-        cur.execute("SELECT COUNT(*) as tc FROM tenants")
-        if cur.fetchone()["tc"] == 0:
-            cur2 = self.conn.cursor()
-            cur2.execute("SELECT unit_id, type FROM units")
-            units = cur2.fetchall()
-            sample_names = ["Jasmine","Mariz","Rafael","Elaine","Mark","Jenny","Paolo","Carlos","April","Irene",
-                            "Nathan","Hannah","Chris","Lara","Ricardo","Andrea","Melvin","Sophia","Aaron","Nina"]
-            idx = 0
-            for u in units:
-                utype = u["type"]
-                if utype == "Family":
-                    occ = 1 if random.random() > 0.6 else 0
-                elif utype == "Solo":
-                    occ = 1 if random.random() > 0.4 else 0
-                else:
-                    occ = random.randint(0, min(3, DORM_MAX_OCCUPANTS))
-                for j in range(occ):
-                    name = f"{sample_names[idx % len(sample_names)]} {idx+1}"
-                    contact = f"0917{random.randint(100000,999999)}"
-                    move_in = (datetime.date.today() - datetime.timedelta(days=random.randint(0,400))).isoformat()
-                    guardian_name = ""
-                    guardian_contact = ""
-                    guardian_relation = ""
-                    if utype.lower() == "dorm":
-                        guardian_name = f"Guardian {idx+1}"
-                        guardian_contact = f"0917{random.randint(100000,999999)}"
-                        guardian_relation = "Parent"
-                    cur.execute("""INSERT INTO tenants (name, contact, unit_id, tenant_type, move_in, move_out, status,
-                                   guardian_name, guardian_contact, guardian_relation, emergency_contact, advance_paid, deposit_paid)
-                                   VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)""",
-                                (name, contact, u["unit_id"], utype, move_in, None, "Active", guardian_name, guardian_contact, guardian_relation, "", random.choice([0,4500]), random.choice([0,4500])))
-                    cur.execute("UPDATE units SET status=? WHERE unit_id=?", ("Occupied", u["unit_id"]))
-                    idx += 1
-            cur.execute("SELECT tenant_id FROM tenants")
-            tids = [r["tenant_id"] for r in cur.fetchall()]
-            for tid in tids:
-                rent = random.choice([4500,5000,5500,6000,7000])
-                elec = random.randint(200,900)
-                water = random.randint(100,400)
-                total = rent + elec + water
-                date_paid = (datetime.date.today() - datetime.timedelta(days=random.randint(0,60))).isoformat()
-                status = "Paid" if random.random()>0.15 else "Overdue"
-                cur.execute("INSERT INTO payments (tenant_id, rent, electricity, water, total, date_paid, status) VALUES (?,?,?,?,?,?,?)",
-                            (tid, rent, elec, water, total, date_paid, status))
-            for tid in tids[:15]:
-                desc = random.choice(["Broken door lock","Leaky faucet","Clogged drain"])
-                pr = random.choice(["Low","Medium","High"])
-                date_req = (datetime.date.today() - datetime.timedelta(days=random.randint(0,30))).isoformat()
-                stat = random.choice(["Pending","Ongoing","Done"])
-                fee = random.choice([0,150,250])
-                cur.execute("INSERT INTO maintenance (tenant_id, description, priority, date_requested, status, assigned_staff, fee) VALUES (?,?,?,?,?,?,?)",
-                            (tid, desc, pr, date_req, stat, random.choice([1,2,3]), fee))
-        self.conn.commit()
-
-    def execute(self, query, params=()):
-        cur = self.conn.cursor()
-        cur.execute(query, params)
-        self.conn.commit()
-        return cur
-
-    def query(self, query, params=()):
-        cur = self.conn.cursor()
-        cur.execute(query, params)
-        return cur.fetchall()
-
-    def close(self):
-        if self.conn:
-            self.conn.close()
-
-    def migrate_user_passwords_to_bcrypt(self):
-        if not bcrypt:
+                self._results.put((key, gen, True, fetch(), apply, on_error))
+            except Exception as e:
+                self._results.put((key, gen, False, e, apply, on_error))
+        self._futures[key] = self.executor.submit(run)
+        self._schedule_poll()
+
+    def cancel(self, key):
+        self._generation[key] = self._generation.get(key, 0) + 1
+        fut = self._futures.pop(key, None)
+        if fut is not None:
+            fut.cancel()
+        busy = self._busy_callbacks.pop(key, None)
+        if busy:
+            busy(False)
+
+    def pending(self, key=None):
+        if key is not None:
+            return key in self._futures
+        return bool(self._futures)
+
+    def _schedule_poll(self):
+        if self._polling or self._closed:
             return
+        self._polling = True
         try:
-            cur = self.conn.cursor()
-            cur.execute("SELECT user_id, password FROM users")
-            rows = cur.fetchall()
-            changed = False
-            for r in rows:
-                pw = r["password"] or ""
-                if pw and not pw.startswith("$2b$") and not pw.startswith("$2y$"):
-                    hashed = bcrypt.hashpw(pw.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-                    cur.execute("UPDATE users SET password=? WHERE user_id=?", (hashed, r["user_id"]))
-                    changed = True
-            if changed:
-                self.conn.commit()
-        except Exception:
-            pass
-
-class TenantModel:
-    def __init__(self, db: Database):
-        self.db = db
-
-    def create(self, name, contact, unit_id, tenant_type, move_in, guardian_name="", guardian_contact="", guardian_relation="", emergency_contact="", advance_paid=0, deposit_paid=0, status="Active"):
-        self.db.execute("""INSERT INTO tenants (name, contact, unit_id, tenant_type, move_in, move_out, status,
-                           guardian_name, guardian_contact, guardian_relation, emergency_contact, advance_paid, deposit_paid)
-                           VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)""", (name, contact, unit_id, tenant_type, move_in, None, status, guardian_name, guardian_contact, guardian_relation, emergency_contact, advance_paid, deposit_paid))
-        return True
+            self.widget.after(self.POLL_MS, self._poll)
+        except tk.TclError:
+            self._polling = False
 
-    def update(self, tenant_id, **kwargs):
-        if not kwargs:
-            return False
-        fields = ", ".join([f"{k}=?" for k in kwargs])
-        values = list(kwargs.values())
-        values.append(tenant_id)
-        self.db.execute(f"UPDATE tenants SET {fields} WHERE tenant_id=?", tuple(values))
-        return True
-
-    def delete(self, tenant_id, reason="Deleted by admin"):
-        row = self.get(tenant_id)
-        if not row:
-            return False
-        def safe(r, key):
+    def _poll(self):
+        self._polling = False
+        if self._closed:
+            return
+        while True:
             try:
-                return r[key] if key in r.keys() and r[key] is not None else ""
-            except:
-                return ""
-        self.db.execute("""INSERT INTO deleted_tenants (tenant_id, name, contact, unit_id, tenant_type, move_in, move_out, status,
-                              guardian_name, guardian_contact, guardian_relation, emergency_contact, deleted_date, reason)
-                           VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?)""",
-                        (row["tenant_id"], row["name"], row["contact"], row["unit_id"], row["tenant_type"], row["move_in"], row["move_out"], row["status"],
-                         safe(row,"guardian_name"), safe(row,"guardian_contact"), safe(row,"guardian_relation"), safe(row,"emergency_contact"),
-                         datetime.date.today().isoformat(), reason))
-        if row["unit_id"]:
-            self.db.execute("UPDATE units SET status=? WHERE unit_id=?", ("Vacant", row["unit_id"]))
-        self.db.execute("DELETE FROM tenants WHERE tenant_id=?", (tenant_id,))
-        return True
+                key, gen, ok, value, apply, on_error = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if gen != self._generation.get(key):
+                continue
+            self._futures.pop(key, None)
+            busy = self._busy_callbacks.pop(key, None)
+            if busy:
+                busy(False)
+            try:
+                if ok:
+                    apply(value)
+                elif on_error:
+                    on_error(value)
+                else:
+                    messagebox.showerror("Load failed", str(value))
+            except tk.TclError:
+                # target widget went away while the query was running
+                pass
+        if self._futures:
+            self._schedule_poll()
+
+    def shutdown(self):
+        self._closed = True
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+class UiEventPump:
+    # Bridges db.events onto the Tk thread. Events may be published from any thread;
+    # they are queued and, once per frame, coalesced into {entity: ids} (ids None when
+    # any event for that entity was set-based) and handed to the subscribers.
+    FRAME_MS = 16
+
+    def __init__(self, widget, bus: EventBus):
+        self.widget = widget
+        self.bus = bus
+        self._queue = queue.Queue()
+        self._subscribers = {}
+        self._next_token = 0
+        self._closed = False
+        self._bus_token = bus.subscribe(None, self._queue.put)
+        self.widget.after(self.FRAME_MS, self._tick)
+
+    def subscribe(self, entities, callback):
+        self._next_token += 1
+        self._subscribers[self._next_token] = (frozenset(entities), callback)
+        return self._next_token
+
+    def unsubscribe(self, token):
+        self._subscribers.pop(token, None)
+
+    def _tick(self):
+        if self._closed:
+            return
+        changes = {}
+        while True:
+            try:
+                event = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if event.entity in changes and changes[event.entity] is None:
+                continue
+            if event.ids is None:
+                changes[event.entity] = None
+            else:
+                changes.setdefault(event.entity, set()).update(event.ids)
+        if changes:
+            for entities, callback in list(self._subscribers.values()):
+                hit = {e: changes[e] for e in entities if e in changes}
+                if hit:
+                    try:
+                        callback(hit)
+                    except tk.TclError:
+                        pass
+        try:
+            self.widget.after(self.FRAME_MS, self._tick)
+        except tk.TclError:
+            self.close()
 
-    def restore(self, deleted_id):
-        rows = self.db.query("SELECT * FROM deleted_tenants WHERE deleted_id=?", (deleted_id,))
-        if not rows:
+    def close(self):
+        self._closed = True
+        self._subscribers.clear()
+        self.bus.unsubscribe(self._bus_token)
+
+class TreeviewBinder:
+    # Mirrors a list of (primary key, values) into a Treeview by diffing against what is
+    # already shown: only new rows are inserted, changed rows updated, vanished rows
+    # deleted and misplaced rows moved. Items are iid'd by str(key), so selection and
+    # scroll position survive a refresh.
+    def __init__(self, tree, descending=False):
+        self.tree = tree
+        self.descending = descending
+        self._values = {}
+        self._order = []
+        # int keys parallel to _order (negated when descending), so patch() bisects
+        # for an insert position instead of rebuilding the key list per row
+        self._sort_keys = []
+
+    def _sort_key(self, iid):
+        return -int(iid) if self.descending else int(iid)
+
+    def keys(self):
+        return list(self._order)
+
+    def __len__(self):
+        return len(self._order)
+
+    def apply(self, items):
+        tree = self.tree
+        wanted = [(str(k), tuple(v)) for k, v in items]
+        wanted_ids = {iid for iid, _ in wanted}
+        stale = [iid for iid in self._order if iid not in wanted_ids]
+        if not stale and [iid for iid, _ in wanted] == self._order and all(self._values[iid] == v for iid, v in wanted):
             return False
-        r = rows[0]
-        cur = self.db.execute("""INSERT INTO tenants (name, contact, unit_id, tenant_type, move_in, move_out, status,
-                             guardian_name, guardian_contact, guardian_relation, emergency_contact, advance_paid, deposit_paid)
-                             VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)""",
-                             (r["name"], r["contact"], r["unit_id"], r["tenant_type"], r["move_in"], r["move_out"], r["status"],
-                              r["guardian_name"], r["guardian_contact"], r["guardian_relation"], r["emergency_contact"], 0, 0))
-        new_tid = cur.lastrowid
-        if r["unit_id"]:
-            self.db.execute("UPDATE units SET status=? WHERE unit_id=?", ("Occupied", r["unit_id"]))
-        self.db.execute("DELETE FROM deleted_tenants WHERE deleted_id=?", (deleted_id,))
-        return new_tid
-
-    def all(self):
-        return self.db.query("SELECT t.*, u.unit_code, u.type as unit_type, u.price as unit_price FROM tenants t LEFT JOIN units u ON t.unit_id = u.unit_id ORDER BY t.tenant_id")
-
-    def get(self, tenant_id):
-        rows = self.db.query("SELECT * FROM tenants WHERE tenant_id=?", (tenant_id,))
-        return rows[0] if rows else None
-
-    def list_deleted(self):
-        return self.db.query("SELECT * FROM deleted_tenants ORDER BY deleted_id DESC")
-
-class PaymentModel:
-    def __init__(self, db: Database):
-        self.db = db
-
-    def create(self, tenant_id, rent, electricity, water, date_paid, status, note=""):
-        total = (rent or 0) + (electricity or 0) + (water or 0)
-        self.db.execute("""INSERT INTO payments (tenant_id, rent, electricity, water, total, date_paid, status, note)
-                           VALUES (?,?,?,?,?,?,?,?)""", (tenant_id, rent, electricity, water, total, date_paid, status, note))
-        return True
-
-    def all(self):
-        return self.db.query("SELECT p.*, t.name FROM payments p LEFT JOIN tenants t ON p.tenant_id = t.tenant_id ORDER BY p.payment_id DESC")
-
-    def stats_sum(self, since_days=30):
-        since = (datetime.date.today() - datetime.timedelta(days=since_days)).isoformat()
-        rows = self.db.query("SELECT sum(total) as total_income FROM payments WHERE date_paid >= ?", (since,))
-        return rows[0]["total_income"] if rows else 0
-
-    def last_payment_date(self, tenant_id):
-        rows = self.db.query("SELECT date_paid FROM payments WHERE tenant_id=? ORDER BY date_paid DESC LIMIT 1", (tenant_id,))
-        return rows[0]["date_paid"] if rows else None
-
-    def unpaid_exists(self, tenant_id):
-        rows = self.db.query("SELECT COUNT(*) as c FROM payments WHERE tenant_id=? AND status!='Paid'", (tenant_id,))
-        return (rows[0]["c"] if rows else 0) > 0
-
-class MaintenanceModel:
-    def __init__(self, db: Database):
-        self.db = db
-
-    def create(self, tenant_id, description, priority, date_requested, status="Pending", assigned_staff=None, fee=0.0):
-        self.db.execute("""INSERT INTO maintenance (tenant_id, description, priority, date_requested, status, assigned_staff, fee)
-                           VALUES (?,?,?,?,?,?,?)""", (tenant_id, description, priority, date_requested, status, assigned_staff, fee))
-        return True
-
-    def all(self):
-        return self.db.query("SELECT m.*, t.name as tenant_name, s.name as staff_name FROM maintenance m LEFT JOIN tenants t ON m.tenant_id = t.tenant_id LEFT JOIN staff s ON m.assigned_staff = s.staff_id ORDER BY m.request_id DESC")
-
-    def update_status(self, request_id, status):
-        self.db.execute("UPDATE maintenance SET status=? WHERE request_id=?", (status, request_id))
+        anchor = self._anchor()
+        if stale:
+            tree.delete(*stale)
+            for iid in stale:
+                del self._values[iid]
+            stale = set(stale)
+            self._order = [iid for iid in self._order if iid not in stale]
+        order = self._order
+        for index, (iid, values) in enumerate(wanted):
+            if iid not in self._values:
+                tree.insert("", index, iid=iid, values=values)
+                order.insert(index, iid)
+            else:
+                if self._values[iid] != values:
+                    tree.item(iid, values=values)
+                if order[index] != iid:
+                    # everything before index is already final, so iid sits further down
+                    order.pop(order.index(iid, index))
+                    order.insert(index, iid)
+                    tree.move(iid, "", index)
+            self._values[iid] = values
+        self._sort_keys = [self._sort_key(iid) for iid in order]
+        self._restore_anchor(anchor)
         return True
 
-class UnitModel:
-    def __init__(self, db: Database):
-        self.db = db
-
-    def all(self):
-        return self.db.query("SELECT * FROM units ORDER BY unit_code")
-
-    def available(self):
-        return self.db.query("SELECT * FROM units WHERE status='Vacant' ORDER BY unit_code")
-
-    def get(self, unit_id):
-        rows = self.db.query("SELECT * FROM units WHERE unit_id=?", (unit_id,))
-        return rows[0] if rows else None
-
-class StaffModel:
-    def __init__(self, db: Database):
-        self.db = db
-
-    def all(self):
-        return self.db.query("SELECT * FROM staff ORDER BY staff_id")
-
-class BillingController:
-    def __init__(self, db: Database, payment_model: PaymentModel, tenant_model: TenantModel):
-        self.db = db
-        self.payment_model = payment_model
-        self.tenant_model = tenant_model
-
-    def compute_total(self, rent, electricity, water):
-        return (rent or 0) + (electricity or 0) + (water or 0)
-
-    def create_payment(self, tenant_id, rent, electricity, water, date_paid=None, status="Paid", note=""):
-        if date_paid is None:
-            date_paid = datetime.date.today().isoformat()
-        total = self.compute_total(rent, electricity, water)
-        self.payment_model.create(tenant_id, rent, electricity, water, date_paid, status, note)
-        return total
-
-    def overdue_list(self, policy_days=7):
-        since = (datetime.date.today() - datetime.timedelta(days=policy_days)).isoformat()
-        rows = self.db.query("""SELECT t.tenant_id, t.name, p.total, p.date_paid, p.status
-                                FROM tenants t
-                                LEFT JOIN payments p ON t.tenant_id = p.tenant_id
-                                WHERE (p.status='Overdue') OR
-                                      (p.date_paid IS NOT NULL AND p.date_paid < ?)
-                                ORDER BY t.tenant_id""", (since,))
-        none_paid = self.db.query("""SELECT tenant_id, name FROM tenants WHERE tenant_id NOT IN (SELECT tenant_id FROM payments)""")
-        results = list(rows)
-        for np in none_paid:
-            t = self.tenant_model.get(np["tenant_id"])
-            if t and t["move_in"]:
-                try:
-                    mi = datetime.date.fromisoformat(t["move_in"])
-                    if (datetime.date.today() - mi).days > policy_days:
-                        results.append({"tenant_id": t["tenant_id"], "name": t["name"], "total": None, "date_paid": None, "status": "No Payment"})
-                except:
-                    pass
-        return results
-
-class MaintenanceController:
-    def __init__(self, maintenance_model: MaintenanceModel):
-        self.maintenance_model = maintenance_model
-
-    def submit_request(self, tenant_id, description, priority, fee=0.0):
-        date_req = datetime.date.today().isoformat()
-        return self.maintenance_model.create(tenant_id, description, priority, date_req, "Pending", None, fee)
-
-    def update_status(self, request_id, status):
-        return self.maintenance_model.update_status(request_id, status)
+    def patch(self, items, removed=()):
+        # Targeted refresh: update or insert just these rows (new ones at their key
+        # position) and drop the removed keys, leaving everything else untouched.
+        tree = self.tree
+        gone = {str(k) for k in removed} & self._values.keys()
+        if gone:
+            tree.delete(*gone)
+            for iid in gone:
+                del self._values[iid]
+                index = bisect.bisect_left(self._sort_keys, self._sort_key(iid))
+                if index >= len(self._order) or self._order[index] != iid:
+                    # rows shown in another order (search results) are not key-sorted
+                    index = self._order.index(iid)
+                del self._order[index]
+                del self._sort_keys[index]
+        for k, v in items:
+            iid, values = str(k), tuple(v)
+            if iid in self._values:
+                if self._values[iid] != values:
+                    tree.item(iid, values=values)
+            else:
+                sort_key = self._sort_key(iid)
+                index = bisect.bisect_left(self._sort_keys, sort_key)
+                tree.insert("", index, iid=iid, values=values)
+                self._order.insert(index, iid)
+                self._sort_keys.insert(index, sort_key)
+            self._values[iid] = values
+
+    def extend(self, items, top=False):
+        items = [(str(k), tuple(v)) for k, v in items]
+        if top:
+            for iid, values in reversed(items):
+                self.tree.insert("", 0, iid=iid, values=values)
+                self._values[iid] = values
+            self._order[:0] = [iid for iid, _ in items]
+            self._sort_keys[:0] = [self._sort_key(iid) for iid, _ in items]
+        else:
+            for iid, values in items:
+                self.tree.insert("", tk.END, iid=iid, values=values)
+                self._values[iid] = values
+            self._order.extend(iid for iid, _ in items)
+            self._sort_keys.extend(self._sort_key(iid) for iid, _ in items)
+
+    def trim(self, count, top=True):
+        if count <= 0:
+            return
+        if top:
+            gone, self._order = self._order[:count], self._order[count:]
+            del self._sort_keys[:count]
+        else:
+            gone, self._order = self._order[-count:], self._order[:-count]
+            del self._sort_keys[-count:]
+        self.tree.delete(*gone)
+        for iid in gone:
+            del self._values[iid]
+
+    def clear(self):
+        if self._order:
+            self.tree.delete(*self._order)
+        self._order = []
+        self._sort_keys = []
+        self._values = {}
+
+    def _anchor(self):
+        return self.tree.identify_row(5)
+
+    def _restore_anchor(self, anchor):
+        if anchor and anchor in self._values and self._order:
+            self.tree.yview_moveto(self._order.index(anchor) / len(self._order))
+
+class KeysetTreeview:
+    # Keeps a bounded window of rows materialized in a Treeview over a keyset-paginated
+    # source. Rows go through a TreeviewBinder; scrolling near either edge fetches the
+    # adjacent page in the background and evicts rows from the far edge.
+    EDGE = 0.15
+
+    def __init__(self, binder, loader, key, fetch_page, row_values, row_id, page_size=200, max_rows=600, busy=None):
+        self.binder = binder
+        self.tree = binder.tree
+        self.loader = loader
+        self.key = key
+        self.fetch_page = fetch_page
+        self.row_values = row_values
+        self.row_id = row_id
+        self.page_size = page_size
+        self.max_rows = max_rows
+        self.busy = busy
+        self.scrollbar = None
+        self.more_below = False
+        self.more_above = False
+        self._fetching = False
+        self.tree.configure(yscrollcommand=self._on_scroll)
+
+    def attach_scrollbar(self, scrollbar):
+        self.scrollbar = scrollbar
+        scrollbar.configure(command=self.tree.yview)
+
+    def reset(self):
+        self._fetching = True
+        size = self.page_size
+        self.loader.submit(self.key, lambda: self.fetch_page(None, None, size), self._apply_reset, self._on_error, busy=self.busy)
+
+    def _items(self, rows):
+        return [(self.row_id(r), self.row_values(r)) for r in rows]
+
+    def _apply_reset(self, rows):
+        self._fetching = False
+        shifted = self.more_above
+        self.binder.apply(self._items(rows))
+        self.more_below = len(rows) >= self.page_size
+        self.more_above = False
+        if shifted:
+            self.tree.yview_moveto(0)
+
+    def _on_error(self, exc):
+        self._fetching = False
+        messagebox.showerror("Load failed", str(exc))
+
+    def patch(self, rows, removed=()):
+        # Only rows that fall inside the materialized window are applied; a new row
+        # above the window is picked up when the user scrolls back to the top.
+        keys = self.binder.keys()
+        items = []
+        for r in rows:
+            pk = self.row_id(r)
+            if keys and self.more_above and pk > int(keys[0]):
+                continue
+            if keys and self.more_below and pk < int(keys[-1]):
+                continue
+            items.append((pk, self.row_values(r)))
+        self.binder.patch(items, removed)
+        excess = len(self.binder) - self.max_rows
+        if excess > 0:
+            self.binder.trim(excess, top=False)
+            self.more_below = True
+
+    def _on_scroll(self, first, last):
+        if self.scrollbar is not None:
+            self.scrollbar.set(first, last)
+        if self._fetching or not len(self.binder):
+            return
+        first, last = float(first), float(last)
+        keys = self.binder.keys()
+        top_id, bottom_id = int(keys[0]), int(keys[-1])
+        size = self.page_size
+        if last >= 1 - self.EDGE and self.more_below:
+            self._fetching = True
+            self.loader.submit(self.key, lambda: self.fetch_page(bottom_id, None, size), self._append_below, self._on_error, busy=self.busy)
+        elif first <= self.EDGE and self.more_above:
+            self._fetching = True
+            self.loader.submit(self.key, lambda: self.fetch_page(None, top_id, size), self._prepend_above, self._on_error, busy=self.busy)
+
+    def _append_below(self, rows):
+        self._fetching = False
+        anchor = self.binder._anchor()
+        self.binder.extend(self._items(rows))
+        self.more_below = len(rows) >= self.page_size
+        excess = len(self.binder) - self.max_rows
+        if excess > 0:
+            self.binder.trim(excess, top=True)
+            self.more_above = True
+        self.binder._restore_anchor(anchor)
+
+    def _prepend_above(self, rows):
+        self._fetching = False
+        anchor = self.binder._anchor()
+        self.binder.extend(self._items(rows), top=True)
+        self.more_above = len(rows) >= self.page_size
+        excess = len(self.binder) - self.max_rows
+        if excess > 0:
+            self.binder.trim(excess, top=False)
+            self.more_below = True
+        self.binder._restore_anchor(anchor)
 
 class LoginWindow(ctk.CTk):
-    def __init__(self, db: Database):
+    def __init__(self, db: Database, auth=None):
         super().__init__()
         self.db = db
+        # shared with AdminInterface and the next LoginWindow so failure backoff survives logout
+        self.auth = auth or AuthController(db)
+        self.loader = BackgroundLoader(self, max_workers=1)
         self.title("Apartment Billing System - Login")
         self.geometry("480x320")
         self.resizable(False, False)
         self.create_widgets()
+        # Password hashing can take seconds on an old database; do it behind the window.
+        self.after_idle(lambda: threading.Thread(target=self._upgrade_passwords, daemon=True, name="password-upgrade").start())
+
+    def _upgrade_passwords(self):
+        started = time.perf_counter()
+        try:
+            count = self.db.migrate_user_passwords_to_bcrypt()
+        except Exception:
+            return
+        if STARTUP_TIMING and count:
+            print(f"password upgrade: {count} hashed in {(time.perf_counter() - started) * 1000:.1f} ms", file=sys.stderr)
 
     def create_widgets(self):
         frame = ctk.CTkFrame(self, corner_radius=8, width=420, height=260)
@@ -474,10 +453,22 @@ class LoginWindow(ctk.CTk):
 
         btnfrm = ctk.CTkFrame(frame, corner_radius=8)
         btnfrm.pack(pady=8)
-        ctk.CTkButton(btnfrm, text="Login", width=120, command=self.login).grid(row=0, column=0, padx=8)
+        self.login_button = ctk.CTkButton(btnfrm, text="Login", width=120, command=self.login)
+        self.login_button.grid(row=0, column=0, padx=8)
         ctk.CTkButton(btnfrm, text="Exit", width=120, command=self.quit).grid(row=0, column=1, padx=8)
+        self.password_entry.bind("<Return>", lambda e: self.login())
+
+        self.status_hint = "Default admin: username=admin password=admin"
+        self.status_label = ctk.CTkLabel(frame, text=self.status_hint, text_color="gray")
+        self.status_label.pack(pady=(6,0))
 
-        ctk.CTkLabel(frame, text="Default admin: username=admin password=admin", text_color="gray").pack(pady=(6,0))
+    def _busy(self, on):
+        state = "disabled" if on else "normal"
+        self.login_button.configure(state=state)
+        self.username_entry.configure(state=state)
+        self.password_entry.configure(state=state)
+        self.configure(cursor="watch" if on else "")
+        self.status_label.configure(text="Checking password…" if on else self.status_hint)
 
     def login(self):
         username = self.username_entry.get().strip()
@@ -485,26 +476,25 @@ class LoginWindow(ctk.CTk):
         if not username or not password:
             messagebox.showwarning("Input required", "Please input username and password")
             return
-        rows = self.db.query("SELECT * FROM users WHERE username=?", (username,))
-        if not rows:
-            messagebox.showerror("Login failed", "Invalid username or password")
+        if self.loader.pending("login"):
             return
-        user = rows[0]
-        stored = user['password'] or ''
-        ok = False
-        try:
-            if bcrypt and (stored.startswith('$2b$') or stored.startswith('$2y$')):
-                ok = bcrypt.checkpw(password.encode('utf-8'), stored.encode('utf-8'))
-            else:
-                ok = (password == stored)
-        except Exception:
-            ok = (password == stored)
+        self.loader.submit("login", lambda: self.auth.verify(username, password),
+                           lambda ok: self._login_done(username, ok), self._login_error, busy=self._busy)
+
+    def _login_error(self, err):
+        if isinstance(err, LoginThrottled):
+            messagebox.showwarning("Login failed", f"Too many failed attempts. Try again in {err.retry_after:.0f} seconds.")
+        else:
+            messagebox.showerror("Login failed", str(err))
+
+    def _login_done(self, username, ok):
         if ok:
             if not self.show_policy_and_accept():
                 return
             messagebox.showinfo("Login success", f"Welcome, {username}")
+            self.loader.shutdown()
             self.destroy()
-            root = AdminInterface(self.db, username)
+            root = AdminInterface(self.db, username, self.auth)
             root.mainloop()
         else:
             messagebox.showerror("Login failed", "Invalid username or password")
@@ -521,7 +511,7 @@ class LoginWindow(ctk.CTk):
         return res
 
 class AdminInterface(ctk.CTk):
-    def __init__(self, db: Database, username):
+    def __init__(self, db: Database, username, auth=None):
         super().__init__()
         self.db = db
         self.username = username
@@ -535,13 +525,41 @@ class AdminInterface(ctk.CTk):
         self.staff_model = StaffModel(db)
         self.billing_ctrl = BillingController(db, self.payment_model, self.tenant_model)
         self.maintenance_ctrl = MaintenanceController(self.maintenance_model)
-        self.auto_refresh_interval_ms = 7000
+        self.moveout_ctrl = MoveOutController(db)
+        self.export_ctrl = ExportController(db, self.payment_model)
+        self.import_ctrl = ImportController(db, self.unit_model, self.tenant_model, self.payment_model)
+        self.auth = auth or AuthController(db)
+        self.loader = BackgroundLoader(self)
+        self.changes = ChangeMonitor(db)
+        self.events = UiEventPump(self, db.events)
+        self.loading_labels = {}
+        self._pending_ids = {}
+        # per tab key: the active search text ("" = show everything) and its pending debounce
+        self._search = {}
+        self._search_jobs = {}
+        self._tenant_units = {}
+        # payment form type-ahead; None until the first build finishes
+        self.tenant_index = None
         self.create_widgets()
-        self.load_tenants()
-        self.load_units()
-        self.load_payments()
-        self.load_maintenance()
-        self.load_deleted_tenants()
+        self.refresh_all()
+        self.schedule_moveouts()
+        self.rebuild_tenant_index()
+        self.events.subscribe({"tenants"}, self._on_tenant_events)
+        self.events.subscribe({"tenants", "units"}, self._on_index_events)
+        self.events.subscribe({"units"}, lambda c: self.load_units())
+        self.events.subscribe({"payments"}, self._on_payment_events)
+        self.events.subscribe({"maintenance", "tenants"}, self._on_maintenance_events)
+        self.events.subscribe({"deleted_tenants"}, self._on_deleted_events)
+        self.changes.subscribe({"units"}, lambda t: self.unit_model.invalidate())
+        self.changes.subscribe({"tenants", "maintenance"}, lambda t: self.unit_model.detail_cache.invalidate())
+        self.changes.subscribe({"staff"}, lambda t: self.staff_model.invalidate())
+        self.changes.subscribe({"tenants", "units"}, lambda t: self.load_tenants())
+        self.changes.subscribe({"tenants", "units"}, lambda t: self.rebuild_tenant_index())
+        self.changes.subscribe({"units"}, lambda t: self.load_units())
+        self.changes.subscribe({"payments", "tenants"}, lambda t: self.load_payments())
+        self.changes.subscribe({"maintenance", "tenants", "staff"}, lambda t: self.load_maintenance())
+        self.changes.subscribe({"deleted_tenants"}, lambda t: self.load_deleted_tenants())
+        self.after(CHANGE_POLL_MS, self._poll_changes)
 
     def create_widgets(self):
         menubar = tk.Menu(self)
@@ -551,6 +569,11 @@ class AdminInterface(ctk.CTk):
         menubar.add_cascade(label="Account", menu=account_menu)
         file_menu = tk.Menu(menubar, tearoff=0)
         file_menu.add_command(label="Export Payments CSV", command=self.export_payments_csv)
+        file_menu.add_command(label="Import Units CSV", command=lambda: self.import_csv("units"))
+        file_menu.add_command(label="Import Tenants CSV", command=lambda: self.import_csv("tenants"))
+        file_menu.add_command(label="Import Payments CSV", command=lambda: self.import_csv("payments"))
+        file_menu.add_command(label="Rebuild Summary Tables", command=self.rebuild_balances)
+        file_menu.add_command(label="Query Statistics", command=self.show_query_stats)
         file_menu.add_command(label="Exit", command=self.on_close)
         menubar.add_cascade(label="File", menu=file_menu)
         self.configure(menu=menubar)
@@ -584,6 +607,38 @@ class AdminInterface(ctk.CTk):
         self.tabs.add(self.tab_recycle, text="Recycle Bin")
         self._build_recycle_tab()
 
+    def _add_loading_label(self, parent, key):
+        lbl = ttk.Label(parent, text="", foreground="gray")
+        lbl.pack(side="right", padx=8)
+        self.loading_labels[key] = lbl
+
+    def _add_search_box(self, parent, key, reload):
+        # typing filters the tab to ranked full-text matches; clearing it (or Escape) shows everything again
+        var = tk.StringVar()
+        entry = ttk.Entry(parent, textvariable=var, width=28)
+        entry.pack(side="right", padx=4)
+        ttk.Label(parent, text="Search").pack(side="right")
+        def run():
+            self._search_jobs.pop(key, None)
+            text = var.get().strip()
+            if text != self._search.get(key, ""):
+                self._search[key] = text
+                reload()
+        def changed(*_):
+            job = self._search_jobs.pop(key, None)
+            if job:
+                self.after_cancel(job)
+            self._search_jobs[key] = self.after(SEARCH_DELAY_MS, run)
+        var.trace_add("write", changed)
+        entry.bind("<Escape>", lambda e: var.set(""))
+
+    def _loading(self, key):
+        def busy(on):
+            lbl = self.loading_labels.get(key)
+            if lbl is not None:
+                lbl.configure(text="Loading…" if on else "")
+        return busy
+
     def _build_tenants_tab(self):
         frame = self.tab_tenants
         top = ttk.Frame(frame, padding=6)
@@ -596,6 +651,8 @@ class AdminInterface(ctk.CTk):
         ttk.Button(top, text="Mark Move-Out", command=self.mark_move_out_dialog).pack(side="left", padx=4)
         ttk.Button(top, text="Auto-detect Move-outs", command=self.detect_moveouts_now).pack(side="left", padx=4)
         ttk.Button(top, text="Show Available Units", command=self.show_available_units).pack(side="left", padx=4)
+        self._add_loading_label(top, "tenants")
+        self._add_search_box(top, "tenants", self.load_tenants)
 
         cols = ("tenant_id","name","contact","unit","type","move_in","move_out","status","guardian","guardian_contact","advance","deposit","notes")
         self.tenants_tree = ttk.Treeview(frame, columns=cols, show="headings", height=18)
@@ -608,76 +665,155 @@ class AdminInterface(ctk.CTk):
             else:
                 self.tenants_tree.column(c, width=110)
         self.tenants_tree.pack(fill="both", expand=True, padx=8, pady=8)
+        self.tenants_binder = TreeviewBinder(self.tenants_tree)
 
     def detect_moveouts_now(self):
-        rows = self.tenant_model.all()
-        changed = False
-        for r in rows:
-            if r["move_out"]:
-                try:
-                    mo = datetime.date.fromisoformat(r["move_out"])
-                    if mo <= datetime.date.today() and (r["status"] != "Moved out"):
-                        self.tenant_model.update(r["tenant_id"], status="Moved out")
-                        if r["unit_id"]:
-                            self.db.execute("UPDATE units SET status=? WHERE unit_id=?", ("Vacant", r["unit_id"]))
-                        changed = True
-                except:
-                    pass
-        if changed:
-            messagebox.showinfo("Detected", "Move-outs processed")
-            self.load_tenants()
-            self.load_units()
-        else:
-            messagebox.showinfo("No changes", "No move-outs detected for today")
+        # same sweep as schedule_moveouts, forced, under its own key so the hourly job
+        # cannot supersede it before the result is shown
+        if self.loader.pending("moveouts/now"):
+            return
+        def done(count):
+            if count:
+                messagebox.showinfo("Detected", f"Move-outs processed: {count} tenant(s)")
+            else:
+                messagebox.showinfo("No changes", "No move-outs detected for today")
+        self.loader.submit("moveouts/now", lambda: self.moveout_ctrl.run(force=True), done,
+                           lambda e: messagebox.showerror("Move-out detection failed", str(e)))
 
-    def check_moveouts(self):
-        rows = self.tenant_model.all()
-        for r in rows:
-            if r["move_out"]:
-                try:
-                    mo = datetime.date.fromisoformat(r["move_out"])
-                    if mo <= datetime.date.today() and r["status"] != "Moved out":
-                        self.tenant_model.update(r["tenant_id"], status="Moved out")
-                        if r["unit_id"]:
-                            self.db.execute("UPDATE units SET status=? WHERE unit_id=?", ("Vacant", r["unit_id"]))
-                except:
-                    pass
+    def schedule_moveouts(self):
+        # daily sweep off the UI thread; the hourly check is one app_state read. Affected
+        # tabs reload from the change events the sweep publishes.
+        self.loader.submit("moveouts", self.moveout_ctrl.run, lambda count: None, on_error=lambda e: None)
+        self.after(MOVEOUT_CHECK_INTERVAL_MS, self.schedule_moveouts)
 
     def load_tenants(self):
-        self.check_moveouts()
-        for r in self.tenants_tree.get_children():
-            self.tenants_tree.delete(r)
-        rows = self.tenant_model.all()
-        unit_counts = {}
-        for r in rows:
-            uid = r["unit_id"]
-            unit_counts[uid] = unit_counts.get(uid, 0) + 1
-        for row in rows:
-            guardian = row["guardian_name"] or "-"
-            guard_contact = row["guardian_contact"] or "-"
-            notes = ""
-            try:
-                if (row["unit_type"] or "").lower() == "dorm":
-                    cnt = unit_counts.get(row["unit_id"], 0)
-                    notes = f"Dorm - {cnt} occupant(s)"
-            except:
-                pass
-            self.tenants_tree.insert("", tk.END, values=(row["tenant_id"], row["name"], row["contact"], row["unit_code"] or "-", row["unit_type"] or "-", row["move_in"], row["move_out"] or "-", row["status"] or "-", guardian, guard_contact, row["advance_paid"] or 0, row["deposit_paid"] or 0, notes))
+        self._cancel_patches("tenants")
+        text = self._search.get("tenants")
+        fetch = (lambda: self.tenant_model.search(text)) if text else self.tenant_model.all
+        self.loader.submit("tenants", fetch, self._fill_tenants, busy=self._loading("tenants"))
+
+    def _tenant_values(self, row, occupants):
+        guardian = row["guardian_name"] or "-"
+        guard_contact = row["guardian_contact"] or "-"
+        notes = ""
+        if (row["unit_type"] or "").lower() == "dorm":
+            notes = f"Dorm - {occupants} occupant(s)"
+        return (row["tenant_id"], row["name"], row["contact"], row["unit_code"] or "-", row["unit_type"] or "-", row["move_in"], row["move_out"] or "-", row["status"] or "-", guardian, guard_contact, row["advance_paid"] or 0, row["deposit_paid"] or 0, notes)
+
+    def _fill_tenants(self, rows):
+        self._tenant_units = {r["tenant_id"]: r["unit_id"] for r in rows}
+        self.tenants_binder.apply([(row["tenant_id"], self._tenant_values(row, row["unit_occupants"] or 0)) for row in rows])
+
+    def _cancel_patches(self, key):
+        self._pending_ids.pop(key, None)
+        self.loader.cancel(key + "/patch")
+
+    def _patch_rows(self, key, ids, make_fetch, apply_patch, full_reload):
+        # Reload just the changed rows of a tab. Ids still waiting on an unfinished
+        # patch are folded into the next one; set-based or very large changes fall
+        # back to a full (diffed) reload.
+        pending = self._pending_ids.get(key, set())
+        if ids is None or len(pending) + len(ids) > TARGETED_RELOAD_LIMIT or self._search.get(key):
+            # a filtered tab re-runs its search; patching would add rows that do not match
+            full_reload()
+            return
+        wanted = frozenset(pending | ids)
+        self._pending_ids[key] = set(wanted)
+        def applied(rows):
+            left = self._pending_ids.get(key, set()) - wanted
+            if left:
+                self._pending_ids[key] = left
+            else:
+                self._pending_ids.pop(key, None)
+            apply_patch(wanted, rows)
+        self.loader.submit(key + "/patch", make_fetch(wanted), applied)
+
+    def _on_tenant_events(self, changes):
+        def make_fetch(wanted):
+            old_units = {self._tenant_units.get(i) for i in wanted}
+            return lambda: self.tenant_model.rows_for(wanted, old_units)
+        def apply_patch(wanted, rows):
+            returned = {r["tenant_id"] for r in rows}
+            removed = [i for i in wanted if i not in returned]
+            for i in removed:
+                self._tenant_units.pop(i, None)
+            for r in rows:
+                self._tenant_units[r["tenant_id"]] = r["unit_id"]
+            self.tenants_binder.patch([(r["tenant_id"], self._tenant_values(r, r["unit_occupants"] or 0)) for r in rows], removed)
+        self._patch_rows("tenants", changes["tenants"], make_fetch, apply_patch, self.load_tenants)
+
+    def rebuild_tenant_index(self):
+        self.loader.submit("tenant-index", lambda: TenantIndex(self.tenant_model.index_rows()), self._set_tenant_index)
+
+    def _set_tenant_index(self, index):
+        self.tenant_index = index
+
+    def _on_index_events(self, changes):
+        # keeps the payment form's tenant type-ahead in step with our own writes
+        tenant_ids, unit_ids = changes.get("tenants", set()), changes.get("units", set())
+        if (self.tenant_index is None or tenant_ids is None or unit_ids is None or self.loader.pending("tenant-index")
+                or len(tenant_ids) + len(unit_ids) > TENANT_INDEX_PATCH_LIMIT):
+            # a rebuild still running would overwrite a patch with older rows
+            self.rebuild_tenant_index()
+            return
+        tenant_ids, unit_ids = frozenset(tenant_ids), frozenset(unit_ids)
+        self.loader.submit(("tenant-index", tenant_ids, unit_ids), lambda: self.tenant_model.index_rows(tenant_ids, unit_ids),
+                           lambda rows: self.tenant_index.update(rows, tenant_ids))
+
+    def _on_payment_events(self, changes):
+        def make_fetch(wanted):
+            filters = self._pay_filters
+            return lambda: self.payment_model.rows_for(wanted, filters)
+        def apply_patch(wanted, rows):
+            returned = {r["payment_id"] for r in rows}
+            self.pay_pager.patch(rows, [i for i in wanted if i not in returned])
+        self._patch_rows("payments", changes["payments"], make_fetch, apply_patch, self.load_payments)
+
+    def _maintenance_items(self, rows):
+        return [(row["request_id"], (row["request_id"], row["tenant_name"], row["description"], row["priority"], row["date_requested"], row["status"], self.staff_model.name(row["assigned_staff"]) or "-", row["fee"] or 0))
+                for row in rows]
+
+    def _on_maintenance_events(self, changes):
+        if "maintenance" in changes:
+            def make_fetch(wanted):
+                return lambda: self.maintenance_model.rows_for(request_ids=wanted)
+            def apply_patch(wanted, rows):
+                returned = {r["request_id"] for r in rows}
+                self.maint_binder.patch(self._maintenance_items(rows), [i for i in wanted if i not in returned])
+            self._patch_rows("maintenance", changes["maintenance"], make_fetch, apply_patch, self.load_maintenance)
+        if "tenants" in changes:
+            # tenant renames show up in the request list; only rows already shown are updated
+            tenant_ids = changes["tenants"]
+            if tenant_ids is None:
+                self.load_maintenance()
+                return
+            def apply_tenant_rows(rows):
+                self.maint_binder.patch([item for item in self._maintenance_items(rows) if str(item[0]) in self.maint_binder._values])
+            self.loader.submit(("maintenance/tenants", frozenset(tenant_ids)), lambda: self.maintenance_model.rows_for(tenant_ids=tenant_ids), apply_tenant_rows)
+
+    def _on_deleted_events(self, changes):
+        def make_fetch(wanted):
+            return lambda: self.tenant_model.deleted_rows_for(wanted)
+        def apply_patch(wanted, rows):
+            returned = {r["deleted_id"] for r in rows}
+            self.recycle_binder.patch(self._deleted_items(rows), [i for i in wanted if i not in returned])
+        self._patch_rows("deleted", changes["deleted_tenants"], make_fetch, apply_patch, self.load_deleted_tenants)
 
     def add_tenant_dialog(self):
         dlg = TenantDialog(self, self.unit_model)
         self.wait_window(dlg)
         if dlg.saved:
-            if dlg.tenant_type.lower() == "dorm" and dlg.unit_id:
-                cnt = self.db.query("SELECT COUNT(*) as c FROM tenants WHERE unit_id=? AND tenant_type='Dorm' AND status='Active'", (dlg.unit_id,))[0]["c"]
-                if cnt >= DORM_MAX_OCCUPANTS:
-                    messagebox.showwarning("Limit Exceeded", f"This dorm unit already has {cnt} occupants (max {DORM_MAX_OCCUPANTS}).")
-                    return
-            self.tenant_model.create(dlg.name, dlg.contact, dlg.unit_id, dlg.tenant_type, dlg.move_in, dlg.guardian_name, dlg.guardian_contact, dlg.guardian_relation, dlg.emergency_contact, dlg.advance_paid, dlg.deposit_paid)
-            if dlg.unit_id:
-                self.db.execute("UPDATE units SET status=? WHERE unit_id=?", ("Occupied", dlg.unit_id))
+            try:
+                self.tenant_model.create(dlg.name, dlg.contact, dlg.unit_id, dlg.tenant_type, dlg.move_in, dlg.guardian_name, dlg.guardian_contact, dlg.guardian_relation, dlg.emergency_contact, dlg.advance_paid, dlg.deposit_paid)
+            except UnitFull as e:
+                self._warn_unit_full(e)
+                return
             messagebox.showinfo("Saved", "Tenant added")
-            self.load_tenants()
+
+    def _warn_unit_full(self, err):
+        unit = self.unit_model.get(err.unit_id)
+        capacity = unit["capacity"] if unit else DORM_MAX_OCCUPANTS
+        messagebox.showwarning("Limit Exceeded", f"This unit is already full (max {capacity} occupants).")
 
     def edit_tenant_dialog(self):
         sel = self.tenants_tree.selection()
@@ -690,13 +826,6 @@ class AdminInterface(ctk.CTk):
         dlg = TenantDialog(self, self.unit_model, tenant=row)
         self.wait_window(dlg)
         if dlg.saved:
-            prev_unit = row["unit_id"]
-            new_unit = dlg.unit_id
-            if dlg.tenant_type.lower() == "dorm" and new_unit and new_unit != prev_unit:
-                cnt = self.db.query("SELECT COUNT(*) as c FROM tenants WHERE unit_id=? AND tenant_type='Dorm' AND status='Active'", (new_unit,))[0]["c"]
-                if cnt >= DORM_MAX_OCCUPANTS:
-                    messagebox.showwarning("Limit Exceeded", f"This dorm unit already has {cnt} occupants (max {DORM_MAX_OCCUPANTS}).")
-                    return
             update_fields = {
                 "name": dlg.name,
                 "contact": dlg.contact,
@@ -710,14 +839,12 @@ class AdminInterface(ctk.CTk):
                 "advance_paid": dlg.advance_paid,
                 "deposit_paid": dlg.deposit_paid
             }
-            self.tenant_model.update(tenant_id, **update_fields)
-            if prev_unit != new_unit:
-                if prev_unit:
-                    self.db.execute("UPDATE units SET status=? WHERE unit_id=?", ("Vacant", prev_unit))
-                if new_unit:
-                    self.db.execute("UPDATE units SET status=? WHERE unit_id=?", ("Occupied", new_unit))
+            try:
+                self.tenant_model.update(tenant_id, **update_fields)
+            except UnitFull as e:
+                self._warn_unit_full(e)
+                return
             messagebox.showinfo("Updated", "Tenant updated")
-            self.load_tenants()
 
     def delete_tenant(self):
         sel = self.tenants_tree.selection()
@@ -730,8 +857,6 @@ class AdminInterface(ctk.CTk):
         if messagebox.askyesno("Confirm", "Move tenant to Recycle Bin (soft-delete)?"):
             self.tenant_model.delete(tid, reason=reason or "Deleted")
             messagebox.showinfo("Deleted", "Tenant moved to Recycle Bin")
-            self.load_tenants()
-            self.load_deleted_tenants()
 
     def show_units_window(self):
         w = ctk.CTkToplevel(self)
@@ -756,48 +881,38 @@ class AdminInterface(ctk.CTk):
         right.place(x=580, y=60)
         detail_text = tk.Text(right, height=18, wrap="word")
         detail_text.pack(fill="both", expand=True)
+        binder = TreeviewBinder(tree)
+        load_key = ("units_window", id(w))
+        def fill(rows):
+            vacant = [r for r in rows if (r["status"] or "").lower() == "vacant"]
+            shown = vacant if filter_opt.get() == "Available" else rows
+            binder.apply([(r["unit_id"], (r["unit_id"], r["unit_code"], r["type"], r["price"], r["status"])) for r in shown])
+            avail_lbl.configure(text=f"Available: {len(vacant)}")
         def refresh_tree():
-            f = filter_opt.get()
-            for r in tree.get_children():
-                tree.delete(r)
-            rows = self.unit_model.all()
-            count_avail = 0
-            for r in rows:
-                if f == "Available" and (r["status"] or "").lower() != "vacant":
-                    continue
-                tree.insert("", tk.END, values=(r["unit_id"], r["unit_code"], r["type"], r["price"], r["status"]))
-                if (r["status"] or "").lower() == "vacant":
-                    count_avail += 1
-            avail_lbl.configure(text=f"Available: {count_avail}")
-            try:
-                w.after(self.auto_refresh_interval_ms, refresh_tree)
-            except:
-                pass
-        def on_select(event):
+            # tenant saves and move-outs touch units too; load off the Tk thread and diff
+            self.loader.submit(load_key, self.unit_model.all, fill)
+        def show_detail(uid, detail):
             sel = tree.selection()
-            if not sel:
+            if not sel or tree.item(sel[0])["values"][0] != uid:
                 return
-            item = tree.item(sel[0])["values"]
-            uid = item[0]
-            unit = self.unit_model.get(uid)
             lines = []
-            if unit:
+            if detail:
+                unit = detail["unit"]
                 lines.append(f"Unit ID: {unit['unit_id']}")
                 lines.append(f"Code: {unit['unit_code']}")
                 lines.append(f"Type: {unit['type']}")
                 lines.append(f"Price: ₱{unit['price']}")
                 lines.append(f"Status: {unit['status']}")
+                if unit["capacity"]:
+                    lines.append(f"Occupants: {unit['occupants']}/{unit['capacity']}")
                 lines.append("")
                 lines.append("Tenants in this unit:")
-                rows = self.db.query("SELECT tenant_id, name, contact, tenant_type, status FROM tenants WHERE unit_id=?", (uid,))
-                if rows:
-                    for t in rows:
+                if detail["tenants"]:
+                    for t in detail["tenants"]:
                         lines.append(f"- [{t['tenant_id']}] {t['name']} ({t['tenant_type']}) - {t['status']} - {t['contact']}")
                 else:
                     lines.append("  (No tenants)")
-                rows_m = self.db.query("""SELECT m.*, t.name as tenant_name FROM maintenance m LEFT JOIN tenants t ON m.tenant_id = t.tenant_id
-                                         WHERE m.tenant_id IN (SELECT tenant_id FROM tenants WHERE unit_id=?)
-                                         ORDER BY m.request_id DESC LIMIT 6""", (uid,))
+                rows_m = detail["maintenance"]
                 if rows_m:
                     lines.append("")
                     lines.append("Recent maintenance:")
@@ -805,7 +920,35 @@ class AdminInterface(ctk.CTk):
                         lines.append(f"- {mm['date_requested']}: {mm['description']} ({mm['status']}) fee:₱{mm['fee']}")
             detail_text.delete(1.0, tk.END)
             detail_text.insert(tk.END, "\n".join(lines))
+        def neighbours(iid):
+            # the rows either side of the selection, nearest first, so arrowing on hits the cache
+            ids, before, after = [], iid, iid
+            for _ in range(UNIT_DETAIL_PREFETCH):
+                before, after = tree.prev(before) if before else "", tree.next(after) if after else ""
+                ids += [tree.item(i)["values"][0] for i in (after, before) if i]
+            return ids
+        def on_select(event):
+            sel = tree.selection()
+            if not sel:
+                return
+            uid = tree.item(sel[0])["values"][0]
+            detail = self.unit_model.cached_detail(uid)
+            if detail is not None:
+                show_detail(uid, detail)
+            else:
+                self.loader.submit("unit_detail", lambda: self.unit_model.detail(uid), lambda d: show_detail(uid, d))
+            ids = neighbours(sel[0])
+            if ids:
+                self.loader.submit("unit_detail/prefetch", lambda: self.unit_model.details(ids), lambda d: None)
         tree.bind("<<TreeviewSelect>>", on_select)
+        token = self.changes.subscribe({"units"}, lambda t: refresh_tree())
+        event_token = self.events.subscribe({"units"}, lambda c: refresh_tree())
+        def on_destroy(e):
+            if e.widget is w:
+                self.changes.unsubscribe(token)
+                self.events.unsubscribe(event_token)
+                self.loader.cancel(load_key)
+        w.bind("<Destroy>", on_destroy)
         refresh_tree()
 
     def show_available_units(self):
@@ -831,20 +974,12 @@ class AdminInterface(ctk.CTk):
         choice = simpledialog.askinteger("Assign Unit", "Enter Unit ID to assign (see Units list):")
         if choice is None:
             return
-        prev = self.tenant_model.get(tenant_id)
-        prev_unit = prev["unit_id"] if prev else None
-        unit = self.unit_model.get(choice)
-        if unit and unit["type"].lower() == "dorm":
-            cnt = self.db.query("SELECT COUNT(*) as c FROM tenants WHERE unit_id=? AND tenant_type='Dorm' AND status='Active'", (choice,))[0]["c"]
-            if cnt >= DORM_MAX_OCCUPANTS:
-                messagebox.showwarning("Limit Exceeded", f"This dorm unit already has {cnt} occupants (max {DORM_MAX_OCCUPANTS}).")
-                return
-        self.tenant_model.update(tenant_id, unit_id=choice)
-        self.db.execute("UPDATE units SET status=? WHERE unit_id=?", ("Occupied", choice))
-        if prev_unit and prev_unit != choice:
-            self.db.execute("UPDATE units SET status=? WHERE unit_id=?", ("Vacant", prev_unit))
+        try:
+            self.tenant_model.update(tenant_id, unit_id=choice)
+        except UnitFull as e:
+            self._warn_unit_full(e)
+            return
         messagebox.showinfo("Assigned", "Unit assigned to tenant")
-        self.load_tenants()
 
     def mark_move_out_dialog(self):
         sel = self.tenants_tree.selection()
@@ -884,24 +1019,22 @@ class AdminInterface(ctk.CTk):
                 refund_note_lines.append("Admin inspection indicates possible damages/issues.")
             if (not has_unpaid) and notice_ok and inspected_ok:
                 refund_possible = True
-            self.tenant_model.update(tenant_id, move_out=move_out_date, status="Moved out")
-            if t and t["unit_id"]:
-                self.db.execute("UPDATE units SET status=? WHERE unit_id=?", ("Vacant", t["unit_id"]))
-            if refund_possible:
-                deposit_amt = t["deposit_paid"] or 0
-                if deposit_amt and deposit_amt > 0:
+            deposit_amt = (t["deposit_paid"] or 0) if t else 0
+            with self.db.transaction():
+                self.tenant_model.update(tenant_id, move_out=move_out_date, status="Moved out")
+                if refund_possible and deposit_amt > 0:
                     today = datetime.date.today().isoformat()
                     # record refund as a "Refund" payment with note; negative total is optional — here we record in note and zero deposit_paid
                     self.payment_model.create(tenant_id, 0, 0, 0, today, "Refund", note="Deposit refunded")
                     self.tenant_model.update(tenant_id, deposit_paid=0)
+            if refund_possible:
+                if deposit_amt > 0:
                     messagebox.showinfo("Refunded", f"Deposit of ₱{deposit_amt} refunded to tenant {t['name']}.")
                 else:
                     messagebox.showinfo("No Deposit", "Tenant had no deposit recorded to refund.")
             else:
                 messagebox.showwarning("Refund Not Processed", "Deposit refund not processed:\n" + ("\n".join(refund_note_lines) if refund_note_lines else "Conditions not met."))
             messagebox.showinfo("Updated", "Tenant marked as moved out")
-            self.load_tenants()
-            self.load_units()
         except Exception as e:
             messagebox.showerror("Error", f"Failed to mark move-out: {e}")
 
@@ -912,19 +1045,42 @@ class AdminInterface(ctk.CTk):
         ttk.Button(top, text="New Payment", command=self.new_payment_dialog).pack(side="left", padx=4)
         ttk.Button(top, text="Show Overdue (1 week policy)", command=lambda: self.show_overdue(7)).pack(side="left", padx=4)
         ttk.Button(top, text="Export Payments CSV", command=self.export_payments_csv).pack(side="left", padx=4)
+        ttk.Label(top, text="Status:").pack(side="left", padx=(12,2))
+        self.pay_status_filter = ttk.Combobox(top, values=["All","Paid","Overdue","Refund"], state="readonly", width=10)
+        self.pay_status_filter.current(0)
+        self.pay_status_filter.bind("<<ComboboxSelected>>", lambda e: self.load_payments())
+        self.pay_status_filter.pack(side="left", padx=4)
+        self._pay_filters = {}
+        self._add_loading_label(top, "payments")
         cols = ("payment_id","tenant","rent","electricity","water","total","date_paid","status","note")
-        self.pay_tree = ttk.Treeview(frame, columns=cols, show="headings", height=18)
+        body = ttk.Frame(frame)
+        body.pack(fill="both", expand=True, padx=8, pady=8)
+        self.pay_tree = ttk.Treeview(body, columns=cols, show="headings", height=18)
         for c in cols:
             self.pay_tree.heading(c, text=c.title())
             self.pay_tree.column(c, width=120)
-        self.pay_tree.pack(fill="both", expand=True, padx=8, pady=8)
+        pay_scroll = ttk.Scrollbar(body, orient="vertical")
+        pay_scroll.pack(side="right", fill="y")
+        self.pay_tree.pack(side="left", fill="both", expand=True)
+        self.pay_pager = KeysetTreeview(TreeviewBinder(self.pay_tree, descending=True), self.loader, "payments", self._fetch_payments_page,
+                                        self._payment_values, lambda r: r["payment_id"], busy=self._loading("payments"))
+        self.pay_pager.attach_scrollbar(pay_scroll)
 
     def load_payments(self):
-        for r in self.pay_tree.get_children():
-            self.pay_tree.delete(r)
-        rows = self.payment_model.all()
-        for row in rows:
-            self.pay_tree.insert("", tk.END, values=(row["payment_id"], row["name"], row["rent"], row["electricity"], row["water"], row["total"], row["date_paid"], row["status"], row["note"] or ""))
+        # read the filter widgets here, on the Tk thread; pages are fetched on workers
+        self._pay_filters = self._payment_filters()
+        self._cancel_patches("payments")
+        self.pay_pager.reset()
+
+    def _payment_filters(self):
+        status = self.pay_status_filter.get()
+        return {"status": status} if status and status != "All" else {}
+
+    def _fetch_payments_page(self, after_id, before_id, limit):
+        return self.payment_model.page(after_id, limit, self._pay_filters, before_id=before_id)
+
+    def _payment_values(self, row):
+        return (row["payment_id"], row["name"], row["rent"], row["electricity"], row["water"], row["total"], row["date_paid"], row["status"], row["note"] or "")
 
     def new_payment_dialog(self):
         dlg = PaymentDialog(self)
@@ -932,38 +1088,200 @@ class AdminInterface(ctk.CTk):
         if dlg.saved:
             self.billing_ctrl.create_payment(dlg.tenant_id, dlg.rent, dlg.electricity, dlg.water, dlg.date_paid, dlg.status, note=dlg.note)
             messagebox.showinfo("Saved", "Payment recorded")
-            self.load_payments()
 
     def show_overdue(self, days=7):
-        rows = self.billing_ctrl.overdue_list(policy_days=days)
-        if not rows:
-            messagebox.showinfo("Overdue", "Walang overdue payments!")
-            return
-        txt_lines = []
-        for r in rows:
-            pid = r.get("tenant_id") or r.get("payment_id") or "-"
-            name = r.get("name","-")
-            total = r.get("total")
-            date_paid = r.get("date_paid") or "-"
-            status = r.get("status") or "-"
-            txt_lines.append(f"{pid} - {name} - ₱{total if total is not None else 'N/A'} - last paid: {date_paid} - {status}")
-        messagebox.showinfo("Overdue (policy {} days)".format(days), "\n".join(txt_lines))
+        page_size = OVERDUE_PAGE_SIZE
+        w = tk.Toplevel(self)
+        w.title(f"Overdue (policy {days} days)")
+        w.geometry("820x440")
+        top = ttk.Frame(w, padding=6)
+        top.pack(side="top", fill="x")
+        count_lbl = ttk.Label(top, text="Loading…")
+        count_lbl.pack(side="left", padx=4)
+        more_btn = ttk.Button(top, text="Load more", state="disabled")
+        more_btn.pack(side="right", padx=4)
+        cols = ("tenant_id","name","last_paid","days_overdue","outstanding","status")
+        tree = ttk.Treeview(w, columns=cols, show="headings")
+        for c in cols:
+            tree.heading(c, text=c.replace("_", " ").title())
+            tree.column(c, width=200 if c == "name" else 110)
+        tree.pack(fill="both", expand=True, padx=8, pady=8)
+        state = {"last_id": None, "shown": 0}
+        def apply(rows):
+            for r in rows:
+                tree.insert("", tk.END, values=(r["tenant_id"], r["name"], r["date_paid"] or "-", r["days_overdue"] if r["days_overdue"] is not None else "-",
+                                                f"₱{r['outstanding']}", r["status"]))
+            state["shown"] += len(rows)
+            if rows:
+                state["last_id"] = rows[-1]["tenant_id"]
+            if state["shown"] == 0:
+                count_lbl.configure(text="Walang overdue payments!")
+            else:
+                count_lbl.configure(text=f"{state['shown']} tenant(s) shown")
+            more_btn.configure(state="normal" if len(rows) >= page_size else "disabled")
+        def load_more():
+            more_btn.configure(state="disabled")
+            after_id = state["last_id"]
+            self.loader.submit(("overdue", id(w)), lambda: self.billing_ctrl.overdue_list(days, limit=page_size, after_tenant_id=after_id), apply)
+        more_btn.configure(command=load_more)
+        load_more()
 
     def export_payments_csv(self):
-        rows = self.payment_model.all()
-        if not rows:
-            messagebox.showwarning("No Data", "No payments to export")
+        filepath = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV","*.csv"), ("Gzipped CSV","*.csv.gz")], title="Save payments CSV")
+        if not filepath:
+            return
+        date_from = simpledialog.askstring("Export Payments", "From date (YYYY-MM-DD), blank for all:", parent=self)
+        if date_from is None:
             return
-        filepath = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV","*.csv")], title="Save payments CSV")
+        date_to = simpledialog.askstring("Export Payments", "To date (YYYY-MM-DD), blank for all:", parent=self)
+        if date_to is None:
+            return
+        filters = dict(self._payment_filters())
+        if date_from.strip():
+            filters["date_from"] = date_from.strip()
+        if date_to.strip():
+            filters["date_to"] = date_to.strip()
+
+        w = tk.Toplevel(self)
+        w.title("Exporting payments")
+        w.geometry("420x130")
+        msg = ttk.Label(w, text="Starting export…")
+        msg.pack(padx=12, pady=(12,4), fill="x")
+        bar = ttk.Progressbar(w, mode="determinate", maximum=100)
+        bar.pack(padx=12, pady=4, fill="x")
+        cancel_event = threading.Event()
+        ttk.Button(w, text="Cancel", command=cancel_event.set).pack(pady=6)
+        w.protocol("WM_DELETE_WINDOW", cancel_event.set)
+        progress = {"done": 0, "total": 0}
+        def on_progress(done, total):
+            progress["done"], progress["total"] = done, total
+        def poll():
+            if not w.winfo_exists():
+                return
+            done, total = progress["done"], progress["total"]
+            if total:
+                bar["value"] = min(100, done * 100 / total)
+                msg.configure(text=f"{done} of {total} payments written")
+            w.after(100, poll)
+        def finished(count):
+            w.destroy()
+            if count == 0:
+                messagebox.showwarning("No Data", f"No payments matched; wrote header only to {filepath}")
+            else:
+                messagebox.showinfo("Exported", f"{count} payments exported to {filepath}")
+        def failed(exc):
+            w.destroy()
+            if isinstance(exc, ExportCancelled):
+                messagebox.showinfo("Cancelled", "Export cancelled")
+            else:
+                messagebox.showerror("Export failed", str(exc))
+        self.loader.submit(("export", filepath), lambda: self.export_ctrl.export_payments(filepath, filters, progress=on_progress, cancel_event=cancel_event),
+                           finished, failed)
+        poll()
+
+    def import_csv(self, kind):
+        filepath = filedialog.askopenfilename(filetypes=[("CSV","*.csv")], title=f"Import {kind} CSV")
         if not filepath:
             return
-        with open(filepath, "w", newline="", encoding="utf-8") as f:
-            writer = csv.writer(f)
-            writer.writerow(["payment_id","tenant","rent","electricity","water","total","date_paid","status","note"])
-            for r in rows:
-                writer.writerow([r["payment_id"], r["name"], r["rent"], r["electricity"], r["water"], r["total"], r["date_paid"], r["status"], r["note"] or ""])
-        messagebox.showinfo("Exported", f"Payments exported to {filepath}")
-        self.db.execute("INSERT INTO reports (type, generated_date, filepath) VALUES (?,?,?)", ("Payments CSV", datetime.date.today().isoformat(), filepath))
+        w = tk.Toplevel(self)
+        w.title(f"Importing {kind}")
+        w.geometry("420x130")
+        msg = ttk.Label(w, text="Starting import…")
+        msg.pack(padx=12, pady=(12,4), fill="x")
+        bar = ttk.Progressbar(w, mode="determinate", maximum=100)
+        bar.pack(padx=12, pady=4, fill="x")
+        cancel_event = threading.Event()
+        ttk.Button(w, text="Stop", command=cancel_event.set).pack(pady=6)
+        w.protocol("WM_DELETE_WINDOW", cancel_event.set)
+        progress = {"done": 0, "total": 0}
+        def on_progress(done, total):
+            progress["done"], progress["total"] = done, total
+        def poll():
+            if not w.winfo_exists():
+                return
+            done, total = progress["done"], progress["total"]
+            if total:
+                bar["value"] = min(100, done * 100 / total)
+                msg.configure(text=f"{done * 100 // total}% of the file read")
+            w.after(100, poll)
+        def finished(result):
+            w.destroy()
+            text = f"{result.imported} {kind} imported, {result.rejected} rejected."
+            if result.skipped:
+                text += f"\nResumed after row {result.skipped}."
+            if result.rejects_path:
+                text += f"\nRejected rows were written to {result.rejects_path}"
+            messagebox.showinfo("Imported", text)
+        def failed(exc):
+            w.destroy()
+            if isinstance(exc, ImportCancelled):
+                messagebox.showinfo("Stopped", "Import stopped. Importing the same file again resumes where it left off.")
+            else:
+                messagebox.showerror("Import failed", str(exc))
+        self.loader.submit(("import", filepath), lambda: self.import_ctrl.import_csv(kind, filepath, progress=on_progress, cancel_event=cancel_event),
+                           finished, failed)
+        poll()
+
+    def show_query_stats(self):
+        stats = self.db.stats
+        w = tk.Toplevel(self)
+        w.title("Query Statistics")
+        w.geometry("1000x560")
+        top = ttk.Frame(w, padding=6)
+        top.pack(side="top", fill="x")
+        summary = ttk.Label(top, text="")
+        summary.pack(side="left", padx=4)
+        cols = ("calls", "total_ms", "avg_ms", "max_ms", "rows", "slow", "statement")
+        tree = ttk.Treeview(w, columns=cols, show="headings", height=14)
+        for c in cols:
+            tree.heading(c, text=c.replace("_ms", " ms").replace("_", " ").title())
+            tree.column(c, width=560 if c == "statement" else 70, anchor="w" if c == "statement" else "e")
+        tree.pack(fill="both", expand=True, padx=8, pady=(0,4))
+        detail = tk.Text(w, height=10, wrap="word")
+        detail.pack(fill="x", padx=8, pady=(0,8))
+        shown = {}
+        def refresh():
+            tree.delete(*tree.get_children())
+            shown.clear()
+            rows = stats.snapshot()
+            for i, s in enumerate(rows):
+                shown[str(i)] = s
+                tree.insert("", tk.END, iid=str(i), values=(s["calls"], f"{s['total_ms']:.1f}", f"{s['total_ms'] / s['calls']:.2f}",
+                                                            f"{s['max_ms']:.1f}", s["rows"], s["slow"], s["sql"]))
+            summary.configure(text=f"{len(rows)} statement(s), {sum(s['calls'] for s in rows)} call(s) since start or reset; "
+                                   f"plans are captured above {stats.slow_ms} ms")
+        def show_detail(event=None):
+            detail.delete("1.0", tk.END)
+            sel = tree.selection()
+            if not sel:
+                return
+            s = shown[sel[0]]
+            text = s["sql"] + "\n\nCalled from:\n" + "\n".join(f"  {n}x {site}" for site, n in s["sites"])
+            if s["plan"]:
+                text += "\n\nPlan (last slow run):\n" + "\n".join(f"  {step}" for step in s["plan"])
+            detail.insert("1.0", text)
+        def reset():
+            stats.reset()
+            refresh()
+        def save():
+            path = filedialog.asksaveasfilename(parent=w, defaultextension=".txt", filetypes=[("Text","*.txt")], title="Save query statistics")
+            if path:
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(stats.report(top=stats.limit) + "\n")
+        ttk.Button(top, text="Save Report…", command=save).pack(side="right", padx=4)
+        ttk.Button(top, text="Reset", command=reset).pack(side="right", padx=4)
+        ttk.Button(top, text="Refresh", command=refresh).pack(side="right", padx=4)
+        tree.bind("<<TreeviewSelect>>", show_detail)
+        refresh()
+
+    def rebuild_balances(self):
+        def rebuild():
+            count = self.payment_model.rebuild_balances()
+            self.payment_model.rebuild_revenue()
+            return count
+        def done(count):
+            messagebox.showinfo("Rebuilt", f"Balance summary rebuilt for {count} tenant(s); revenue rollup rebuilt")
+        self.loader.submit("balances", rebuild, done)
 
     def _build_maintenance_tab(self):
         frame = self.tab_maintenance
@@ -971,19 +1289,24 @@ class AdminInterface(ctk.CTk):
         top.pack(side="top", fill="x")
         ttk.Button(top, text="New Request (with fee)", command=self.new_maintenance_dialog).pack(side="left", padx=4)
         ttk.Button(top, text="Refresh", command=self.load_maintenance).pack(side="left", padx=4)
+        self._add_loading_label(top, "maintenance")
+        self._add_search_box(top, "maintenance", self.load_maintenance)
         cols = ("request_id","tenant","description","priority","date_requested","status","staff","fee")
         self.maint_tree = ttk.Treeview(frame, columns=cols, show="headings", height=18)
         for c in cols:
             self.maint_tree.heading(c, text=c.title())
             self.maint_tree.column(c, width=120)
         self.maint_tree.pack(fill="both", expand=True, padx=8, pady=8)
+        self.maint_binder = TreeviewBinder(self.maint_tree, descending=True)
 
     def load_maintenance(self):
-        for r in self.maint_tree.get_children():
-            self.maint_tree.delete(r)
-        rows = self.maintenance_model.all()
-        for row in rows:
-            self.maint_tree.insert("", tk.END, values=(row["request_id"], row["tenant_name"], row["description"], row["priority"], row["date_requested"], row["status"], row["staff_name"] or "-", row["fee"] or 0))
+        self._cancel_patches("maintenance")
+        text = self._search.get("maintenance")
+        fetch = (lambda: self.maintenance_model.search(text)) if text else self.maintenance_model.all
+        self.loader.submit("maintenance", fetch, self._fill_maintenance, busy=self._loading("maintenance"))
+
+    def _fill_maintenance(self, rows):
+        self.maint_binder.apply(self._maintenance_items(rows))
 
     def new_maintenance_dialog(self):
         sel = self.tenants_tree.selection()
@@ -996,7 +1319,6 @@ class AdminInterface(ctk.CTk):
         if dlg.saved:
             self.maintenance_model.create(dlg.tenant_id, dlg.description, dlg.priority, dlg.date_requested, dlg.status, dlg.assigned_staff, dlg.fee)
             messagebox.showinfo("Saved", "Maintenance request submitted")
-            self.load_maintenance()
 
     def _build_reports_tab(self):
         frame = self.tab_reports
@@ -1004,6 +1326,22 @@ class AdminInterface(ctk.CTk):
         top.pack(side="top", fill="x")
         ttk.Button(top, text="Generate Income Report (30 days)", command=self.report_income_30).pack(side="left", padx=4)
         ttk.Button(top, text="List Reports", command=self.list_reports).pack(side="left", padx=4)
+        rev = ttk.Frame(frame, padding=6)
+        rev.pack(side="top", fill="x")
+        ttk.Label(rev, text="From").pack(side="left", padx=(4,2))
+        self.rev_from = ttk.Entry(rev, width=12)
+        self.rev_from.insert(0, datetime.date.today().replace(month=1, day=1).isoformat())
+        self.rev_from.pack(side="left", padx=2)
+        ttk.Label(rev, text="To").pack(side="left", padx=(8,2))
+        self.rev_to = ttk.Entry(rev, width=12)
+        self.rev_to.insert(0, datetime.date.today().isoformat())
+        self.rev_to.pack(side="left", padx=2)
+        self.rev_period = ttk.Combobox(rev, values=["day","month","quarter","year"], state="readonly", width=9)
+        self.rev_period.set("month")
+        self.rev_period.pack(side="left", padx=8)
+        self.rev_by_type = tk.BooleanVar(value=False)
+        ttk.Checkbutton(rev, text="By unit type", variable=self.rev_by_type).pack(side="left", padx=4)
+        ttk.Button(rev, text="Generate Revenue Report", command=self.report_revenue).pack(side="left", padx=4)
         self.report_text = tk.Text(frame, wrap="none")
         self.report_text.pack(fill="both", expand=True, padx=8, pady=8)
 
@@ -1018,6 +1356,31 @@ class AdminInterface(ctk.CTk):
     def report_income_30(self):
         total = self.payment_model.stats_sum(30) or 0
         txt = f"Income summary (last 30 days): ₱{total}\nGenerated: {datetime.date.today().isoformat()}"
+        self._show_report(txt, "Income 30 days")
+
+    def report_revenue(self):
+        date_from = self.rev_from.get().strip() or None
+        date_to = self.rev_to.get().strip() or None
+        period = self.rev_period.get()
+        by_type = self.rev_by_type.get()
+        try:
+            rows = self.payment_model.revenue(date_from, date_to, period, by_unit_type=by_type)
+        except (ValueError, sqlite3.Error) as e:
+            messagebox.showerror("Report", str(e))
+            return
+        head = f"{'Period':<10}" + (f" {'Unit type':<12}" if by_type else "") + f" {'Rent':>12} {'Electricity':>12} {'Water':>10} {'Total':>12} {'Payments':>9}"
+        lines = [f"Revenue by {period} ({date_from or 'start'} to {date_to or 'today'})", "", head, "-" * len(head)]
+        grand = 0
+        for r in rows:
+            unit = f" {r['unit_type']:<12}" if by_type else ""
+            lines.append(f"{r['period']:<10}{unit} {r['rent']:>12,.2f} {r['electricity']:>12,.2f} {r['water']:>10,.2f} {r['total']:>12,.2f} {r['payments']:>9}")
+            grand += r["total"] or 0
+        lines.append("-" * len(head))
+        lines.append(f"Total: ₱{grand:,.2f}")
+        lines.append(f"Generated: {datetime.date.today().isoformat()}")
+        self._show_report("\n".join(lines), f"Revenue by {period}")
+
+    def _show_report(self, txt, report_type):
         self.report_text.delete(1.0, tk.END)
         self.report_text.insert(tk.END, txt)
         if messagebox.askyesno("Save Report", "Save this report as text file?"):
@@ -1025,7 +1388,7 @@ class AdminInterface(ctk.CTk):
             if filepath:
                 with open(filepath, "w", encoding="utf-8") as f:
                     f.write(txt)
-                self.db.execute("INSERT INTO reports (type, generated_date, filepath) VALUES (?,?,?)", ("Income 30 days", datetime.date.today().isoformat(), filepath))
+                self.db.execute("INSERT INTO reports (type, generated_date, filepath) VALUES (?,?,?)", (report_type, datetime.date.today().isoformat(), filepath))
                 messagebox.showinfo("Saved", f"Report saved to {filepath}")
 
     def _build_recycle_tab(self):
@@ -1035,19 +1398,27 @@ class AdminInterface(ctk.CTk):
         ttk.Button(top, text="Refresh", command=self.load_deleted_tenants).pack(side="left", padx=4)
         ttk.Button(top, text="Restore Selected", command=self.restore_deleted_tenant).pack(side="left", padx=4)
         ttk.Button(top, text="Permanently Delete Selected", command=self.perm_delete).pack(side="left", padx=4)
+        self._add_loading_label(top, "deleted")
+        self._add_search_box(top, "deleted", self.load_deleted_tenants)
         cols = ("deleted_id","tenant_id","name","unit_id","deleted_date","reason")
         self.recycle_tree = ttk.Treeview(frame, columns=cols, show="headings", height=18)
         for c in cols:
             self.recycle_tree.heading(c, text=c.title())
             self.recycle_tree.column(c, width=140)
         self.recycle_tree.pack(fill="both", expand=True, padx=8, pady=8)
+        self.recycle_binder = TreeviewBinder(self.recycle_tree, descending=True)
 
     def load_deleted_tenants(self):
-        for r in self.recycle_tree.get_children():
-            self.recycle_tree.delete(r)
-        rows = self.tenant_model.list_deleted()
-        for r in rows:
-            self.recycle_tree.insert("", tk.END, values=(r["deleted_id"], r["tenant_id"], r["name"], r["unit_id"], r["deleted_date"], r["reason"]))
+        self._cancel_patches("deleted")
+        text = self._search.get("deleted")
+        fetch = (lambda: self.tenant_model.search_deleted(text)) if text else self.tenant_model.list_deleted
+        self.loader.submit("deleted", fetch, self._fill_deleted_tenants, busy=self._loading("deleted"))
+
+    def _deleted_items(self, rows):
+        return [(r["deleted_id"], (r["deleted_id"], r["tenant_id"], r["name"], r["unit_id"], r["deleted_date"], r["reason"])) for r in rows]
+
+    def _fill_deleted_tenants(self, rows):
+        self.recycle_binder.apply(self._deleted_items(rows))
 
     def restore_deleted_tenant(self):
         sel = self.recycle_tree.selection()
@@ -1056,11 +1427,13 @@ class AdminInterface(ctk.CTk):
             return
         item = self.recycle_tree.item(sel[0])["values"]
         deleted_id = item[0]
-        new_tid = self.tenant_model.restore(deleted_id)
+        try:
+            new_tid = self.tenant_model.restore(deleted_id)
+        except UnitFull as e:
+            self._warn_unit_full(e)
+            return
         if new_tid:
             messagebox.showinfo("Restored", f"Tenant restored with new tenant_id: {new_tid}")
-            self.load_tenants()
-            self.load_deleted_tenants()
         else:
             messagebox.showerror("Error", "Failed to restore tenant")
 
@@ -1072,25 +1445,24 @@ class AdminInterface(ctk.CTk):
         item = self.recycle_tree.item(sel[0])["values"]
         deleted_id = item[0]
         if messagebox.askyesno("Confirm", "Permanently delete this record? This cannot be undone."):
-            self.db.execute("DELETE FROM deleted_tenants WHERE deleted_id=?", (deleted_id,))
+            self.tenant_model.purge_deleted(deleted_id)
             messagebox.showinfo("Deleted", "Record permanently deleted")
-            self.load_deleted_tenants()
+
+    def _password_busy(self, on):
+        self.configure(cursor="watch" if on else "")
 
     def change_password_dialog(self):
+        if self.loader.pending("password"):
+            return
         curpw = simpledialog.askstring("Change Password", "Enter current password:", show="*")
         if curpw is None:
             return
-        rows = self.db.query("SELECT password FROM users WHERE username=?", (self.username,))
-        if not rows:
-            messagebox.showerror("Error", "User not found")
-            return
-        stored = rows[0]['password'] or ''
-        try:
-            ok = False
-            if bcrypt and (stored.startswith('$2b$') or stored.startswith('$2y$')):
-                ok = bcrypt.checkpw(curpw.encode('utf-8'), stored.encode('utf-8'))
+        def on_error(e):
+            if isinstance(e, LoginThrottled):
+                messagebox.showwarning("Error", f"Too many failed attempts. Try again in {e.retry_after:.0f} seconds.")
             else:
-                ok = (curpw == stored)
+                messagebox.showerror("Error", f"Password change failed: {e}")
+        def verified(ok):
             if not ok:
                 messagebox.showerror("Error", "Current password incorrect")
                 return
@@ -1102,29 +1474,37 @@ class AdminInterface(ctk.CTk):
             if newp != confirm:
                 messagebox.showerror("Error", "Passwords do not match")
                 return
-            if bcrypt:
-                hashed = bcrypt.hashpw(newp.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-                self.db.execute("UPDATE users SET password=? WHERE username=?", (hashed, self.username))
-            else:
-                self.db.execute("UPDATE users SET password=? WHERE username=?", (newp, self.username))
-            messagebox.showinfo("Done", "Password changed")
-        except Exception as e:
-            messagebox.showerror("Error", f"Password change failed: {e}")
+            self.loader.submit("password", lambda: self.auth.change_password(self.username, newp),
+                               lambda _: messagebox.showinfo("Done", "Password changed"), on_error, busy=self._password_busy)
+        self.loader.submit("password", lambda: self.auth.verify(self.username, curpw), verified, on_error, busy=self._password_busy)
 
     def logout(self):
         if messagebox.askyesno("Logout", "Logout and return to login screen?"):
+            self.loader.shutdown()
+            self.changes.close()
+            self.events.close()
             self.destroy()
-            login = LoginWindow(self.db)
+            login = LoginWindow(self.db, self.auth)
             login.mainloop()
 
     def on_close(self):
         if messagebox.askyesno("Exit", "Exit application?"):
+            self.loader.shutdown()
+            self.changes.close()
+            self.events.close()
             try:
                 self.db.close()
             except:
                 pass
             self.destroy()
 
+    def _poll_changes(self):
+        try:
+            self.changes.poll()
+        except sqlite3.Error:
+            pass
+        self.after(CHANGE_POLL_MS, self._poll_changes)
+
     def refresh_all(self):
         self.load_tenants()
         self.load_units()
@@ -1133,7 +1513,10 @@ class AdminInterface(ctk.CTk):
         self.load_deleted_tenants()
 
     def load_units(self):
-        self._units_cache = self.unit_model.all()
+        self.loader.submit("units", self.unit_model.all, self._set_units_cache)
+
+    def _set_units_cache(self, rows):
+        self._units_cache = rows
 
     def load_reports(self):
         return self.db.query("SELECT * FROM reports ORDER BY report_id DESC")
@@ -1176,7 +1559,7 @@ class TenantDialog(ctk.CTkToplevel):
         self.unit_combo = ttk.Combobox(frm, values=unit_list, state="readonly", width=48, textvariable=self.unit_var)
         self.unit_combo.grid(row=2, column=1, padx=6, pady=4)
         ctk.CTkLabel(frm, text="Tenant Type").grid(row=3, column=0, sticky="w", pady=4, padx=6)
-        self.type_combo = ttk.Combobox(frm, values=["Family","Solo","Dorm"], state="readonly")
+        self.type_combo = ttk.Combobox(frm, values=list(UNIT_TYPES), state="readonly")
         self.type_combo.current(0)
         self.type_combo.grid(row=3, column=1, padx=6, pady=4)
         ctk.CTkLabel(frm, text="Move in date (YYYY-MM-DD)").grid(row=4, column=0, sticky="w", pady=4, padx=6)
@@ -1230,47 +1613,21 @@ class TenantDialog(ctk.CTkToplevel):
             self.deposit_e.insert(0, str(self.tenant.get("deposit_paid",0) or 0))
 
     def save(self):
-        self.name = self.name_e.get().strip()
-        self.contact = self.contact_e.get().strip()
         unit_str = self.unit_var.get()
         if unit_str:
             try:
                 self.unit_id = int(unit_str.split(" - ")[0])
             except:
                 self.unit_id = None
-        self.tenant_type = self.type_combo.get()
-        self.move_in = self.movein_e.get().strip() or datetime.date.today().isoformat()
-        self.guardian_name = self.guard_e.get().strip()
-        self.guardian_contact = self.guard_contact_e.get().strip()
-        self.guardian_relation = self.guard_rel_e.get().strip()
-        self.emergency_contact = self.emer_e.get().strip()
         try:
-            self.advance_paid = float(self.advance_e.get().strip() or 0)
-            self.deposit_paid = float(self.deposit_e.get().strip() or 0)
-        except:
-            messagebox.showwarning("Input", "Advance and Deposit must be numeric")
-            return
-
-        if not self.name or len(self.name.split()) < 2:
-            messagebox.showwarning("Input", "Tenant full name required (first and last name).")
-            return
-        if self.tenant_type.lower() == "dorm":
-            if not self.guardian_name or len(self.guardian_name.split()) < 2:
-                messagebox.showwarning("Input", "Dorm tenants require guardian full name (first and last).")
-                return
-            if not self.guardian_contact or not self.guardian_contact.isdigit():
-                messagebox.showwarning("Input", "Guardian contact must be numeric (digits only).")
-                return
-        else:
-            if self.guardian_name and len(self.guardian_name.split()) < 2:
-                messagebox.showwarning("Input", "If guardian name is provided, please enter full name (first and last).")
-                return
-            if self.guardian_contact and not self.guardian_contact.isdigit():
-                messagebox.showwarning("Input", "Guardian contact must be numeric (digits only).")
-                return
-        if self.contact and not any(ch.isdigit() for ch in self.contact):
-            messagebox.showwarning("Input", "Tenant contact should contain numbers (phone).")
+            fields = clean_tenant(self.name_e.get(), self.contact_e.get(), self.type_combo.get(), self.movein_e.get(),
+                                  self.guard_e.get(), self.guard_contact_e.get(), self.guard_rel_e.get(), self.emer_e.get(),
+                                  self.advance_e.get(), self.deposit_e.get())
+        except InvalidRow as e:
+            messagebox.showwarning("Input", str(e))
             return
+        for k, v in fields.items():
+            setattr(self, k, v)
         self.saved = True
         self.destroy()
 
@@ -1286,53 +1643,130 @@ class PaymentDialog(ctk.CTkToplevel):
         self.date_paid = datetime.date.today().isoformat()
         self.status = "Paid"
         self.note = ""
+        self._suggestions = []
+        self._picked = None
         self.build()
 
     def build(self):
         self.title("New Payment")
-        self.geometry("420x360")
+        self.geometry("460x520")
         frm = ctk.CTkFrame(self, corner_radius=8)
         frm.pack(fill="both", expand=True, padx=10, pady=10)
-        ctk.CTkLabel(frm, text="Tenant ID (see Tenants tab)").grid(row=0, column=0, sticky="w", pady=6, padx=6)
-        self.tenant_e = ctk.CTkEntry(frm, width=220)
+        ctk.CTkLabel(frm, text="Tenant (name, unit, contact or ID)").grid(row=0, column=0, sticky="w", pady=6, padx=6)
+        self.tenant_var = tk.StringVar()
+        self.tenant_e = ctk.CTkEntry(frm, width=220, textvariable=self.tenant_var)
         self.tenant_e.grid(row=0, column=1, padx=6, pady=6)
-        ctk.CTkLabel(frm, text="Rent").grid(row=1, column=0, sticky="w", pady=6, padx=6)
+        # shown only while there is something to suggest
+        self.suggest_list = tk.Listbox(frm, height=TENANT_SUGGESTIONS, exportselection=False, activestyle="dotbox")
+        self.suggest_list.grid(row=1, column=1, sticky="ew", padx=6)
+        self.suggest_list.grid_remove()
+        self.tenant_info = ctk.CTkLabel(frm, text="", justify="left", anchor="w")
+        self.tenant_info.grid(row=2, column=0, columnspan=2, sticky="w", padx=6)
+        self.tenant_var.trace_add("write", lambda *a: self._on_tenant_typed())
+        self.tenant_e.bind("<Down>", lambda e: self._focus_suggestions())
+        self.tenant_e.bind("<Return>", lambda e: self._pick(0))
+        self.suggest_list.bind("<Return>", lambda e: self._pick_selected())
+        self.suggest_list.bind("<Double-Button-1>", lambda e: self._pick_selected())
+        self.suggest_list.bind("<Escape>", lambda e: self._hide_suggestions())
+        ctk.CTkLabel(frm, text="Rent").grid(row=3, column=0, sticky="w", pady=6, padx=6)
         self.rent_e = ctk.CTkEntry(frm, width=220)
-        self.rent_e.grid(row=1, column=1, padx=6, pady=6)
-        ctk.CTkLabel(frm, text="Electricity").grid(row=2, column=0, sticky="w", pady=6, padx=6)
+        self.rent_e.grid(row=3, column=1, padx=6, pady=6)
+        ctk.CTkLabel(frm, text="Electricity").grid(row=4, column=0, sticky="w", pady=6, padx=6)
         self.elec_e = ctk.CTkEntry(frm, width=220)
-        self.elec_e.grid(row=2, column=1, padx=6, pady=6)
-        ctk.CTkLabel(frm, text="Water").grid(row=3, column=0, sticky="w", pady=6, padx=6)
+        self.elec_e.grid(row=4, column=1, padx=6, pady=6)
+        ctk.CTkLabel(frm, text="Water").grid(row=5, column=0, sticky="w", pady=6, padx=6)
         self.water_e = ctk.CTkEntry(frm, width=220)
-        self.water_e.grid(row=3, column=1, padx=6, pady=6)
-        ctk.CTkLabel(frm, text="Status (Paid/Overdue/Refund)").grid(row=4, column=0, sticky="w", pady=6, padx=6)
-        self.status_combo = ttk.Combobox(frm, values=["Paid","Overdue","Refund"], state="readonly")
+        self.water_e.grid(row=5, column=1, padx=6, pady=6)
+        ctk.CTkLabel(frm, text="Status (Paid/Overdue/Refund)").grid(row=6, column=0, sticky="w", pady=6, padx=6)
+        self.status_combo = ttk.Combobox(frm, values=list(PAYMENT_STATUSES), state="readonly")
         self.status_combo.current(0)
-        self.status_combo.grid(row=4, column=1, padx=6, pady=6)
-        ctk.CTkLabel(frm, text="Note (optional)").grid(row=5, column=0, sticky="w", pady=6, padx=6)
+        self.status_combo.grid(row=6, column=1, padx=6, pady=6)
+        ctk.CTkLabel(frm, text="Note (optional)").grid(row=7, column=0, sticky="w", pady=6, padx=6)
         self.note_e = ctk.CTkEntry(frm, width=220)
-        self.note_e.grid(row=5, column=1, padx=6, pady=6)
+        self.note_e.grid(row=7, column=1, padx=6, pady=6)
         btnfrm = ctk.CTkFrame(frm)
-        btnfrm.grid(row=7, column=0, columnspan=2, pady=10)
+        btnfrm.grid(row=9, column=0, columnspan=2, pady=10)
         ctk.CTkButton(btnfrm, text="Save", width=120, command=self.save).pack(side="left", padx=6)
         ctk.CTkButton(btnfrm, text="Cancel", width=120, command=self.destroy).pack(side="left", padx=6)
+        if self.parent.tenant_index is None:
+            self.tenant_info.configure(text="Tenant list still loading; a tenant ID works meanwhile")
+        self.tenant_e.focus_set()
+
+    @staticmethod
+    def _label(s):
+        return f"{s.name} (#{s.tenant_id})"
+
+    def _on_tenant_typed(self):
+        # answered from the in-memory index on every keystroke, no query
+        text = self.tenant_var.get()
+        if self._picked and text == self._label(self._picked):
+            return
+        self._picked = None
+        index = self.parent.tenant_index
+        self._suggestions = index.search(text) if index is not None else []
+        self.suggest_list.delete(0, "end")
+        for s in self._suggestions:
+            unit = f"{s.unit_code} · " if s.unit_code else ""
+            self.suggest_list.insert("end", f"{s.name} · {unit}{s.contact} · #{s.tenant_id}")
+        if self._suggestions:
+            self.suggest_list.grid()
+        else:
+            self._hide_suggestions()
+        if index is not None:
+            self.tenant_info.configure(text="" if self._suggestions or not text.strip() else "No active tenant matches")
+
+    def _hide_suggestions(self):
+        self.suggest_list.grid_remove()
+
+    def _focus_suggestions(self):
+        if self._suggestions:
+            self.suggest_list.focus_set()
+            self.suggest_list.selection_clear(0, "end")
+            self.suggest_list.selection_set(0)
+            self.suggest_list.activate(0)
+
+    def _pick_selected(self):
+        sel = self.suggest_list.curselection()
+        self._pick(sel[0] if sel else 0)
+
+    def _pick(self, i):
+        if i >= len(self._suggestions):
+            return
+        s = self._picked = self._suggestions[i]
+        self.tenant_var.set(self._label(s))
+        self._hide_suggestions()
+        if s.unit_price is not None and not self.rent_e.get().strip():
+            self.rent_e.insert(0, f"{s.unit_price:g}")
+        self.tenant_info.configure(text=f"Unit {s.unit_code or '-'} · rent ₱{s.unit_price or 0:,.2f} · outstanding …")
+        self.rent_e.focus_set()
+        # the balance moves with every payment, so it is read fresh rather than indexed
+        self.parent.loader.submit(("payment-tenant", id(self)), lambda: self.parent.tenant_model.billing_info(s.tenant_id),
+                                  lambda info: self._show_billing(s, info))
+
+    def _show_billing(self, s, info):
+        if self._picked is not s:
+            return
+        if info is None:
+            self.tenant_info.configure(text="This tenant no longer exists")
+            return
+        last = f" · last paid {info['last_payment_date']}" if info["last_payment_date"] else ""
+        self.tenant_info.configure(text=f"Unit {info['unit_code'] or '-'} · rent ₱{info['unit_price'] or 0:,.2f}"
+                                        f" · outstanding ₱{info['outstanding']:,.2f}{last}")
 
     def save(self):
+        tenant = self._picked.tenant_id if self._picked else self.tenant_e.get().strip().lstrip("#")
         try:
-            self.tenant_id = int(self.tenant_e.get().strip())
-        except:
-            messagebox.showerror("Input", "Tenant ID must be number")
+            fields = clean_payment(tenant, self.rent_e.get(), self.elec_e.get(), self.water_e.get(),
+                                   self.status_combo.get(), self.note_e.get())
+        except InvalidRow as e:
+            messagebox.showerror("Input", "Pick a tenant from the suggestions" if "Tenant ID" in str(e) else str(e))
             return
-        try:
-            self.rent = float(self.rent_e.get().strip() or 0)
-            self.electricity = float(self.elec_e.get().strip() or 0)
-            self.water = float(self.water_e.get().strip() or 0)
-        except:
-            messagebox.showerror("Input", "Numeric values required for amounts")
+        # payments may still go to moved-out tenants settling arrears, just not to unknown ids
+        if not self.parent.tenant_model.get(fields["tenant_id"]):
+            messagebox.showerror("Input", f"No tenant with ID {fields['tenant_id']}")
             return
-        self.status = self.status_combo.get()
-        self.note = self.note_e.get().strip() or ""
-        self.date_paid = datetime.date.today().isoformat()
+        for k, v in fields.items():
+            setattr(self, k, v)
         self.saved = True
         self.destroy()
 
@@ -1406,8 +1840,19 @@ class MaintenanceDialog(ctk.CTkToplevel):
         self.destroy()
 
 def main():
-    db = Database()
+    timer = StartupTimer(_STARTED)
+    timer.mark("imports")
+    db = Database(timer=timer)
+    if os.environ.get(SLOW_QUERY_MS_ENV):
+        db.stats.slow_ms = float(os.environ[SLOW_QUERY_MS_ENV])
+    db.stats.log_path = os.environ.get(SLOW_QUERY_LOG_ENV)
     app = LoginWindow(db)
+    timer.mark("login window")
+    if STARTUP_TIMING:
+        def report():
+            timer.mark("first idle")
+            print(timer.report(), file=sys.stderr)
+        app.after_idle(report)
     app.mainloop()
     db.close()
 
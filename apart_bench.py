@@ -0,0 +1,222 @@
+import argparse
+import datetime
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from apart_core import Database, TenantModel, PaymentModel, BillingController, MoveOutController, ExportController
+from apart_synth import SCALES, create_database
+
+# Headless benchmarks for the model/controller paths the front desk waits on, run
+# against generated databases (apart_synth) of one or more sizes:
+#   python apart_bench.py --sizes small medium
+#   python apart_bench.py --sizes small medium --save-baseline
+# Each size is generated once into --data-dir and reused; every run works on a fresh
+# backup copy. Writes (move-outs, delete, restore) run inside a transaction that is
+# rolled back, so repeats see the same data. Baselines are per machine: save one
+# before a change, rerun after it, and the run exits 1 when an operation's median
+# got slower than the threshold allows.
+# Data is anchored to the first of the current month, since overdue_list and
+# stats_sum measure from today; a new month regenerates (and replaces) the file.
+
+BENCH_SEED = 1
+BENCH_REPEAT = 5
+BASELINE_FILE = "bench_baseline.json"
+REGRESSION_THRESHOLD = 0.25
+# differences below this are timer noise, never a regression
+REGRESSION_FLOOR_MS = 2.0
+
+class Rollback(Exception):
+    pass
+
+class Bench:
+    # Each operation is prepared (untimed) and returns the callable to time; the
+    # callable returns how many rows it handled.
+    OPERATIONS = (
+        ("tenants.all", False),
+        ("payments.all", False),
+        ("payments.page", False),
+        ("payments.stats_sum", False),
+        ("billing.overdue_list", False),
+        ("moveouts.run", True),
+        ("tenants.delete", True),
+        ("tenants.restore", True),
+        ("export.payments_csv", False),
+    )
+
+    def __init__(self, db: Database, workdir):
+        self.db = db
+        self.workdir = workdir
+        self.tenant_model = TenantModel(db)
+        self.payment_model = PaymentModel(db)
+        self.billing = BillingController(db, self.payment_model, self.tenant_model)
+        self.moveouts = MoveOutController(db)
+        self.export = ExportController(db, self.payment_model)
+        count = db.query("SELECT COUNT(*) FROM tenants")[0][0]
+        rows = db.query("SELECT tenant_id FROM tenants WHERE status='Active' ORDER BY tenant_id LIMIT 1 OFFSET ?", (count // 4,))
+        self.victim = rows[0][0] if rows else None
+
+    def prepare(self, name):
+        tm, pm = self.tenant_model, self.payment_model
+        if name == "tenants.all":
+            return lambda: len(tm.all())
+        if name == "payments.all":
+            return lambda: len(pm.all())
+        if name == "payments.page":
+            return lambda: len(pm.page(limit=200))
+        if name == "payments.stats_sum":
+            return lambda: int(pm.stats_sum() is not None)
+        if name == "billing.overdue_list":
+            return lambda: len(self.billing.overdue_list())
+        if name == "moveouts.run":
+            return lambda: self.moveouts.run(force=True)
+        if name == "tenants.delete":
+            return lambda: int(tm.delete(self.victim))
+        if name == "tenants.restore":
+            tm.delete(self.victim)
+            deleted_id = self.db.execute("SELECT MAX(deleted_id) FROM deleted_tenants").fetchone()[0]
+            return lambda: int(bool(tm.restore(deleted_id)))
+        if name == "export.payments_csv":
+            path = os.path.join(self.workdir, "payments.csv")
+            return lambda: self.export.export_payments(path)
+        raise ValueError(f"Unknown operation {name}")
+
+    def measure(self, name, rollback, trace=False):
+        # returns (rows, seconds, peak traced bytes or None)
+        def timed():
+            fn = self.prepare(name)
+            if trace:
+                tracemalloc.start()
+            started = time.perf_counter()
+            rows = fn()
+            elapsed = time.perf_counter() - started
+            peak = None
+            if trace:
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+            return rows, elapsed, peak
+        if not rollback:
+            return timed()
+        try:
+            with self.db.transaction():
+                result = timed()
+                raise Rollback()
+        except Rollback:
+            return result
+
+    def run(self, name, rollback, repeat):
+        self.measure(name, rollback)  # warm-up: page cache, prepared statements
+        latencies, rows = [], 0
+        for _ in range(repeat):
+            rows, elapsed, _ = self.measure(name, rollback)
+            latencies.append(elapsed)
+        # tracing slows Python down, so memory is taken from a separate, untimed run
+        peak = self.measure(name, rollback, trace=True)[2]
+        return summarize(latencies, rows, peak)
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p * len(ordered)) - 1)]
+
+def summarize(latencies, rows, peak):
+    p50 = percentile(latencies, 0.5)
+    return {"p50_ms": p50 * 1000, "p95_ms": percentile(latencies, 0.95) * 1000, "max_ms": max(latencies) * 1000,
+            "rows": rows, "rows_per_s": rows / p50 if p50 else 0.0, "peak_mib": peak / (1 << 20)}
+
+def ensure_database(data_dir, size):
+    anchor = datetime.date.today().replace(day=1)
+    prefix = f"{size}-seed{BENCH_SEED}-"
+    path = os.path.join(data_dir, f"{prefix}{anchor:%Y-%m}.db")
+    if not os.path.exists(path):
+        os.makedirs(data_dir, exist_ok=True)
+        for old in os.listdir(data_dir):
+            if old.startswith(prefix):
+                os.remove(os.path.join(data_dir, old))
+        print(f"generating {size} database for {anchor:%Y-%m} ...", file=sys.stderr)
+        part = path + ".part"
+        create_database(part, seed=BENCH_SEED, scale=size, today=anchor)
+        os.replace(part, path)
+    return path
+
+def bench_size(data_dir, size, operations, repeat):
+    source = Database(ensure_database(data_dir, size))
+    with tempfile.TemporaryDirectory(prefix="apart-bench-") as workdir:
+        try:
+            copy = source.backup(os.path.join(workdir, "bench.db"))
+        finally:
+            source.close()
+        db = Database(copy)
+        try:
+            bench = Bench(db, workdir)
+            results = {}
+            for name, rollback in Bench.OPERATIONS:
+                if name in operations:
+                    results[name] = bench.run(name, rollback, repeat)
+                    print(f"  {size} {name}: {results[name]['p50_ms']:.1f} ms", file=sys.stderr)
+            return results
+        finally:
+            db.close()
+
+def compare(results, baseline, threshold):
+    # -> list of (key, base_ms, now_ms) for medians over threshold and the noise floor
+    regressions = []
+    for key, r in results.items():
+        base = baseline.get(key)
+        if base and r["p50_ms"] > base["p50_ms"] * (1 + threshold) and r["p50_ms"] - base["p50_ms"] > REGRESSION_FLOOR_MS:
+            regressions.append((key, base["p50_ms"], r["p50_ms"]))
+    return regressions
+
+def print_report(results, baseline):
+    print(f"{'operation':<34}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}{'rows':>10}{'rows/s':>12}{'peak MiB':>10}{'vs base':>9}")
+    for key, r in results.items():
+        base = baseline.get(key)
+        change = f"{(r['p50_ms'] / base['p50_ms'] - 1) * 100:+.0f}%" if base and base["p50_ms"] else ""
+        print(f"{key:<34}{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}{r['max_ms']:>10.1f}{r['rows']:>10}"
+              f"{r['rows_per_s']:>12.0f}{r['peak_mib']:>10.1f}{change:>9}")
+
+def main(argv=None):
+    names = [name for name, _ in Bench.OPERATIONS]
+    parser = argparse.ArgumentParser(description="Benchmark model and controller operations on generated databases.")
+    parser.add_argument("--sizes", nargs="+", default=["small", "medium"], choices=list(SCALES))
+    parser.add_argument("--ops", nargs="+", choices=names, help="operations to run (default all)")
+    parser.add_argument("--skip", nargs="+", choices=names, default=[], help="operations to leave out")
+    parser.add_argument("--repeat", type=int, default=BENCH_REPEAT, help=f"timed runs per operation (default {BENCH_REPEAT})")
+    parser.add_argument("--data-dir", default="bench_data", help="where generated databases are kept")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help=f"allowed median slowdown before failing, as a fraction (default {REGRESSION_THRESHOLD})")
+    parser.add_argument("--json", help="also write the raw results to this file")
+    args = parser.parse_args(argv)
+
+    operations = set(args.ops or names) - set(args.skip)
+    results = {}
+    for size in args.sizes:
+        for name, r in bench_size(args.data_dir, size, operations, args.repeat).items():
+            results[f"{size}/{name}"] = r
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(results, baseline)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.save_baseline:
+        baseline.update(results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"baseline saved to {args.baseline}")
+        return 0
+    regressions = compare(results, baseline, args.threshold)
+    for key, base_ms, now_ms in regressions:
+        print(f"REGRESSION {key}: {base_ms:.1f} ms -> {now_ms:.1f} ms")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
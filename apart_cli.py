@@ -0,0 +1,175 @@
+import argparse
+import csv
+import datetime
+import os
+import sys
+
+from apart_core import (DB_FILE, SLOW_QUERY_MS, BCRYPT_ROUNDS, Database, TenantModel, PaymentModel, BillingController, ExportController,
+                        MoveOutController, IntegrityController)
+from apart_synth import SCALES, create_database
+
+# Batch jobs for cron: imports only the database/model/controller layer, never Tk.
+#   python apart_cli.py moveouts
+#   python apart_cli.py overdue --days 7 -o overdue.csv
+#   python apart_cli.py report --from 2025-01-01 --period month --by-type
+#   python apart_cli.py export payments.csv.gz --from 2025-01-01
+#   python apart_cli.py check --repair
+#   python apart_cli.py backup backups/apartment-$(date +%F).db
+#   python apart_cli.py bcrypt-rounds 13
+#   python apart_cli.py --db load.db generate --scale large --seed 7
+
+def write_csv(out, header, rows):
+    f = open(out, "w", newline="", encoding="utf-8") if out else sys.stdout
+    try:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+    finally:
+        if out:
+            f.close()
+
+def cmd_moveouts(db, args):
+    count = MoveOutController(db).run(force=args.force, today=args.date)
+    print(f"{count} tenant(s) marked moved out")
+
+def cmd_overdue(db, args):
+    ctrl = BillingController(db, PaymentModel(db), TenantModel(db))
+    rows = ctrl.overdue_list(policy_days=args.days)
+    header = ["tenant_id", "name", "status", "days_overdue", "date_paid", "total", "outstanding"]
+    write_csv(args.output, header, [[r[h] for h in header] for r in rows])
+    if args.output:
+        print(f"{len(rows)} overdue tenant(s) written to {args.output}")
+
+def cmd_report(db, args):
+    rows = PaymentModel(db).revenue(args.date_from, args.date_to, args.period, args.by_type, args.status or None)
+    header = ["period"] + (["unit_type"] if args.by_type else []) + ["rent", "electricity", "water", "total", "payments"]
+    write_csv(args.output, header, [[r[h] for h in header] for r in rows])
+
+def cmd_export(db, args):
+    filters = {k: v for k, v in (("date_from", args.date_from), ("date_to", args.date_to), ("status", args.status)) if v}
+    compress = True if args.gzip else None
+    count = ExportController(db, PaymentModel(db)).export_payments(args.path, filters, compress=compress)
+    print(f"{count} payment(s) exported to {args.path}")
+
+def cmd_check(db, args):
+    ctrl = IntegrityController(db, PaymentModel(db))
+    problems = ctrl.check()
+    for p in problems:
+        print(p)
+    if problems and args.repair:
+        print("rebuilt " + ", ".join(ctrl.repair()))
+        problems = ctrl.check()
+        for p in problems:
+            print(f"still: {p}")
+    if not problems:
+        print("ok")
+    return 1 if problems else 0
+
+def cmd_backup(db, args):
+    dest = args.dest
+    if os.path.isdir(dest):
+        dest = os.path.join(dest, f"apartment-{datetime.date.today().isoformat()}.db")
+    print(f"backup written to {db.backup(dest)}")
+
+def cmd_bcrypt_rounds(db, args):
+    if args.rounds is not None:
+        try:
+            db.set_bcrypt_rounds(args.rounds)
+        except ValueError as e:
+            sys.exit(str(e))
+    print(f"bcrypt rounds: {db.bcrypt_rounds()} (existing hashes are upgraded at each user's next login)")
+
+def cmd_generate(db, args):
+    if os.path.exists(args.db):
+        if not args.replace:
+            sys.exit(f"{args.db} already exists; pass --replace to overwrite it")
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(args.db + suffix):
+                os.remove(args.db + suffix)
+    today = datetime.date.fromisoformat(args.today) if args.today else None
+    def progress(stage, done, total):
+        print(f"{stage}: {done}/{total}", file=sys.stderr)
+    counts = create_database(args.db, seed=args.seed, scale=args.scale, units=args.units, tenants=args.tenants,
+                             payments=args.payments, today=today, progress=progress)
+    print(", ".join(f"{n} {table}" for table, n in counts.items()) + f" written to {args.db}")
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Apartment system batch jobs (no GUI).")
+    parser.add_argument("--db", default=DB_FILE, help=f"database file (default {DB_FILE})")
+    parser.add_argument("--slow-ms", type=float, help=f"log statements slower than this with their plan (default {SLOW_QUERY_MS})")
+    parser.add_argument("--slow-log", help="append slow statements and their plans to this file")
+    parser.add_argument("--query-stats", action="store_true", help="print per-statement timings to stderr when done")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("moveouts", help="mark tenants whose move-out date has passed")
+    p.add_argument("--force", action="store_true", help="run even if today's sweep already happened")
+    p.add_argument("--date", help="treat this day (YYYY-MM-DD) as today")
+    p.set_defaults(func=cmd_moveouts)
+
+    p = sub.add_parser("overdue", help="list overdue tenants as CSV")
+    p.add_argument("--days", type=int, default=7, help="grace period in days (default 7)")
+    p.add_argument("-o", "--output", help="write to this file instead of stdout")
+    p.set_defaults(func=cmd_overdue)
+
+    p = sub.add_parser("report", help="income report as CSV")
+    p.add_argument("--from", dest="date_from")
+    p.add_argument("--to", dest="date_to")
+    p.add_argument("--period", default="month", choices=list(PaymentModel.REVENUE_PERIODS))
+    p.add_argument("--by-type", action="store_true", help="split by unit type")
+    p.add_argument("--status", action="append", help="payment status to include, repeatable (default all)")
+    p.add_argument("-o", "--output", help="write to this file instead of stdout")
+    p.set_defaults(func=cmd_report)
+
+    p = sub.add_parser("export", help="export payments to CSV (.gz compresses)")
+    p.add_argument("path")
+    p.add_argument("--from", dest="date_from")
+    p.add_argument("--to", dest="date_to")
+    p.add_argument("--status")
+    p.add_argument("--gzip", action="store_true")
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("check", help="integrity check; exits 1 when problems are found")
+    p.add_argument("--repair", action="store_true", help="rebuild the summary tables and occupant counts")
+    p.set_defaults(func=cmd_check)
+
+    p = sub.add_parser("backup", help="online backup to a file or directory")
+    p.add_argument("dest")
+    p.set_defaults(func=cmd_backup)
+
+    p = sub.add_parser("bcrypt-rounds", help="show or set the password hashing cost")
+    p.add_argument("rounds", type=int, nargs="?", help=f"new cost, 4-31 (default {BCRYPT_ROUNDS})")
+    p.set_defaults(func=cmd_bcrypt_rounds)
+
+    p = sub.add_parser("generate", help="create --db filled with reproducible synthetic data for load testing")
+    p.add_argument("--scale", default="small", choices=list(SCALES),
+                   help=", ".join(f"{name}: {u} units/{t} tenants/{pay} payments" for name, (u, t, pay) in SCALES.items()))
+    p.add_argument("--units", type=int, help="override the scale's unit count")
+    p.add_argument("--tenants", type=int, help="override the scale's tenant count")
+    p.add_argument("--payments", type=int, help="override the scale's (approximate) payment count")
+    p.add_argument("--seed", type=int, default=1)
+    p.add_argument("--today", help="anchor date YYYY-MM-DD (default today); pin it for identical reruns")
+    p.add_argument("--replace", action="store_true", help="delete an existing --db file first")
+    p.set_defaults(func=cmd_generate, creates_db=True)
+    return parser
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if getattr(args, "creates_db", False):
+        return args.func(None, args) or 0
+    if not os.path.exists(args.db):
+        # Database() would create and seed a fresh file; batch jobs must not
+        parser.error(f"database not found: {args.db}")
+    db = Database(args.db)
+    if args.slow_ms is not None:
+        db.stats.slow_ms = args.slow_ms
+    db.stats.log_path = args.slow_log
+    try:
+        return args.func(db, args) or 0
+    finally:
+        if args.query_stats:
+            print(db.stats.report(), file=sys.stderr)
+        db.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,2349 @@
+import sqlite3
+import os
+import re
+import sys
+import random
+import datetime
+import csv
+import gzip
+import json
+import threading
+import queue
+import time
+import bisect
+import unicodedata
+from contextlib import contextmanager
+from collections import namedtuple, OrderedDict, Counter, deque
+
+try:
+    import bcrypt
+except Exception:
+    bcrypt = None
+
+DB_FILE = "apartment_system.db"
+
+READER_POOL_SIZE = 4
+BUSY_TIMEOUT_MS = 5000
+
+DORM_MAX_OCCUPANTS = 4
+UNIT_TYPES = ("Family", "Solo", "Dorm")
+PAYMENT_STATUSES = ("Paid", "Overdue", "Refund")
+NOTICE_PERIOD_DAYS = 30
+LOOKUP_CACHE_SIZE = 256
+UNIT_DETAIL_MAINTENANCE = 6
+IMPORT_CHUNK_SIZE = 20000
+IMPORT_CACHE_KB = 256 * 1024
+# bcrypt cost; app_state key 'bcrypt_rounds' overrides it per database (`apart_cli.py
+# bcrypt-rounds N` sets it). Hashes with a different cost are rehashed at the next
+# successful login.
+BCRYPT_ROUNDS = 12
+LOGIN_FREE_ATTEMPTS = 3
+LOGIN_MAX_BACKOFF_S = 300
+LOGIN_FAILURE_TTL_S = 15 * 60
+LOGIN_TRACKED_USERS = 1000
+# Statements slower than this are logged with their EXPLAIN QUERY PLAN.
+SLOW_QUERY_MS = 250
+QUERY_STATS_LIMIT = 500
+SEARCH_LIMIT = 500
+# bm25 costs time per matching row, so only the newest this-many matches are ranked
+SEARCH_RANK_WINDOW = 5000
+# payment form type-ahead: suggestions shown, and keys scanned per keystroke at most
+TENANT_SUGGESTIONS = 8
+TENANT_INDEX_SCAN = 20000
+PHONE_LIKE = re.compile(r"[+(]?\d[\d\s().-]*")
+
+def ensure_column(cur, table, column, col_def):
+    cur.execute(f"PRAGMA table_info({table})")
+    cols = [r[1] for r in cur.fetchall()]
+    if column not in cols:
+        cur.execute(f"ALTER TABLE {table} ADD COLUMN {column} {col_def}")
+
+def migration_base_schema(cur):
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS users (
+        user_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT UNIQUE,
+        password TEXT,
+        role TEXT
+    );
+    """)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS owners (
+        owner_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT,
+        contact TEXT,
+        address TEXT
+    );
+    """)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS units (
+        unit_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        unit_code TEXT,
+        type TEXT,
+        price REAL,
+        status TEXT
+    );
+    """)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS tenants (
+        tenant_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT,
+        contact TEXT,
+        unit_id INTEGER,
+        tenant_type TEXT,
+        move_in DATE,
+        move_out DATE,
+        status TEXT,
+        guardian_name TEXT,
+        guardian_contact TEXT,
+        guardian_relation TEXT,
+        emergency_contact TEXT,
+        advance_paid REAL DEFAULT 0,
+        deposit_paid REAL DEFAULT 0,
+        FOREIGN KEY(unit_id) REFERENCES units(unit_id)
+    );
+    """)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS deleted_tenants (
+        deleted_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        tenant_id INTEGER,
+        name TEXT,
+        contact TEXT,
+        unit_id INTEGER,
+        tenant_type TEXT,
+        move_in DATE,
+        move_out DATE,
+        status TEXT,
+        guardian_name TEXT,
+        guardian_contact TEXT,
+        guardian_relation TEXT,
+        emergency_contact TEXT,
+        deleted_date DATE,
+        reason TEXT
+    );
+    """)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS payments (
+        payment_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        tenant_id INTEGER,
+        rent REAL,
+        electricity REAL,
+        water REAL,
+        total REAL,
+        date_paid DATE,
+        status TEXT,
+        note TEXT,
+        FOREIGN KEY(tenant_id) REFERENCES tenants(tenant_id)
+    );
+    """)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS maintenance (
+        request_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        tenant_id INTEGER,
+        description TEXT,
+        priority TEXT,
+        date_requested DATE,
+        status TEXT,
+        assigned_staff INTEGER,
+        fee REAL DEFAULT 0,
+        FOREIGN KEY(tenant_id) REFERENCES tenants(tenant_id)
+    );
+    """)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS staff (
+        staff_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT,
+        role TEXT,
+        contact TEXT
+    );
+    """)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS reports (
+        report_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        type TEXT,
+        generated_date DATE,
+        filepath TEXT
+    );
+    """)
+    ensure_column(cur, "tenants", "guardian_name", "TEXT DEFAULT ''")
+    ensure_column(cur, "tenants", "guardian_contact", "TEXT DEFAULT ''")
+    ensure_column(cur, "tenants", "guardian_relation", "TEXT DEFAULT ''")
+    ensure_column(cur, "tenants", "emergency_contact", "TEXT DEFAULT ''")
+    ensure_column(cur, "tenants", "advance_paid", "REAL DEFAULT 0")
+    ensure_column(cur, "tenants", "deposit_paid", "REAL DEFAULT 0")
+    ensure_column(cur, "payments", "note", "TEXT DEFAULT ''")
+
+def migration_indexes(cur):
+    # last_payment_date / unpaid_exists: seek by tenant, read date and status from the index
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_payments_tenant_date ON payments(tenant_id, date_paid, status)")
+    # stats_sum: range on date_paid, sum(total) without touching the table
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_payments_date_total ON payments(date_paid, total)")
+    # dorm occupancy COUNT and tenants-by-unit lookups
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_tenants_unit_type_status ON tenants(unit_id, tenant_type, status)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_maintenance_tenant ON maintenance(tenant_id)")
+
+def migration_app_state(cur):
+    # small key/value store shared by every workstation (last maintenance runs etc.)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS app_state (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    );
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_tenants_move_out ON tenants(move_out)")
+
+TENANT_BALANCE_SELECT = """SELECT tenant_id, MAX(date_paid),
+       IFNULL(SUM(CASE WHEN status='Paid' THEN total END), 0),
+       IFNULL(SUM(status!='Paid'), 0),
+       IFNULL(SUM(CASE WHEN status='Overdue' THEN total END), 0),
+       MIN(CASE WHEN status='Overdue' THEN date_paid END)
+FROM payments"""
+
+def rebuild_tenant_balances(cur, tenant_id=None):
+    if tenant_id is None:
+        cur.execute("DELETE FROM tenant_balances")
+        cur.execute(f"INSERT INTO tenant_balances {TENANT_BALANCE_SELECT} WHERE tenant_id IS NOT NULL GROUP BY tenant_id")
+    else:
+        cur.execute("DELETE FROM tenant_balances WHERE tenant_id=?", (tenant_id,))
+        cur.execute(f"INSERT INTO tenant_balances {TENANT_BALANCE_SELECT} WHERE tenant_id=? GROUP BY tenant_id", (tenant_id,))
+
+def migration_tenant_balances(cur):
+    # Per-tenant billing summary kept current by triggers on payments. Inserts (the hot
+    # path) are applied incrementally; updates and deletes recompute the affected
+    # tenants from the payments index. Same meaning as the old per-tenant queries:
+    # unpaid_count counts status != 'Paid', outstanding sums Overdue totals, and
+    # oldest_unpaid is the date of the oldest Overdue payment.
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS tenant_balances (
+        tenant_id INTEGER PRIMARY KEY,
+        last_payment_date DATE,
+        total_paid REAL DEFAULT 0,
+        unpaid_count INTEGER DEFAULT 0,
+        outstanding REAL DEFAULT 0,
+        oldest_unpaid DATE
+    );
+    """)
+    cur.execute("""
+    CREATE TRIGGER IF NOT EXISTS trg_payments_balance_ins AFTER INSERT ON payments
+    WHEN NEW.tenant_id IS NOT NULL
+    BEGIN
+        INSERT INTO tenant_balances (tenant_id, last_payment_date, total_paid, unpaid_count, outstanding, oldest_unpaid)
+        VALUES (NEW.tenant_id, NEW.date_paid,
+                CASE WHEN NEW.status='Paid' THEN IFNULL(NEW.total, 0) ELSE 0 END,
+                IFNULL(NEW.status!='Paid', 0),
+                CASE WHEN NEW.status='Overdue' THEN IFNULL(NEW.total, 0) ELSE 0 END,
+                CASE WHEN NEW.status='Overdue' THEN NEW.date_paid END)
+        ON CONFLICT(tenant_id) DO UPDATE SET
+            last_payment_date = CASE WHEN last_payment_date IS NULL OR excluded.last_payment_date > last_payment_date
+                                     THEN excluded.last_payment_date ELSE last_payment_date END,
+            total_paid = total_paid + excluded.total_paid,
+            unpaid_count = unpaid_count + excluded.unpaid_count,
+            outstanding = outstanding + excluded.outstanding,
+            oldest_unpaid = CASE WHEN oldest_unpaid IS NULL OR excluded.oldest_unpaid < oldest_unpaid
+                                 THEN IFNULL(excluded.oldest_unpaid, oldest_unpaid) ELSE oldest_unpaid END;
+    END;
+    """)
+    for name, event, ids in (("upd", "UPDATE", ("OLD", "NEW")), ("del", "DELETE", ("OLD",))):
+        body = ""
+        for ref in ids:
+            body += f"""
+        DELETE FROM tenant_balances WHERE tenant_id = {ref}.tenant_id;
+        INSERT INTO tenant_balances {TENANT_BALANCE_SELECT} WHERE tenant_id = {ref}.tenant_id GROUP BY tenant_id;"""
+        cur.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS trg_payments_balance_{name} AFTER {event} ON payments
+    BEGIN{body}
+    END;
+    """)
+    rebuild_tenant_balances(cur)
+
+# Set-based form of trg_payments_balance_ins over the payments in {source}.
+TENANT_BALANCE_BULK_UPSERT = """
+INSERT INTO tenant_balances (tenant_id, last_payment_date, total_paid, unpaid_count, outstanding, oldest_unpaid)
+SELECT tenant_id, MAX(date_paid),
+       SUM(CASE WHEN status='Paid' THEN IFNULL(total, 0) ELSE 0 END),
+       SUM(IFNULL(status!='Paid', 0)),
+       SUM(CASE WHEN status='Overdue' THEN IFNULL(total, 0) ELSE 0 END),
+       MIN(CASE WHEN status='Overdue' THEN date_paid END)
+FROM {source} WHERE tenant_id IS NOT NULL GROUP BY tenant_id
+ON CONFLICT(tenant_id) DO UPDATE SET
+    last_payment_date = CASE WHEN last_payment_date IS NULL OR excluded.last_payment_date > last_payment_date
+                             THEN excluded.last_payment_date ELSE last_payment_date END,
+    total_paid = total_paid + excluded.total_paid,
+    unpaid_count = unpaid_count + excluded.unpaid_count,
+    outstanding = outstanding + excluded.outstanding,
+    oldest_unpaid = CASE WHEN oldest_unpaid IS NULL OR excluded.oldest_unpaid < oldest_unpaid
+                         THEN IFNULL(excluded.oldest_unpaid, oldest_unpaid) ELSE oldest_unpaid END"""
+
+# The unit type of the payer's unit, stamped on each payment as it is inserted ({ref}
+# is the tenant id), so later unit moves or tenant deletion never re-bucket revenue.
+PAYMENT_UNIT_TYPE = """IFNULL((SELECT u.type FROM tenants t JOIN units u ON u.unit_id = t.unit_id
+                               WHERE t.tenant_id = {ref}), 'Unassigned')"""
+
+REVENUE_DAILY_SELECT = """SELECT p.date_paid, IFNULL(p.unit_type, 'Unassigned'), IFNULL(p.status, ''),
+       IFNULL(SUM(p.rent), 0), IFNULL(SUM(p.electricity), 0), IFNULL(SUM(p.water), 0), IFNULL(SUM(p.total), 0), COUNT(*)
+FROM payments p
+WHERE p.date_paid IS NOT NULL
+GROUP BY p.date_paid, IFNULL(p.unit_type, 'Unassigned'), IFNULL(p.status, '')"""
+
+def rebuild_revenue_daily(cur):
+    cur.execute("DELETE FROM revenue_daily")
+    cur.execute(f"INSERT INTO revenue_daily (day, unit_type, status, rent, electricity, water, total, payments) {REVENUE_DAILY_SELECT}")
+
+def migration_revenue_daily(cur):
+    # Daily revenue by unit type and payment status, with one column per charge
+    # component. Each payment carries the unit type it was paid under (existing ones
+    # get their tenant's current type, the best still known), so moving or deleting a
+    # tenant never re-buckets revenue; rebuild_revenue_daily() re-derives everything
+    # from payments if they drift.
+    ensure_column(cur, "payments", "unit_type", "TEXT")
+    cur.execute(f"UPDATE payments SET unit_type = {PAYMENT_UNIT_TYPE.format(ref='payments.tenant_id')} WHERE unit_type IS NULL")
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS revenue_daily (
+        day DATE NOT NULL,
+        unit_type TEXT NOT NULL,
+        status TEXT NOT NULL,
+        rent REAL DEFAULT 0,
+        electricity REAL DEFAULT 0,
+        water REAL DEFAULT 0,
+        total REAL DEFAULT 0,
+        payments INTEGER DEFAULT 0,
+        PRIMARY KEY (day, unit_type, status)
+    );
+    """)
+    add = """
+        INSERT INTO revenue_daily (day, unit_type, status, rent, electricity, water, total, payments)
+        SELECT NEW.date_paid, IFNULL(NEW.unit_type, 'Unassigned'), IFNULL(NEW.status, ''),
+               IFNULL(NEW.rent, 0), IFNULL(NEW.electricity, 0), IFNULL(NEW.water, 0), IFNULL(NEW.total, 0), 1
+        WHERE NEW.date_paid IS NOT NULL
+        ON CONFLICT(day, unit_type, status) DO UPDATE SET
+            rent = rent + excluded.rent, electricity = electricity + excluded.electricity,
+            water = water + excluded.water, total = total + excluded.total, payments = payments + 1;"""
+    sub = """
+        UPDATE revenue_daily SET rent = rent - IFNULL(OLD.rent, 0), electricity = electricity - IFNULL(OLD.electricity, 0),
+               water = water - IFNULL(OLD.water, 0), total = total - IFNULL(OLD.total, 0), payments = payments - 1
+        WHERE day = OLD.date_paid AND unit_type = IFNULL(OLD.unit_type, 'Unassigned') AND status = IFNULL(OLD.status, '');
+        DELETE FROM revenue_daily WHERE day = OLD.date_paid AND payments <= 0;"""
+    for name, event, body in (("ins", "INSERT", add), ("upd", "UPDATE", sub + add), ("del", "DELETE", sub)):
+        cur.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS trg_payments_revenue_{name} AFTER {event} ON payments
+    BEGIN{body}
+    END;
+    """)
+    rebuild_revenue_daily(cur)
+
+# Set-based form of trg_payments_revenue_ins over the payments in {source}.
+REVENUE_DAILY_BULK_UPSERT = """
+INSERT INTO revenue_daily (day, unit_type, status, rent, electricity, water, total, payments)
+SELECT p.date_paid, IFNULL(p.unit_type, 'Unassigned'), IFNULL(p.status, ''),
+       SUM(IFNULL(p.rent, 0)), SUM(IFNULL(p.electricity, 0)), SUM(IFNULL(p.water, 0)), SUM(IFNULL(p.total, 0)), COUNT(*)
+FROM {source} p
+WHERE p.date_paid IS NOT NULL
+GROUP BY p.date_paid, IFNULL(p.unit_type, 'Unassigned'), IFNULL(p.status, '')
+ON CONFLICT(day, unit_type, status) DO UPDATE SET
+    rent = rent + excluded.rent, electricity = electricity + excluded.electricity,
+    water = water + excluded.water, total = total + excluded.total, payments = payments + excluded.payments"""
+
+TRACKED_TABLES = ("units", "tenants", "deleted_tenants", "payments", "maintenance", "staff", "users")
+
+def migration_table_versions(cur):
+    # One counter per table, bumped by triggers on every write, so a ChangeMonitor can
+    # tell which tables another connection touched without rescanning them.
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS table_versions (
+        table_name TEXT PRIMARY KEY,
+        version INTEGER NOT NULL DEFAULT 0
+    );
+    """)
+    for table in TRACKED_TABLES:
+        cur.execute("INSERT OR IGNORE INTO table_versions (table_name, version) VALUES (?, 0)", (table,))
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            cur.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS trg_version_{table}_{event.lower()} AFTER {event} ON {table}
+    BEGIN
+        UPDATE table_versions SET version = version + 1 WHERE table_name = '{table}';
+    END;
+    """)
+
+# A tenant occupies their unit until they are marked moved out.
+UNIT_FULL_MESSAGE = "unit is at capacity"
+
+def _occupies(row):
+    return f"{row}.unit_id IS NOT NULL AND IFNULL({row}.status, '') != 'Moved out'"
+
+def migration_unit_occupancy(cur):
+    # units.occupants is kept by triggers on tenants; units.status follows it (Vacant at
+    # zero, Occupied otherwise) unless someone set a status of their own. A unit with a
+    # capacity refuses any write that would push occupants past it, inside the same
+    # transaction as the tenant write, so two workstations cannot overfill a dorm.
+    ensure_column(cur, "units", "occupants", "INTEGER NOT NULL DEFAULT 0")
+    ensure_column(cur, "units", "capacity", "INTEGER")
+    cur.execute("UPDATE units SET capacity = ? WHERE lower(type) = 'dorm' AND capacity IS NULL", (DORM_MAX_OCCUPANTS,))
+    cur.execute(f"""UPDATE units SET occupants = (SELECT COUNT(*) FROM tenants t
+                                                   WHERE t.unit_id = units.unit_id AND {_occupies("t")})""")
+    cur.execute("""UPDATE units SET status = CASE WHEN occupants > 0 THEN 'Occupied' ELSE 'Vacant' END
+                   WHERE status IS NULL OR status IN ('Vacant', 'Occupied')""")
+    cur.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS trg_units_capacity BEFORE UPDATE OF occupants ON units
+    WHEN NEW.occupants > OLD.occupants AND NEW.capacity IS NOT NULL AND NEW.occupants > NEW.capacity
+    BEGIN
+        SELECT RAISE(ABORT, '{UNIT_FULL_MESSAGE}');
+    END;
+    """)
+    cur.execute("""
+    CREATE TRIGGER IF NOT EXISTS trg_units_status AFTER UPDATE OF occupants ON units
+    WHEN NEW.status IS NULL OR NEW.status IN ('Vacant', 'Occupied')
+    BEGIN
+        UPDATE units SET status = CASE WHEN NEW.occupants > 0 THEN 'Occupied' ELSE 'Vacant' END
+        WHERE unit_id = NEW.unit_id;
+    END;
+    """)
+    cur.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS trg_occupancy_ins AFTER INSERT ON tenants
+    WHEN {_occupies("NEW")}
+    BEGIN
+        UPDATE units SET occupants = occupants + 1 WHERE unit_id = NEW.unit_id;
+    END;
+    """)
+    cur.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS trg_occupancy_del AFTER DELETE ON tenants
+    WHEN {_occupies("OLD")}
+    BEGIN
+        UPDATE units SET occupants = occupants - 1 WHERE unit_id = OLD.unit_id;
+    END;
+    """)
+    cur.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS trg_occupancy_upd AFTER UPDATE OF unit_id, status ON tenants
+    WHEN ({_occupies("OLD")}) OR ({_occupies("NEW")})
+    BEGIN
+        UPDATE units SET occupants = occupants - 1 WHERE unit_id = OLD.unit_id AND {_occupies("OLD")};
+        UPDATE units SET occupants = occupants + 1 WHERE unit_id = NEW.unit_id AND {_occupies("NEW")};
+    END;
+    """)
+
+def seed_defaults(cur):
+    # Demo data for a brand-new file; every table is only filled when empty.
+    cur.execute("SELECT COUNT(*) as c FROM users")
+    if cur.fetchone()["c"] == 0:
+        cur.execute("INSERT INTO users (username,password,role) VALUES (?,?,?)", ("admin","admin","admin"))
+    cur.execute("SELECT COUNT(*) as sc FROM staff")
+    if cur.fetchone()["sc"] == 0:
+        staff_names = [("Carlos", "Technician"), ("Liza", "Caretaker"), ("Rob", "Electrician")]
+        for n, r in staff_names:
+            cur.execute("INSERT INTO staff (name, role, contact) VALUES (?,?,?)", (n, r, "0917123456"))
+    cur.execute("SELECT COUNT(*) as uc FROM units")
+    if cur.fetchone()["uc"] == 0:
+        unit_types = list(UNIT_TYPES)
+        for floor in range(1, 6):
+            for i in range(1,6):
+                code = f"{chr(64+floor)}{i}"
+                utype = random.choice(unit_types)
+                price = random.choice([4500,5000,5500,6000,7000,8000])
+                capacity = DORM_MAX_OCCUPANTS if utype == "Dorm" else None
+                cur.execute("INSERT INTO units (unit_code,type,price,status,capacity) VALUES (?,?,?,?,?)", (code, utype, price, "Vacant", capacity))
+    cur.execute("SELECT COUNT(*) as tc FROM tenants")
+    if cur.fetchone()["tc"] == 0:
+        cur2 = cur.connection.cursor()
+        cur2.execute("SELECT unit_id, type FROM units")
+        units = cur2.fetchall()
+        sample_names = ["Jasmine","Mariz","Rafael","Elaine","Mark","Jenny","Paolo","Carlos","April","Irene",
+                        "Nathan","Hannah","Chris","Lara","Ricardo","Andrea","Melvin","Sophia","Aaron","Nina"]
+        idx = 0
+        for u in units:
+            utype = u["type"]
+            if utype == "Family":
+                occ = 1 if random.random() > 0.6 else 0
+            elif utype == "Solo":
+                occ = 1 if random.random() > 0.4 else 0
+            else:
+                occ = random.randint(0, min(3, DORM_MAX_OCCUPANTS))
+            for j in range(occ):
+                name = f"{sample_names[idx % len(sample_names)]} {idx+1}"
+                contact = f"0917{random.randint(100000,999999)}"
+                move_in = (datetime.date.today() - datetime.timedelta(days=random.randint(0,400))).isoformat()
+                guardian_name = ""
+                guardian_contact = ""
+                guardian_relation = ""
+                if utype.lower() == "dorm":
+                    guardian_name = f"Guardian {idx+1}"
+                    guardian_contact = f"0917{random.randint(100000,999999)}"
+                    guardian_relation = "Parent"
+                cur.execute("""INSERT INTO tenants (name, contact, unit_id, tenant_type, move_in, move_out, status,
+                               guardian_name, guardian_contact, guardian_relation, emergency_contact, advance_paid, deposit_paid)
+                               VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)""",
+                            (name, contact, u["unit_id"], utype, move_in, None, "Active", guardian_name, guardian_contact, guardian_relation, "", random.choice([0,4500]), random.choice([0,4500])))
+                idx += 1
+        cur.execute("SELECT tenant_id FROM tenants")
+        tids = [r["tenant_id"] for r in cur.fetchall()]
+        for tid in tids:
+            rent = random.choice([4500,5000,5500,6000,7000])
+            elec = random.randint(200,900)
+            water = random.randint(100,400)
+            total = rent + elec + water
+            date_paid = (datetime.date.today() - datetime.timedelta(days=random.randint(0,60))).isoformat()
+            status = "Paid" if random.random()>0.15 else "Overdue"
+            cur.execute(f"INSERT INTO payments (tenant_id, rent, electricity, water, total, date_paid, status, unit_type) VALUES (?,?,?,?,?,?,?,{PAYMENT_UNIT_TYPE.format(ref='?1')})",
+                        (tid, rent, elec, water, total, date_paid, status))
+        for tid in tids[:15]:
+            desc = random.choice(["Broken door lock","Leaky faucet","Clogged drain"])
+            pr = random.choice(["Low","Medium","High"])
+            date_req = (datetime.date.today() - datetime.timedelta(days=random.randint(0,30))).isoformat()
+            stat = random.choice(["Pending","Ongoing","Done"])
+            fee = random.choice([0,150,250])
+            cur.execute("INSERT INTO maintenance (tenant_id, description, priority, date_requested, status, assigned_staff, fee) VALUES (?,?,?,?,?,?,?)",
+                        (tid, desc, pr, date_req, stat, random.choice([1,2,3]), fee))
+
+# (fts table, content table, rowid column, indexed columns with their bm25 weights)
+SEARCH_INDEXES = (
+    ("tenants_fts", "tenants", "tenant_id",
+     (("name", 10.0), ("contact", 4.0), ("guardian_name", 3.0), ("guardian_contact", 2.0), ("emergency_contact", 2.0))),
+    ("maintenance_fts", "maintenance", "request_id", (("description", 1.0),)),
+    ("deleted_tenants_fts", "deleted_tenants", "deleted_id",
+     (("name", 10.0), ("contact", 4.0), ("guardian_name", 3.0), ("guardian_contact", 2.0), ("reason", 1.0))),
+)
+
+def fts5_available():
+    try:
+        sqlite3.connect(":memory:").execute("CREATE VIRTUAL TABLE probe USING fts5(x)")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+def migration_search_index(cur):
+    # External-content FTS5 indexes (the text is not stored twice) kept in step by
+    # triggers; the update trigger only fires when an indexed column changes, so the
+    # move-out sweep and status edits never touch them. Without FTS5 in this SQLite
+    # build nothing is created and the models' search falls back to LIKE.
+    if not fts5_available():
+        return
+    for fts, table, key, weighted in SEARCH_INDEXES:
+        columns = [c for c, _ in weighted]
+        cols = ", ".join(columns)
+        new = ", ".join(f"NEW.{c}" for c in columns)
+        old = ", ".join(f"OLD.{c}" for c in columns)
+        cur.execute(f"""CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({cols}, content='{table}', content_rowid='{key}',
+                        tokenize='unicode61 remove_diacritics 2', prefix='2 3')""")
+        cur.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_{fts}_ins AFTER INSERT ON {table} BEGIN
+                            INSERT INTO {fts} (rowid, {cols}) VALUES (NEW.{key}, {new});
+                        END""")
+        cur.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_{fts}_del AFTER DELETE ON {table} BEGIN
+                            INSERT INTO {fts} ({fts}, rowid, {cols}) VALUES ('delete', OLD.{key}, {old});
+                        END""")
+        cur.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_{fts}_upd AFTER UPDATE OF {cols} ON {table} BEGIN
+                            INSERT INTO {fts} ({fts}, rowid, {cols}) VALUES ('delete', OLD.{key}, {old});
+                            INSERT INTO {fts} (rowid, {cols}) VALUES (NEW.{key}, {new});
+                        END""")
+        cur.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+
+def fts_match(text):
+    # free text -> FTS5 query where every word must match as a prefix ("mar 0917" finds
+    # "Mariz Santos, 09171234567"); None when there is nothing to search for
+    return " ".join(f'"{w}"*' for w in re.findall(r"\w+", text or "")) or None
+
+def search_sql(fts, key, text, select_from, weighted):
+    # -> (sql, params) without LIMIT, or (None, ()) for an empty search. With an FTS5
+    # index: the newest SEARCH_RANK_WINDOW hits (FTS5 walks rowids newest first and
+    # stops early) ordered by weighted bm25, so a one-letter search over 500k rows
+    # still answers in tens of ms. Without one every word is LIKE-matched against the
+    # same columns, with "_" (a word character) escaped so it only matches itself.
+    match = fts_match(text)
+    if match is None:
+        return None, ()
+    if fts:
+        weights = ", ".join(str(w) for _, w in weighted)
+        return (f"{select_from} JOIN (SELECT rowid, bm25({fts}, {weights}) AS score FROM {fts} WHERE {fts} MATCH ?"
+                f" ORDER BY rowid DESC LIMIT {SEARCH_RANK_WINDOW}) hits ON hits.rowid = {key} ORDER BY hits.score", (match,))
+    words = re.findall(r"\w+", text)
+    where = " AND ".join("(" + " OR ".join(f"{c} LIKE ? ESCAPE '\\'" for c, _ in weighted) + ")" for _ in words)
+    return f"{select_from} WHERE {where} ORDER BY {key} DESC", tuple("%" + w.replace("_", "\\_") + "%" for w in words for _ in weighted)
+
+def migration_seed_defaults(cur):
+    # Seeding used to run (four COUNT probes) on every launch; as a migration it runs once.
+    seed_defaults(cur)
+
+# Applied in order; PRAGMA user_version records how many have run.
+# Append new steps to the end, never reorder or edit shipped ones.
+MIGRATIONS = [
+    migration_base_schema,
+    migration_indexes,
+    migration_app_state,
+    migration_tenant_balances,
+    migration_revenue_daily,
+    migration_table_versions,
+    migration_unit_occupancy,
+    migration_seed_defaults,
+    migration_search_index,
+]
+
+# entity is a table name, operation one of insert/update/delete, ids a frozenset of
+# primary keys or None when the change is set-based and the rows are not known.
+ChangeEvent = namedtuple("ChangeEvent", "entity operation ids")
+
+class EventBus:
+    def __init__(self):
+        self._subscribers = {}
+        self._next_token = 0
+        self._lock = threading.Lock()
+
+    def subscribe(self, entities, callback):
+        # entities=None receives every event
+        with self._lock:
+            self._next_token += 1
+            self._subscribers[self._next_token] = (frozenset(entities) if entities is not None else None, callback)
+            return self._next_token
+
+    def unsubscribe(self, token):
+        with self._lock:
+            self._subscribers.pop(token, None)
+
+    def publish(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers.values())
+        for entities, callback in subscribers:
+            if entities is None or event.entity in entities:
+                callback(event)
+
+class ReadCache:
+    # Keyed lookups live in a bounded LRU, whole-table reads in named snapshots.
+    # Both are dropped when one of `entities` is published on the bus (our own
+    # writes) or invalidate() is called (foreign writes seen by ChangeMonitor).
+    # A load that was already running when the data changed is not stored, and
+    # reads inside this thread's open transaction skip the cache altogether.
+    _MISSING = object()
+
+    def __init__(self, db, entities, maxsize=LOOKUP_CACHE_SIZE):
+        self.db = db
+        self.maxsize = maxsize
+        self.version = 0
+        self._items = OrderedDict()
+        self._snapshots = {}
+        self._lock = threading.Lock()
+        db.events.subscribe(entities, lambda event: self.invalidate())
+
+    def get(self, key, load):
+        if self.db.in_transaction():
+            return load()
+        with self._lock:
+            value = self._items.get(key, self._MISSING)
+            if value is not self._MISSING:
+                self._items.move_to_end(key)
+                return value
+            version = self.version
+        value = load()
+        with self._lock:
+            if version == self.version:
+                self._items[key] = value
+                if len(self._items) > self.maxsize:
+                    self._items.popitem(last=False)
+        return value
+
+    def get_many(self, keys, load_many):
+        # load_many(missing_keys) -> {key: value}; every missing key is fetched in one call
+        if self.db.in_transaction():
+            return load_many(list(keys))
+        found, missing = {}, []
+        with self._lock:
+            for key in keys:
+                value = self._items.get(key, self._MISSING)
+                if value is self._MISSING:
+                    missing.append(key)
+                else:
+                    self._items.move_to_end(key)
+                    found[key] = value
+            version = self.version
+        if missing:
+            loaded = load_many(missing)
+            with self._lock:
+                for key in missing:
+                    found[key] = loaded.get(key)
+                    if version == self.version:
+                        self._items[key] = found[key]
+                while len(self._items) > self.maxsize:
+                    self._items.popitem(last=False)
+        return found
+
+    def peek(self, key, default=None):
+        with self._lock:
+            return self._items.get(key, default)
+
+    def snapshot(self, name, load):
+        if self.db.in_transaction():
+            return tuple(load())
+        with self._lock:
+            value = self._snapshots.get(name)
+            if value is not None:
+                return value
+            version = self.version
+        value = tuple(load())
+        with self._lock:
+            if version == self.version:
+                self._snapshots[name] = value
+        return value
+
+    def invalidate(self):
+        with self._lock:
+            self.version += 1
+            self._items.clear()
+            self._snapshots.clear()
+
+# One type-ahead suggestion; unit_code/unit_price are None for a tenant without a unit.
+TenantSuggestion = namedtuple("TenantSuggestion", "tenant_id name unit_code contact unit_price")
+
+def fold_text(text):
+    # lower case without accents, so "jose" finds "José"
+    text = str(text or "").casefold()
+    if text.isascii():
+        return text
+    return "".join(c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c))
+
+def _phone_key(text):
+    # contacts are matched on their digits, however they were punctuated
+    return re.sub(r"\D", "", text) if PHONE_LIKE.fullmatch(text) else None
+
+class TenantIndex:
+    # In-memory prefix index over active tenants for type-ahead. Every name word, the
+    # unit code and the contact digits of a tenant are keys in one sorted list, with
+    # the owning tenant ids in a parallel list (runs of equal keys ordered by id), so
+    # a prefix is two bisects and a scan that stops at `limit` hits. Build it off the
+    # Tk thread from TenantModel.index_rows(); update() then runs on the Tk thread.
+    def __init__(self, rows=()):
+        # rows arrive in tenant_id order, so each key's id list is already sorted
+        tenants, keys_of, by_key = {}, {}, {}
+        for r in rows:
+            tid = r["tenant_id"]
+            tenants[tid] = self._suggestion(r)
+            keys_of[tid] = self._tokens(r)
+            for k in keys_of[tid]:
+                by_key.setdefault(k, []).append(tid)
+        self._keys, self._ids = [], []
+        for k in sorted(by_key):
+            self._keys.extend([k] * len(by_key[k]))
+            self._ids.extend(by_key[k])
+        self._tenants = tenants
+        self._keys_of = keys_of
+
+    def __len__(self):
+        return len(self._tenants)
+
+    @staticmethod
+    def _suggestion(r):
+        return TenantSuggestion(r["tenant_id"], r["name"] or "", r["unit_code"], r["contact"] or "", r["unit_price"])
+
+    @staticmethod
+    def _tokens(r):
+        # interned, so the repeated first names and surnames share one string
+        keys = set(fold_text(r["name"]).split())
+        if r["unit_code"]:
+            keys.add(fold_text(r["unit_code"]).replace(" ", ""))
+        contact = str(r["contact"] or "").strip()
+        if contact:
+            keys.add(_phone_key(contact) or fold_text(contact).replace(" ", ""))
+        return tuple(sys.intern(k) for k in keys if k)
+
+    def _span(self, key, prefix=False):
+        lo = bisect.bisect_left(self._keys, key)
+        hi = bisect.bisect_left(self._keys, key + "\U0010ffff", lo) if prefix else bisect.bisect_right(self._keys, key, lo)
+        return lo, hi
+
+    def _remove(self, tenant_id):
+        self._tenants.pop(tenant_id, None)
+        for key in self._keys_of.pop(tenant_id, ()):
+            lo, hi = self._span(key)
+            pos = bisect.bisect_left(self._ids, tenant_id, lo, hi)
+            if pos < hi and self._ids[pos] == tenant_id:
+                del self._keys[pos]
+                del self._ids[pos]
+
+    def _add(self, r):
+        tid = r["tenant_id"]
+        self._tenants[tid] = self._suggestion(r)
+        self._keys_of[tid] = self._tokens(r)
+        for key in self._keys_of[tid]:
+            lo, hi = self._span(key)
+            pos = bisect.bisect_left(self._ids, tid, lo, hi)
+            self._keys.insert(pos, key)
+            self._ids.insert(pos, tid)
+
+    def update(self, rows, tenant_ids=()):
+        # rows come from index_rows() for the changed tenants; any of tenant_ids not
+        # among them (deleted, moved out) leaves the index. Each re-keyed tenant shifts
+        # the key lists (a few ms at 500k keys), so rows that did not change are skipped.
+        rows = list(rows)
+        gone = set(tenant_ids) - {r["tenant_id"] for r in rows}
+        rows = [r for r in rows if self._tenants.get(r["tenant_id"]) != self._suggestion(r)]
+        for tid in gone | {r["tenant_id"] for r in rows}:
+            self._remove(tid)
+        for r in rows:
+            self._add(r)
+
+    def get(self, tenant_id):
+        return self._tenants.get(tenant_id)
+
+    def search(self, text, limit=TENANT_SUGGESTIONS):
+        # Tenants where every typed word is the prefix of one of their keys. The word
+        # with the fewest candidates drives the scan, which looks at no more than
+        # TENANT_INDEX_SCAN keys; a tenant id typed as "#12" (or bare digits) comes first.
+        text = str(text or "").strip()
+        found, seen = [], set()
+        if text.lstrip("#").isdigit():
+            exact = self._tenants.get(int(text.lstrip("#")))
+            if exact:
+                found.append(exact)
+                seen.add(exact.tenant_id)
+        phone = _phone_key(text)
+        words = [phone] if phone else [w.replace("#", "") for w in fold_text(text).split()]
+        words = [w for w in words if w]
+        if not words:
+            return found
+        spans = sorted((hi - lo, lo, hi, w) for w in words for lo, hi in [self._span(w, prefix=True)])
+        _, lo, hi, _ = spans[0]
+        others = [w for *_, w in spans[1:]]
+        for pos in range(lo, min(hi, lo + TENANT_INDEX_SCAN)):
+            if len(found) >= limit:
+                break
+            tid = self._ids[pos]
+            if tid in seen:
+                continue
+            seen.add(tid)
+            keys = self._keys_of[tid]
+            if all(any(k.startswith(w) for k in keys) for w in others):
+                found.append(self._tenants[tid])
+        return found
+
+class StartupTimer:
+    # Wall-clock phases of a launch: mark(name) charges the time since the previous mark.
+    def __init__(self, start=None):
+        self.start = self._last = start if start is not None else time.perf_counter()
+        self.phases = []
+
+    def mark(self, name):
+        now = time.perf_counter()
+        self.phases.append((name, (now - self._last) * 1000))
+        self._last = now
+
+    def report(self):
+        lines = [f"{name:<24}{ms:9.1f} ms" for name, ms in self.phases]
+        lines.append(f"{'total':<24}{(self._last - self.start) * 1000:9.1f} ms")
+        return "\n".join(lines)
+
+def is_bcrypt_hash(stored):
+    return stored.startswith("$2b$") or stored.startswith("$2y$")
+
+def hash_password(password, rounds=BCRYPT_ROUNDS):
+    if not bcrypt:
+        return password
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+
+def check_password(password, stored):
+    if bcrypt and is_bcrypt_hash(stored):
+        try:
+            return bcrypt.checkpw(password.encode('utf-8'), stored.encode('utf-8'))
+        except ValueError:
+            return False
+    return password == stored
+
+_SQL_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_SQL_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)+\s*\)", re.IGNORECASE)
+_SQL_SPACES = re.compile(r"\s+")
+
+def normalize_sql(sql):
+    # one key per statement shape: whitespace collapsed, literals and IN lists folded
+    sql = _SQL_LITERALS.sub("?", _SQL_SPACES.sub(" ", sql).strip())
+    return _SQL_IN_LIST.sub("IN (?, ...)", sql)
+
+class QueryStats:
+    # Aggregated timings per normalized statement for everything that goes through
+    # Database.query/execute/executemany/stream, with the call sites that issued it.
+    # A statement slower than slow_ms is kept (and appended to log_path, if set)
+    # together with its query plan.
+    def __init__(self, slow_ms=SLOW_QUERY_MS, log_path=None, limit=QUERY_STATS_LIMIT):
+        self.slow_ms = slow_ms
+        self.log_path = log_path
+        self.limit = limit
+        self.slow = deque(maxlen=100)
+        self._stats = {}
+        self._normalized = {}
+        self._lock = threading.Lock()
+
+    def normalize(self, sql):
+        key = self._normalized.get(sql)
+        if key is None:
+            if len(self._normalized) > 4 * self.limit:
+                self._normalized.clear()
+            key = self._normalized[sql] = normalize_sql(sql)
+        return key
+
+    def record(self, sql, elapsed, rows, site):
+        # -> True when the statement was slow and its plan should be captured
+        key = self.normalize(sql)
+        slow = self.slow_ms is not None and elapsed * 1000 >= self.slow_ms
+        with self._lock:
+            s = self._stats.get(key)
+            if s is None:
+                if len(self._stats) >= self.limit:
+                    return slow
+                s = self._stats[key] = {"sql": key, "calls": 0, "total_ms": 0.0, "max_ms": 0.0, "rows": 0, "slow": 0,
+                                        "sites": Counter(), "plan": None}
+            s["calls"] += 1
+            s["total_ms"] += elapsed * 1000
+            s["max_ms"] = max(s["max_ms"], elapsed * 1000)
+            s["rows"] += max(rows or 0, 0)
+            s["slow"] += slow
+            if len(s["sites"]) < 20 or site in s["sites"]:
+                s["sites"][site] += 1
+        return slow
+
+    def log_slow(self, sql, elapsed, rows, site, plan):
+        key = self.normalize(sql)
+        entry = {"at": datetime.datetime.now().isoformat(timespec="seconds"), "sql": key, "ms": elapsed * 1000,
+                 "rows": rows, "site": site, "plan": plan}
+        with self._lock:
+            self.slow.append(entry)
+            if key in self._stats:
+                self._stats[key]["plan"] = plan
+        if self.log_path:
+            lines = [f"{entry['at']} slow query {entry['ms']:.1f} ms, {rows if rows is not None else '?'} rows, {site}",
+                     f"  {key}"] + [f"  plan: {step}" for step in plan]
+            try:
+                with open(self.log_path, "a", encoding="utf-8") as f:
+                    f.write("\n".join(lines) + "\n")
+            except OSError:
+                pass
+
+    def snapshot(self):
+        with self._lock:
+            rows = [dict(s, sites=s["sites"].most_common()) for s in self._stats.values()]
+        rows.sort(key=lambda s: s["total_ms"], reverse=True)
+        return rows
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self.slow.clear()
+
+    def report(self, top=25):
+        lines = [f"{'calls':>7}{'total ms':>11}{'avg ms':>9}{'max ms':>9}{'rows':>10}{'slow':>6}  statement"]
+        for s in self.snapshot()[:top]:
+            lines.append(f"{s['calls']:>7}{s['total_ms']:>11.1f}{s['total_ms'] / s['calls']:>9.2f}{s['max_ms']:>9.1f}"
+                         f"{s['rows']:>10}{s['slow']:>6}  {s['sql'][:160]}")
+            for site, calls in s["sites"][:3]:
+                lines.append(f"{'':>54}{calls:>6}x {site}")
+            for step in s["plan"] or ():
+                lines.append(f"{'':>54}plan: {step}")
+        with self._lock:
+            recent = list(self.slow)
+        if recent:
+            lines.append("")
+            lines.append(f"recent slow queries (over {self.slow_ms} ms):")
+            for e in recent[-20:]:
+                lines.append(f"  {e['at']} {e['ms']:.1f} ms, {e['site']}: {e['sql'][:120]}")
+        return "\n".join(lines)
+
+_call_sites = {}
+
+def _call_site(depth=2):
+    # the first frames outside Database/ReadCache internals, e.g. "TenantModel.all (apart_core.py:990)"
+    frame = sys._getframe(2)
+    key = []
+    while frame is not None and len(key) < depth:
+        code = frame.f_code
+        if code not in _INTERNAL_CODES and not code.co_filename.endswith("contextlib.py"):
+            key.append((code, frame.f_lineno))
+        frame = frame.f_back
+    key = tuple(key)
+    site = _call_sites.get(key)
+    if site is None:
+        if len(_call_sites) > 4096:
+            _call_sites.clear()
+        site = _call_sites[key] = " < ".join(f"{getattr(code, 'co_qualname', code.co_name)} ({os.path.basename(code.co_filename)}:{line})"
+                                             for code, line in key)
+    return site
+
+class Database:
+    def __init__(self, db_file=DB_FILE, timer=None):
+        self.db_file = db_file
+        self.timer = timer
+        self.stats = QueryStats()
+        first_time = not os.path.exists(db_file)
+        # self.conn is the single writer; every write goes through it under _tx_lock.
+        # Plain reads are served from a small pool of read-only connections so a
+        # background load never waits on (or blocks) payment entry.
+        self.conn = self._connect()
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self._mark("db open")
+        self._tx_lock = threading.RLock()
+        self._tx_depth = 0
+        self._tx_owner = None
+        self.events = EventBus()
+        self._pending_events = []
+        self._readers = queue.LifoQueue()
+        self._reader_count = 0
+        self._reader_lock = threading.Lock()
+        self._all_readers = []
+        self.setup_tables(first_time)
+
+    def _connect(self, read_only=False):
+        if read_only:
+            path = os.path.abspath(self.db_file).replace("?", "%3f").replace("#", "%23")
+            conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        else:
+            conn = sqlite3.connect(self.db_file, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        return conn
+
+    def _shares_writer(self):
+        # in-memory databases cannot be opened twice, and a transaction must see its own writes
+        return self.db_file == ":memory:" or self.in_transaction()
+
+    @contextmanager
+    def reader(self):
+        try:
+            conn = self._readers.get_nowait()
+        except queue.Empty:
+            with self._reader_lock:
+                grow = self._reader_count < READER_POOL_SIZE
+                if grow:
+                    self._reader_count += 1
+            if grow:
+                conn = self._connect(read_only=True)
+                self._all_readers.append(conn)
+            else:
+                conn = self._readers.get()
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
+
+    def _mark(self, name):
+        if self.timer:
+            self.timer.mark(name)
+
+    def setup_tables(self, first_time=False):
+        # Only what the first screen needs: a current schema (one PRAGMA when nothing is
+        # pending) and this connection's TEMP triggers. Seeding is a migration now and the
+        # password upgrade is left to the caller, see migrate_user_passwords_to_bcrypt.
+        self.migrate()
+        self._mark("migrations")
+        self._track_local_writes()
+        self._mark("local write tracking")
+        self.has_search_index = bool(self.conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='tenants_fts'").fetchone())
+
+    def _track_local_writes(self):
+        # TEMP triggers only fire for this connection's own writes, so comparing these
+        # counters with table_versions tells a ChangeMonitor which changes came from
+        # other connections.
+        cur = self.conn.cursor()
+        cur.execute("CREATE TEMP TABLE IF NOT EXISTS local_versions (table_name TEXT PRIMARY KEY, version INTEGER NOT NULL DEFAULT 0)")
+        for table in TRACKED_TABLES:
+            cur.execute("INSERT OR IGNORE INTO temp.local_versions (table_name, version) VALUES (?, 0)", (table,))
+            for event in ("INSERT", "UPDATE", "DELETE"):
+                cur.execute(f"""CREATE TEMP TRIGGER IF NOT EXISTS trg_local_{table}_{event.lower()} AFTER {event} ON main.{table}
+                                BEGIN
+                                    UPDATE local_versions SET version = version + 1 WHERE table_name = '{table}';
+                                END""")
+        self.conn.commit()
+
+    def local_versions(self, wait=True):
+        # None when wait is false and another thread is in the middle of a write
+        if not self._tx_lock.acquire(blocking=wait):
+            return None
+        try:
+            rows = self.conn.execute("SELECT table_name, version FROM temp.local_versions").fetchall()
+        finally:
+            self._tx_lock.release()
+        return {r["table_name"]: r["version"] for r in rows}
+
+    def schema_version(self):
+        return self.conn.execute("PRAGMA user_version").fetchone()[0]
+
+    def migrate(self):
+        version = self.schema_version()
+        if version >= len(MIGRATIONS):
+            return version
+        cur = self.conn.cursor()
+        for number in range(version + 1, len(MIGRATIONS) + 1):
+            cur.execute("BEGIN")
+            try:
+                MIGRATIONS[number - 1](cur)
+                cur.execute(f"PRAGMA user_version = {number}")
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+        return len(MIGRATIONS)
+
+    @contextmanager
+    def transaction(self):
+        # Outermost block is BEGIN IMMEDIATE ... COMMIT; nested blocks become savepoints
+        # so an inner failure only rolls back its own work.
+        # Change events published inside the block are held back until the outermost
+        # commit and dropped with whatever part of the work is rolled back.
+        with self._tx_lock:
+            depth = self._tx_depth
+            mark = len(self._pending_events)
+            if depth == 0:
+                self.conn.execute("BEGIN IMMEDIATE")
+                self._tx_owner = threading.get_ident()
+            else:
+                self.conn.execute(f"SAVEPOINT sp_{depth}")
+            self._tx_depth += 1
+            try:
+                yield self
+            except BaseException:
+                self._tx_depth -= 1
+                del self._pending_events[mark:]
+                if depth == 0:
+                    self._tx_owner = None
+                    self.conn.rollback()
+                else:
+                    self.conn.execute(f"ROLLBACK TO sp_{depth}")
+                    self.conn.execute(f"RELEASE sp_{depth}")
+                raise
+            self._tx_depth -= 1
+            if depth == 0:
+                self._tx_owner = None
+                self.conn.commit()
+                events, self._pending_events = self._pending_events, []
+            else:
+                self.conn.execute(f"RELEASE sp_{depth}")
+                events = []
+        for event in events:
+            self.events.publish(event)
+
+    def publish(self, entity, operation, ids=None):
+        event = ChangeEvent(entity, operation, frozenset(ids) if ids is not None else None)
+        if self.in_transaction():
+            self._pending_events.append(event)
+        else:
+            self.events.publish(event)
+
+    def in_transaction(self):
+        # true only on the thread that holds the open transaction
+        return bool(self._tx_depth) and self._tx_owner == threading.get_ident()
+
+    def _observe(self, conn, query, params, elapsed, rows):
+        # called with conn still held, so a slow statement's plan comes from the same connection
+        site = _call_site()
+        if self.stats.record(query, elapsed, rows, site):
+            plan = []
+            if params is not None:
+                try:
+                    plan = [r[3] for r in conn.execute("EXPLAIN QUERY PLAN " + query, params)]
+                except sqlite3.Error:
+                    pass
+            self.stats.log_slow(query, elapsed, rows, site, plan)
+
+    def execute(self, query, params=()):
+        with self._tx_lock:
+            started = time.perf_counter()
+            cur = self.conn.cursor()
+            cur.execute(query, params)
+            if not self._tx_depth:
+                self.conn.commit()
+            self._observe(self.conn, query, params, time.perf_counter() - started, cur.rowcount)
+            return cur
+
+    def executemany(self, query, seq):
+        with self._tx_lock:
+            started = time.perf_counter()
+            cur = self.conn.cursor()
+            cur.executemany(query, seq)
+            if not self._tx_depth:
+                self.conn.commit()
+            self._observe(self.conn, query, None, time.perf_counter() - started, cur.rowcount)
+            return cur
+
+    def query(self, query, params=()):
+        if self._shares_writer():
+            with self._tx_lock:
+                started = time.perf_counter()
+                rows = self.conn.execute(query, params).fetchall()
+                self._observe(self.conn, query, params, time.perf_counter() - started, len(rows))
+                return rows
+        with self.reader() as conn:
+            started = time.perf_counter()
+            rows = conn.execute(query, params).fetchall()
+            self._observe(conn, query, params, time.perf_counter() - started, len(rows))
+            return rows
+
+    def stream(self, query, params=(), batch_size=1000):
+        # Yields rows batch by batch from one read connection, so a huge result never
+        # sits in memory at once. Consume it fully (or close it) to return the connection.
+        if self._shares_writer():
+            yield from self.query(query, params)
+            return
+        with self.reader() as conn:
+            # timed is the time spent inside SQLite, not in the consumer between batches
+            started = time.perf_counter()
+            cur = conn.execute(query, params)
+            timed, count = time.perf_counter() - started, 0
+            try:
+                while True:
+                    started = time.perf_counter()
+                    batch = cur.fetchmany(batch_size)
+                    timed += time.perf_counter() - started
+                    if not batch:
+                        break
+                    count += len(batch)
+                    yield from batch
+            finally:
+                cur.close()
+                self._observe(conn, query, params, timed, count)
+
+    def get_state(self, key, default=None):
+        rows = self.query("SELECT value FROM app_state WHERE key=?", (key,))
+        return rows[0]["value"] if rows else default
+
+    def set_state(self, key, value):
+        self.execute("INSERT INTO app_state (key, value) VALUES (?,?) ON CONFLICT(key) DO UPDATE SET value=excluded.value", (key, value))
+
+    def bcrypt_rounds(self):
+        try:
+            return int(self.get_state("bcrypt_rounds", BCRYPT_ROUNDS))
+        except ValueError:
+            return BCRYPT_ROUNDS
+
+    def set_bcrypt_rounds(self, rounds):
+        # bcrypt accepts 4..31; each step doubles the cost of a login
+        if not 4 <= int(rounds) <= 31:
+            raise ValueError("bcrypt rounds must be between 4 and 31")
+        with self.transaction():
+            self.set_state("bcrypt_rounds", str(int(rounds)))
+
+    def backup(self, dest_path):
+        # Online copy through SQLite's backup API: a consistent snapshot taken from a read
+        # connection, so writers are never blocked. Lands under dest_path only when complete.
+        tmp_path = dest_path + ".part"
+        dest = sqlite3.connect(tmp_path)
+        try:
+            if self.db_file == ":memory:":
+                with self._tx_lock:
+                    self.conn.backup(dest)
+            else:
+                with self.reader() as src:
+                    src.backup(dest)
+            dest.close()
+            os.replace(tmp_path, dest_path)
+        except BaseException:
+            dest.close()
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        return dest_path
+
+    def close(self):
+        for conn in self._all_readers:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        self._all_readers = []
+        if self.conn:
+            self.conn.close()
+
+    def migrate_user_passwords_to_bcrypt(self):
+        # Slow (one bcrypt hash per plaintext password), so it is not part of opening the
+        # database: the GUI runs it on a worker thread once the login window is up. Once
+        # every password is hashed it costs a single query. Hashing happens outside the
+        # write lock; a password changed meanwhile is left alone.
+        if not bcrypt:
+            return 0
+        rows = self.query("SELECT user_id, password FROM users WHERE password <> '' AND password NOT LIKE '$2_$%'")
+        rounds = self.bcrypt_rounds()
+        hashed = [(hash_password(r["password"], rounds), r["user_id"], r["password"]) for r in rows]
+        if hashed:
+            with self.transaction():
+                self.executemany("UPDATE users SET password=? WHERE user_id=? AND password=?", hashed)
+        return len(hashed)
+
+_INTERNAL_CODES = {f.__code__ for cls in (Database, ReadCache) for f in vars(cls).values() if hasattr(f, "__code__")}
+
+class UnitFull(Exception):
+    def __init__(self, unit_id):
+        super().__init__(f"unit {unit_id} is at capacity")
+        self.unit_id = unit_id
+
+class TenantModel:
+    def __init__(self, db: Database):
+        self.db = db
+
+    def _write(self, unit_id, query, params):
+        # the occupancy triggers keep units.occupants/status in step and abort a write
+        # that would overfill a unit
+        try:
+            return self.db.execute(query, params)
+        except sqlite3.IntegrityError as e:
+            if UNIT_FULL_MESSAGE in str(e):
+                raise UnitFull(unit_id) from None
+            raise
+
+    def _publish_units(self, *unit_ids):
+        unit_ids = [u for u in unit_ids if u]
+        if unit_ids:
+            self.db.publish("units", "update", unit_ids)
+
+    def create(self, name, contact, unit_id, tenant_type, move_in, guardian_name="", guardian_contact="", guardian_relation="", emergency_contact="", advance_paid=0, deposit_paid=0, status="Active"):
+        with self.db.transaction():
+            cur = self._write(unit_id, """INSERT INTO tenants (name, contact, unit_id, tenant_type, move_in, move_out, status,
+                               guardian_name, guardian_contact, guardian_relation, emergency_contact, advance_paid, deposit_paid)
+                               VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)""", (name, contact, unit_id, tenant_type, move_in, None, status, guardian_name, guardian_contact, guardian_relation, emergency_contact, advance_paid, deposit_paid))
+            self.db.publish("tenants", "insert", [cur.lastrowid])
+            self._publish_units(unit_id)
+        return True
+
+    def bulk_create(self, rows):
+        # rows are (name, contact, unit_id, tenant_type, move_in, move_out, status, guardian_name,
+        # guardian_contact, guardian_relation, emergency_contact, advance_paid, deposit_paid).
+        # A row that overfills a unit aborts the whole batch with sqlite3.IntegrityError.
+        with self.db.transaction():
+            cur = self.db.executemany("""INSERT INTO tenants (name, contact, unit_id, tenant_type, move_in, move_out, status,
+                                         guardian_name, guardian_contact, guardian_relation, emergency_contact, advance_paid, deposit_paid)
+                                         VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)""", rows)
+            if cur.rowcount:
+                self.db.publish("tenants", "insert")
+                self.db.publish("units", "update")
+        return cur.rowcount
+
+    def update(self, tenant_id, **kwargs):
+        if not kwargs:
+            return False
+        fields = ", ".join([f"{k}=?" for k in kwargs])
+        values = list(kwargs.values())
+        values.append(tenant_id)
+        with self.db.transaction():
+            prev = self.get(tenant_id) if "unit_id" in kwargs or "status" in kwargs else None
+            prev_unit = prev["unit_id"] if prev else None
+            self._write(kwargs.get("unit_id", prev_unit), f"UPDATE tenants SET {fields} WHERE tenant_id=?", tuple(values))
+            self.db.publish("tenants", "update", [tenant_id])
+            if prev:
+                self._publish_units(prev_unit, kwargs.get("unit_id", prev_unit))
+        return True
+
+    def delete(self, tenant_id, reason="Deleted by admin"):
+        def safe(r, key):
+            try:
+                return r[key] if key in r.keys() and r[key] is not None else ""
+            except:
+                return ""
+        with self.db.transaction():
+            row = self.get(tenant_id)
+            if not row:
+                return False
+            cur = self.db.execute("""INSERT INTO deleted_tenants (tenant_id, name, contact, unit_id, tenant_type, move_in, move_out, status,
+                                  guardian_name, guardian_contact, guardian_relation, emergency_contact, deleted_date, reason)
+                               VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?)""",
+                            (row["tenant_id"], row["name"], row["contact"], row["unit_id"], row["tenant_type"], row["move_in"], row["move_out"], row["status"],
+                             safe(row,"guardian_name"), safe(row,"guardian_contact"), safe(row,"guardian_relation"), safe(row,"emergency_contact"),
+                             datetime.date.today().isoformat(), reason))
+            self.db.execute("DELETE FROM tenants WHERE tenant_id=?", (tenant_id,))
+            self._publish_units(row["unit_id"])
+            self.db.publish("deleted_tenants", "insert", [cur.lastrowid])
+            self.db.publish("tenants", "delete", [tenant_id])
+        return True
+
+    def restore(self, deleted_id):
+        with self.db.transaction():
+            rows = self.db.query("SELECT * FROM deleted_tenants WHERE deleted_id=?", (deleted_id,))
+            if not rows:
+                return False
+            r = rows[0]
+            cur = self._write(r["unit_id"], """INSERT INTO tenants (name, contact, unit_id, tenant_type, move_in, move_out, status,
+                                 guardian_name, guardian_contact, guardian_relation, emergency_contact, advance_paid, deposit_paid)
+                                 VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)""",
+                                 (r["name"], r["contact"], r["unit_id"], r["tenant_type"], r["move_in"], r["move_out"], r["status"],
+                                  r["guardian_name"], r["guardian_contact"], r["guardian_relation"], r["emergency_contact"], 0, 0))
+            new_tid = cur.lastrowid
+            self._publish_units(r["unit_id"])
+            self.db.execute("DELETE FROM deleted_tenants WHERE deleted_id=?", (deleted_id,))
+            self.db.publish("tenants", "insert", [new_tid])
+            self.db.publish("deleted_tenants", "delete", [deleted_id])
+        return new_tid
+
+    def purge_deleted(self, deleted_id):
+        with self.db.transaction():
+            self.db.execute("DELETE FROM deleted_tenants WHERE deleted_id=?", (deleted_id,))
+            self.db.publish("deleted_tenants", "delete", [deleted_id])
+        return True
+
+    def all(self):
+        return self.db.query("SELECT t.*, u.unit_code, u.type as unit_type, u.price as unit_price, u.occupants as unit_occupants FROM tenants t LEFT JOIN units u ON t.unit_id = u.unit_id ORDER BY t.tenant_id")
+
+    def rows_for(self, tenant_ids, unit_ids=()):
+        # The given tenants plus everyone sharing their (current or listed) units, in
+        # the shape of all(); used to patch the Tenants tab without reloading it.
+        tenant_ids = list(tenant_ids)
+        unit_ids = [u for u in unit_ids if u is not None]
+        if not tenant_ids and not unit_ids:
+            return []
+        tq = ",".join("?" * len(tenant_ids)) or "NULL"
+        uq = ",".join("?" * len(unit_ids)) or "NULL"
+        return self.db.query(f"""SELECT t.*, u.unit_code, u.type as unit_type, u.price as unit_price, u.occupants as unit_occupants
+                                 FROM tenants t LEFT JOIN units u ON t.unit_id = u.unit_id
+                                 WHERE t.tenant_id IN ({tq})
+                                    OR t.unit_id IN (SELECT unit_id FROM tenants WHERE tenant_id IN ({tq}))
+                                    OR t.unit_id IN ({uq})
+                                 ORDER BY t.tenant_id""", tuple(tenant_ids + tenant_ids + unit_ids))
+
+    def search(self, text, limit=SEARCH_LIMIT):
+        # best matches first, in the shape of all()
+        sql, params = search_sql("tenants_fts" if self.db.has_search_index else None, "t.tenant_id", text,
+                                 """SELECT t.*, u.unit_code, u.type as unit_type, u.price as unit_price, u.occupants as unit_occupants
+                                    FROM tenants t LEFT JOIN units u ON t.unit_id = u.unit_id""", SEARCH_INDEXES[0][3])
+        return self.db.query(f"{sql} LIMIT ?", params + (limit,)) if sql else []
+
+    def search_deleted(self, text, limit=SEARCH_LIMIT):
+        sql, params = search_sql("deleted_tenants_fts" if self.db.has_search_index else None, "d.deleted_id", text,
+                                 "SELECT d.* FROM deleted_tenants d", SEARCH_INDEXES[2][3])
+        return self.db.query(f"{sql} LIMIT ?", params + (limit,)) if sql else []
+
+    def index_rows(self, tenant_ids=None, unit_ids=None):
+        # active tenants for TenantIndex: all of them, or those among tenant_ids / living in unit_ids
+        where, params = "", ()
+        if tenant_ids is not None or unit_ids is not None:
+            tenant_ids, unit_ids = list(tenant_ids or ()), [u for u in unit_ids or () if u is not None]
+            where = (f" AND (t.tenant_id IN ({','.join('?' * len(tenant_ids)) or 'NULL'})"
+                     f" OR t.unit_id IN ({','.join('?' * len(unit_ids)) or 'NULL'}))")
+            params = tuple(tenant_ids + unit_ids)
+        return self.db.query(f"""SELECT t.tenant_id, t.name, t.contact, u.unit_code, u.price as unit_price
+                                 FROM tenants t LEFT JOIN units u ON t.unit_id = u.unit_id
+                                 WHERE IFNULL(t.status, '') != 'Moved out'{where}
+                                 ORDER BY t.tenant_id""", params)
+
+    def billing_info(self, tenant_id):
+        # what the payment form shows for a picked tenant
+        rows = self.db.query("""SELECT t.tenant_id, t.name, t.status, u.unit_code, u.price as unit_price,
+                                       IFNULL(b.outstanding, 0) as outstanding, b.last_payment_date
+                                FROM tenants t LEFT JOIN units u ON t.unit_id = u.unit_id
+                                LEFT JOIN tenant_balances b ON b.tenant_id = t.tenant_id
+                                WHERE t.tenant_id=?""", (tenant_id,))
+        return rows[0] if rows else None
+
+    def get(self, tenant_id):
+        rows = self.db.query("SELECT * FROM tenants WHERE tenant_id=?", (tenant_id,))
+        return rows[0] if rows else None
+
+    def list_deleted(self):
+        return self.db.query("SELECT * FROM deleted_tenants ORDER BY deleted_id DESC")
+
+    def deleted_rows_for(self, deleted_ids):
+        deleted_ids = list(deleted_ids)
+        if not deleted_ids:
+            return []
+        return self.db.query(f"SELECT * FROM deleted_tenants WHERE deleted_id IN ({','.join('?' * len(deleted_ids))}) ORDER BY deleted_id DESC", tuple(deleted_ids))
+
+class PaymentModel:
+    def __init__(self, db: Database):
+        self.db = db
+
+    def create(self, tenant_id, rent, electricity, water, date_paid, status, note=""):
+        total = (rent or 0) + (electricity or 0) + (water or 0)
+        with self.db.transaction():
+            cur = self.db.execute(f"""INSERT INTO payments (tenant_id, rent, electricity, water, total, date_paid, status, note, unit_type)
+                               VALUES (?,?,?,?,?,?,?,?,{PAYMENT_UNIT_TYPE.format(ref='?1')})""", (tenant_id, rent, electricity, water, total, date_paid, status, note))
+            self.db.publish("payments", "insert", [cur.lastrowid])
+        return True
+
+    # Per-row insert triggers that bulk_insert swaps for one set-based statement each.
+    BULK_SWAPPED_TRIGGERS = (
+        ("main", "trg_payments_balance_ins", TENANT_BALANCE_BULK_UPSERT),
+        ("main", "trg_payments_revenue_ins", REVENUE_DAILY_BULK_UPSERT),
+        ("main", "trg_version_payments_insert", "UPDATE table_versions SET version = version + 1 WHERE table_name = 'payments'"),
+        ("temp", "trg_local_payments_insert", "UPDATE temp.local_versions SET version = version + 1 WHERE table_name = 'payments'"),
+    )
+
+    def bulk_insert(self, rows):
+        # rows are (tenant_id, rent, electricity, water, total, date_paid, status, note).
+        # The insert triggers are dropped, the rows inserted with executemany, the summaries
+        # brought up to date set-based over the new rows, and the triggers put back, all in
+        # one transaction: DDL is transactional, so no other connection ever writes payments
+        # while they are missing.
+        with self.db.transaction():
+            first_id = self.db.execute("SELECT IFNULL(MAX(payment_id), 0) + 1 FROM payments").fetchone()[0]
+            swapped = []
+            for schema, name, bulk_sql in self.BULK_SWAPPED_TRIGGERS:
+                master = "sqlite_temp_master" if schema == "temp" else "sqlite_master"
+                row = self.db.execute(f"SELECT sql FROM {master} WHERE type='trigger' AND name=?", (name,)).fetchone()
+                if row:
+                    create_sql = row[0].replace("CREATE TRIGGER", "CREATE TEMP TRIGGER", 1) if schema == "temp" else row[0]
+                    swapped.append((create_sql, bulk_sql))
+                    self.db.execute(f"DROP TRIGGER {schema}.{name}")
+            cur = self.db.executemany(f"""INSERT INTO payments (tenant_id, rent, electricity, water, total, date_paid, status, note, unit_type)
+                                         VALUES (?,?,?,?,?,?,?,?,{PAYMENT_UNIT_TYPE.format(ref='?1')})""", rows)
+            count = cur.rowcount
+            # NOT INDEXED keeps the planner on the rowid range instead of walking a whole index
+            source = f"(SELECT * FROM payments NOT INDEXED WHERE payment_id >= {int(first_id)})"
+            for create_sql, bulk_sql in swapped:
+                self.db.execute(bulk_sql.format(source=source))
+                self.db.execute(create_sql)
+            if count:
+                self.db.publish("payments", "insert")
+        return count
+
+    def all(self):
+        return self.db.query("SELECT p.*, t.name FROM payments p LEFT JOIN tenants t ON p.tenant_id = t.tenant_id ORDER BY p.payment_id DESC")
+
+    def page(self, after_id=None, limit=200, filters=None, before_id=None):
+        # Keyset pagination, newest first. after_id continues downwards (older rows),
+        # before_id walks back upwards; both seek on the primary key so any page costs
+        # the same no matter how deep into history it is.
+        where, params = self._filter_sql(filters)
+        if after_id is not None:
+            where.append("p.payment_id < ?")
+            params.append(after_id)
+        if before_id is not None:
+            where.append("p.payment_id > ?")
+            params.append(before_id)
+        sql = "SELECT p.*, t.name FROM payments p LEFT JOIN tenants t ON p.tenant_id = t.tenant_id"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        if before_id is not None and after_id is None:
+            sql += " ORDER BY p.payment_id ASC LIMIT ?"
+            params.append(limit)
+            return list(reversed(self.db.query(sql, tuple(params))))
+        sql += " ORDER BY p.payment_id DESC LIMIT ?"
+        params.append(limit)
+        return self.db.query(sql, tuple(params))
+
+    def _filter_sql(self, filters):
+        where = []
+        params = []
+        filters = filters or {}
+        if filters.get("tenant_id") is not None:
+            where.append("p.tenant_id = ?")
+            params.append(filters["tenant_id"])
+        if filters.get("status"):
+            where.append("p.status = ?")
+            params.append(filters["status"])
+        if filters.get("date_from"):
+            where.append("p.date_paid >= ?")
+            params.append(filters["date_from"])
+        if filters.get("date_to"):
+            where.append("p.date_paid <= ?")
+            params.append(filters["date_to"])
+        return where, params
+
+    def rows_for(self, payment_ids, filters=None):
+        payment_ids = list(payment_ids)
+        if not payment_ids:
+            return []
+        where, params = self._filter_sql(filters)
+        where.append(f"p.payment_id IN ({','.join('?' * len(payment_ids))})")
+        params.extend(payment_ids)
+        return self.db.query(f"""SELECT p.*, t.name FROM payments p LEFT JOIN tenants t ON p.tenant_id = t.tenant_id
+                                 WHERE {' AND '.join(where)} ORDER BY p.payment_id DESC""", tuple(params))
+
+    def count(self, filters=None):
+        where, params = self._filter_sql(filters)
+        sql = "SELECT COUNT(*) as c FROM payments p"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        return self.db.query(sql, tuple(params))[0]["c"]
+
+    def iter_rows(self, filters=None, batch_size=1000):
+        where, params = self._filter_sql(filters)
+        sql = "SELECT p.*, t.name FROM payments p LEFT JOIN tenants t ON p.tenant_id = t.tenant_id"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY p.payment_id DESC"
+        return self.db.stream(sql, tuple(params), batch_size)
+
+    def stats_sum(self, since_days=30):
+        since = (datetime.date.today() - datetime.timedelta(days=since_days)).isoformat()
+        rows = self.db.query("SELECT sum(total) as total_income FROM revenue_daily WHERE day >= ?", (since,))
+        return rows[0]["total_income"] if rows else 0
+
+    REVENUE_PERIODS = {
+        "day": "day",
+        "month": "substr(day, 1, 7)",
+        "quarter": "substr(day, 1, 4) || '-Q' || ((CAST(substr(day, 6, 2) AS INTEGER) + 2) / 3)",
+        "year": "substr(day, 1, 4)",
+    }
+
+    def revenue(self, date_from=None, date_to=None, period="month", by_unit_type=False, statuses=None):
+        # Reads the revenue_daily rollup, so cost follows the number of days in range,
+        # not the number of payments.
+        if period not in self.REVENUE_PERIODS:
+            raise ValueError(f"period must be one of {', '.join(self.REVENUE_PERIODS)}")
+        where = []
+        params = []
+        if date_from:
+            where.append("day >= ?")
+            params.append(date_from)
+        if date_to:
+            where.append("day <= ?")
+            params.append(date_to)
+        if statuses:
+            where.append(f"status IN ({','.join('?' * len(statuses))})")
+            params.extend(statuses)
+        group = [self.REVENUE_PERIODS[period]]
+        cols = f"{group[0]} AS period"
+        if by_unit_type:
+            group.append("unit_type")
+            cols += ", unit_type"
+        sql = f"""SELECT {cols}, SUM(rent) AS rent, SUM(electricity) AS electricity, SUM(water) AS water,
+                         SUM(total) AS total, SUM(payments) AS payments
+                  FROM revenue_daily"""
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" GROUP BY {', '.join(group)} ORDER BY {', '.join(group)}"
+        return self.db.query(sql, tuple(params))
+
+    def rebuild_revenue(self):
+        with self.db.transaction():
+            rebuild_revenue_daily(self.db.conn.cursor())
+
+    def balance(self, tenant_id):
+        rows = self.db.query("SELECT * FROM tenant_balances WHERE tenant_id=?", (tenant_id,))
+        return rows[0] if rows else None
+
+    def last_payment_date(self, tenant_id):
+        b = self.balance(tenant_id)
+        return b["last_payment_date"] if b else None
+
+    def unpaid_exists(self, tenant_id):
+        b = self.balance(tenant_id)
+        return bool(b and b["unpaid_count"])
+
+    def rebuild_balances(self):
+        with self.db.transaction():
+            rebuild_tenant_balances(self.db.conn.cursor())
+            rows = self.db.query("SELECT COUNT(*) as c FROM tenant_balances")
+        return rows[0]["c"]
+
+class MaintenanceModel:
+    def __init__(self, db: Database):
+        self.db = db
+
+    def create(self, tenant_id, description, priority, date_requested, status="Pending", assigned_staff=None, fee=0.0):
+        with self.db.transaction():
+            cur = self.db.execute("""INSERT INTO maintenance (tenant_id, description, priority, date_requested, status, assigned_staff, fee)
+                               VALUES (?,?,?,?,?,?,?)""", (tenant_id, description, priority, date_requested, status, assigned_staff, fee))
+            self.db.publish("maintenance", "insert", [cur.lastrowid])
+        return True
+
+    def all(self):
+        return self.db.query("SELECT m.*, t.name as tenant_name FROM maintenance m LEFT JOIN tenants t ON m.tenant_id = t.tenant_id ORDER BY m.request_id DESC")
+
+    def search(self, text, limit=SEARCH_LIMIT):
+        sql, params = search_sql("maintenance_fts" if self.db.has_search_index else None, "m.request_id", text,
+                                 "SELECT m.*, t.name as tenant_name FROM maintenance m LEFT JOIN tenants t ON m.tenant_id = t.tenant_id",
+                                 SEARCH_INDEXES[1][3])
+        return self.db.query(f"{sql} LIMIT ?", params + (limit,)) if sql else []
+
+    def update_status(self, request_id, status):
+        with self.db.transaction():
+            self.db.execute("UPDATE maintenance SET status=? WHERE request_id=?", (status, request_id))
+            self.db.publish("maintenance", "update", [request_id])
+        return True
+
+    def rows_for(self, request_ids=(), tenant_ids=()):
+        request_ids, tenant_ids = list(request_ids), list(tenant_ids)
+        if not request_ids and not tenant_ids:
+            return []
+        rq = ",".join("?" * len(request_ids)) or "NULL"
+        tq = ",".join("?" * len(tenant_ids)) or "NULL"
+        return self.db.query(f"""SELECT m.*, t.name as tenant_name FROM maintenance m
+                                 LEFT JOIN tenants t ON m.tenant_id = t.tenant_id
+                                 WHERE m.request_id IN ({rq}) OR m.tenant_id IN ({tq})
+                                 ORDER BY m.request_id DESC""", tuple(request_ids + tenant_ids))
+
+UNIT_DETAIL_SELECT = """SELECT u.*,
+    (SELECT json_group_array(json_object('tenant_id', t.tenant_id, 'name', t.name, 'contact', t.contact,
+                                         'tenant_type', t.tenant_type, 'status', t.status))
+       FROM (SELECT * FROM tenants WHERE unit_id = u.unit_id ORDER BY tenant_id) t) AS tenants_json,
+    (SELECT json_group_array(json_object('request_id', m.request_id, 'tenant_name', m.tenant_name,
+                                         'description', m.description, 'date_requested', m.date_requested,
+                                         'status', m.status, 'fee', m.fee))
+       FROM (SELECT mm.*, t.name AS tenant_name FROM maintenance mm JOIN tenants t ON t.tenant_id = mm.tenant_id
+              WHERE t.unit_id = u.unit_id ORDER BY mm.request_id DESC LIMIT ?) m) AS maintenance_json
+FROM units u WHERE u.unit_id IN ({ids})"""
+
+class UnitModel:
+    def __init__(self, db: Database):
+        self.db = db
+        self.cache = ReadCache(db, {"units"})
+        self.detail_cache = ReadCache(db, {"units", "tenants", "maintenance"})
+
+    def all(self):
+        return self.cache.snapshot("all", lambda: self.db.query("SELECT * FROM units ORDER BY unit_code"))
+
+    def available(self):
+        return self.cache.snapshot("available", lambda: [u for u in self.all() if u["status"] == "Vacant"])
+
+    def get(self, unit_id):
+        def load():
+            rows = self.db.query("SELECT * FROM units WHERE unit_id=?", (unit_id,))
+            return rows[0] if rows else None
+        return self.cache.get(int(unit_id), load)
+
+    def _load_details(self, unit_ids):
+        if not unit_ids:
+            return {}
+        rows = self.db.query(UNIT_DETAIL_SELECT.format(ids=",".join("?" * len(unit_ids))),
+                             (UNIT_DETAIL_MAINTENANCE, *unit_ids))
+        details = {}
+        for r in rows:
+            details[r["unit_id"]] = {
+                "unit": r,
+                "tenants": json.loads(r["tenants_json"]),
+                "maintenance": sorted(json.loads(r["maintenance_json"]), key=lambda m: m["request_id"], reverse=True),
+            }
+        return details
+
+    def detail(self, unit_id):
+        # {"unit": row, "tenants": [...], "maintenance": [...]} in one query, None if the unit is gone
+        return self.details([unit_id]).get(int(unit_id))
+
+    def details(self, unit_ids):
+        return self.detail_cache.get_many([int(u) for u in unit_ids], self._load_details)
+
+    def cached_detail(self, unit_id):
+        return self.detail_cache.peek(int(unit_id))
+
+    def invalidate(self):
+        self.cache.invalidate()
+        self.detail_cache.invalidate()
+
+    def bulk_create(self, rows):
+        # rows are (unit_code, type, price, capacity); new units start Vacant
+        with self.db.transaction():
+            cur = self.db.executemany("INSERT INTO units (unit_code, type, price, status, capacity) VALUES (?,?,?,'Vacant',?)", rows)
+            if cur.rowcount:
+                self.db.publish("units", "insert")
+        return cur.rowcount
+
+
+class StaffModel:
+    def __init__(self, db: Database):
+        self.db = db
+        self.cache = ReadCache(db, {"staff"})
+
+    def all(self):
+        return self.cache.snapshot("all", lambda: self.db.query("SELECT * FROM staff ORDER BY staff_id"))
+
+    def get(self, staff_id):
+        if staff_id is None:
+            return None
+        staff_id = int(staff_id)
+        return self.cache.get(staff_id, lambda: next((s for s in self.all() if s["staff_id"] == staff_id), None))
+
+    def name(self, staff_id):
+        staff = self.get(staff_id)
+        return staff["name"] if staff else None
+
+    def invalidate(self):
+        self.cache.invalidate()
+
+class LoginThrottled(Exception):
+    def __init__(self, retry_after):
+        super().__init__(f"too many failed attempts, try again in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+class AuthController:
+    # Checks and changes passwords. bcrypt is deliberately slow, so the GUI calls these
+    # from a worker thread. After LOGIN_FREE_ATTEMPTS failures a username is refused
+    # without hashing for 2, 4, 8 ... seconds (capped), so a burst of guesses cannot
+    # keep a core busy. Unknown usernames are hashed against a dummy and throttled like
+    # real ones, so neither timing nor throttling tells which accounts exist. Failures
+    # live only in memory, are forgotten LOGIN_FAILURE_TTL_S after the last one, and at
+    # most LOGIN_TRACKED_USERS usernames are tracked (oldest dropped first).
+    def __init__(self, db: Database):
+        self.db = db
+        self._failures = OrderedDict()
+        self._dummy_hashes = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, username, now):
+        # -> (count, until) for a live entry; expired ones are dropped on the way
+        while self._failures:
+            oldest, (_, _, last) = next(iter(self._failures.items()))
+            if now - last < LOGIN_FAILURE_TTL_S:
+                break
+            del self._failures[oldest]
+        count, until, _ = self._failures.get(username, (0, 0.0, 0.0))
+        return count, until
+
+    def _throttle(self, username):
+        now = time.monotonic()
+        with self._lock:
+            _, until = self._entry(username, now)
+        if until > now:
+            raise LoginThrottled(until - now)
+
+    def _failed(self, username):
+        now = time.monotonic()
+        with self._lock:
+            count, _ = self._entry(username, now)
+            count += 1
+            until = 0.0
+            if count >= LOGIN_FREE_ATTEMPTS:
+                until = now + min(2 ** (count - LOGIN_FREE_ATTEMPTS + 1), LOGIN_MAX_BACKOFF_S)
+            self._failures.pop(username, None)
+            self._failures[username] = (count, until, now)
+            while len(self._failures) > LOGIN_TRACKED_USERS:
+                self._failures.popitem(last=False)
+
+    def _dummy_hash(self, rounds):
+        # made once per cost, so a miss costs one checkpw like a wrong password does
+        if rounds not in self._dummy_hashes:
+            self._dummy_hashes[rounds] = hash_password(os.urandom(16).hex(), rounds)
+        return self._dummy_hashes[rounds]
+
+    def _needs_rehash(self, stored, rounds):
+        if not bcrypt:
+            return False
+        if not is_bcrypt_hash(stored):
+            return True
+        try:
+            return int(stored[4:6]) != rounds
+        except ValueError:
+            return True
+
+    def verify(self, username, password):
+        self._throttle(username)
+        rows = self.db.query("SELECT user_id, password FROM users WHERE username=?", (username,))
+        rounds = self.db.bcrypt_rounds()
+        if not rows:
+            if bcrypt:
+                check_password(password, self._dummy_hash(rounds))
+            self._failed(username)
+            return False
+        stored = rows[0]["password"] or ""
+        if not check_password(password, stored):
+            self._failed(username)
+            return False
+        with self._lock:
+            self._failures.pop(username, None)
+        if self._needs_rehash(stored, rounds):
+            self.db.execute("UPDATE users SET password=? WHERE user_id=? AND password=?",
+                            (hash_password(password, rounds), rows[0]["user_id"], stored))
+        return True
+
+    def change_password(self, username, new_password):
+        self.db.execute("UPDATE users SET password=? WHERE username=?",
+                        (hash_password(new_password, self.db.bcrypt_rounds()), username))
+
+class BillingController:
+    def __init__(self, db: Database, payment_model: PaymentModel, tenant_model: TenantModel):
+        self.db = db
+        self.payment_model = payment_model
+        self.tenant_model = tenant_model
+
+    def compute_total(self, rent, electricity, water):
+        return (rent or 0) + (electricity or 0) + (water or 0)
+
+    def create_payment(self, tenant_id, rent, electricity, water, date_paid=None, status="Paid", note=""):
+        if date_paid is None:
+            date_paid = datetime.date.today().isoformat()
+        total = self.compute_total(rent, electricity, water)
+        self.payment_model.create(tenant_id, rent, electricity, water, date_paid, status, note)
+        return total
+
+    def overdue_list(self, policy_days=7, limit=None, after_tenant_id=None):
+        # One row per tenant, read from the trigger-maintained tenant_balances. A tenant is
+        # overdue when they have an Overdue amount on file, or when neither their last
+        # payment nor (if they never paid) their move-in falls inside the policy window.
+        # Moved-out tenants only show up while they still owe money. Days overdue run
+        # from the policy window after the oldest unpaid period when there is one (a
+        # recent payment does not settle an older debt), else after the last payment.
+        today = datetime.date.today().isoformat()
+        since = (datetime.date.today() - datetime.timedelta(days=policy_days)).isoformat()
+        params = [today, since]
+        page = ""
+        if after_tenant_id is not None:
+            page += " AND t.tenant_id > ?"
+            params.append(after_tenant_id)
+        page += " ORDER BY t.tenant_id"
+        if limit is not None:
+            page += " LIMIT ?"
+            params.append(limit)
+        rows = self.db.query(f"""SELECT t.tenant_id, t.name, b.last_payment_date AS last_paid,
+                                        IFNULL(b.outstanding, 0) AS outstanding,
+                                        CAST(julianday(?) - julianday(COALESCE(b.oldest_unpaid, b.last_payment_date, t.move_in)) AS INTEGER) AS days_since
+                                 FROM tenants t LEFT JOIN tenant_balances b ON b.tenant_id = t.tenant_id
+                                 WHERE (IFNULL(b.outstanding, 0) > 0 OR COALESCE(b.last_payment_date, t.move_in) < ?)
+                                   AND (IFNULL(t.status, '') != 'Moved out' OR IFNULL(b.outstanding, 0) > 0){page}""", tuple(params))
+        results = []
+        for r in rows:
+            if r["outstanding"]:
+                status = "Overdue"
+            elif r["last_paid"] is None:
+                status = "No Payment"
+            else:
+                status = "Late"
+            days_since = r["days_since"]
+            results.append({"tenant_id": r["tenant_id"], "name": r["name"], "total": r["outstanding"] or None,
+                            "outstanding": r["outstanding"], "date_paid": r["last_paid"], "status": status,
+                            "days_overdue": max(0, days_since - policy_days) if days_since is not None else None})
+        return results
+
+class ExportCancelled(Exception):
+    pass
+
+class ExportController:
+    PAYMENT_HEADER = ["payment_id","tenant","rent","electricity","water","total","date_paid","status","note"]
+
+    def __init__(self, db: Database, payment_model: PaymentModel):
+        self.db = db
+        self.payment_model = payment_model
+
+    def export_payments(self, filepath, filters=None, compress=None, progress=None, cancel_event=None, batch_size=5000):
+        # Streams payments into a CSV (gzip when compress is set or the name ends in .gz)
+        # in constant memory. Writes go to a temp file that only replaces filepath once
+        # complete; cancelling raises ExportCancelled and leaves nothing behind.
+        if compress is None:
+            compress = filepath.lower().endswith(".gz")
+        expected = self.payment_model.count(filters)
+        tmp_path = filepath + ".part"
+        written = 0
+        try:
+            if compress:
+                f = gzip.open(tmp_path, "wt", newline="", encoding="utf-8")
+            else:
+                f = open(tmp_path, "w", newline="", encoding="utf-8")
+            rows = self.payment_model.iter_rows(filters, batch_size)
+            try:
+                with f:
+                    writer = csv.writer(f)
+                    writer.writerow(self.PAYMENT_HEADER)
+                    for r in rows:
+                        writer.writerow([r["payment_id"], r["name"], r["rent"], r["electricity"], r["water"], r["total"], r["date_paid"], r["status"], r["note"] or ""])
+                        written += 1
+                        if written % batch_size == 0:
+                            if cancel_event is not None and cancel_event.is_set():
+                                raise ExportCancelled()
+                            if progress:
+                                progress(written, expected)
+            finally:
+                rows.close()
+            os.replace(tmp_path, filepath)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        if progress:
+            progress(written, expected)
+        report_type = "Payments CSV.gz" if compress else "Payments CSV"
+        self.db.execute("INSERT INTO reports (type, generated_date, filepath) VALUES (?,?,?)", (report_type, datetime.date.today().isoformat(), filepath))
+        return written
+
+class InvalidRow(ValueError):
+    pass
+
+def _text(value):
+    return (value or "").strip()
+
+def _amount(value):
+    return float(_text(value) or 0)
+
+def _iso_date(value, label):
+    try:
+        return datetime.date.fromisoformat(value).isoformat()
+    except ValueError:
+        raise InvalidRow(f"{label} must be a date (YYYY-MM-DD).") from None
+
+def clean_tenant(name, contact="", tenant_type="", move_in="", guardian_name="", guardian_contact="",
+                 guardian_relation="", emergency_contact="", advance_paid="", deposit_paid=""):
+    # The checks TenantDialog.save applies, shared with the CSV importer.
+    # Returns the cleaned fields or raises InvalidRow with the message to show.
+    fields = {
+        "name": _text(name), "contact": _text(contact), "tenant_type": _text(tenant_type),
+        "move_in": _text(move_in) or datetime.date.today().isoformat(),
+        "guardian_name": _text(guardian_name), "guardian_contact": _text(guardian_contact),
+        "guardian_relation": _text(guardian_relation), "emergency_contact": _text(emergency_contact),
+    }
+    try:
+        fields["advance_paid"] = _amount(advance_paid)
+        fields["deposit_paid"] = _amount(deposit_paid)
+    except ValueError:
+        raise InvalidRow("Advance and Deposit must be numeric") from None
+    if len(fields["name"].split()) < 2:
+        raise InvalidRow("Tenant full name required (first and last name).")
+    if fields["tenant_type"].lower() == "dorm":
+        if len(fields["guardian_name"].split()) < 2:
+            raise InvalidRow("Dorm tenants require guardian full name (first and last).")
+        if not fields["guardian_contact"].isdigit():
+            raise InvalidRow("Guardian contact must be numeric (digits only).")
+    else:
+        if fields["guardian_name"] and len(fields["guardian_name"].split()) < 2:
+            raise InvalidRow("If guardian name is provided, please enter full name (first and last).")
+        if fields["guardian_contact"] and not fields["guardian_contact"].isdigit():
+            raise InvalidRow("Guardian contact must be numeric (digits only).")
+    if fields["contact"] and not any(ch.isdigit() for ch in fields["contact"]):
+        raise InvalidRow("Tenant contact should contain numbers (phone).")
+    fields["move_in"] = _iso_date(fields["move_in"], "Move-in date")
+    return fields
+
+def clean_payment(tenant_id, rent="", electricity="", water="", status="Paid", note="", date_paid=""):
+    # The checks PaymentDialog.save applies, shared with the CSV importer.
+    try:
+        tenant_id = int(_text(tenant_id))
+    except ValueError:
+        raise InvalidRow("Tenant ID must be number") from None
+    try:
+        rent, electricity, water = _amount(rent), _amount(electricity), _amount(water)
+    except ValueError:
+        raise InvalidRow("Numeric values required for amounts") from None
+    status = _text(status) or "Paid"
+    if status not in PAYMENT_STATUSES:
+        raise InvalidRow(f"Status must be one of {', '.join(PAYMENT_STATUSES)}")
+    date_paid = _text(date_paid)
+    date_paid = _iso_date(date_paid, "Payment date") if date_paid else datetime.date.today().isoformat()
+    return {"tenant_id": tenant_id, "rent": rent, "electricity": electricity, "water": water,
+            "status": status, "note": _text(note), "date_paid": date_paid}
+
+def clean_unit(unit_code, unit_type, price, capacity=""):
+    unit_code, unit_type = _text(unit_code), _text(unit_type).title()
+    if not unit_code:
+        raise InvalidRow("Unit code required")
+    if unit_type not in UNIT_TYPES:
+        raise InvalidRow(f"Unit type must be one of {', '.join(UNIT_TYPES)}")
+    try:
+        price = _amount(price)
+    except ValueError:
+        raise InvalidRow("Price must be numeric") from None
+    try:
+        capacity = int(_text(capacity)) if _text(capacity) else (DORM_MAX_OCCUPANTS if unit_type == "Dorm" else None)
+    except ValueError:
+        raise InvalidRow("Capacity must be a whole number") from None
+    return {"unit_code": unit_code, "type": unit_type, "price": price, "capacity": capacity}
+
+ImportResult = namedtuple("ImportResult", "imported rejected skipped rejects_path")
+
+class ImportCancelled(Exception):
+    pass
+
+class ImportController:
+    # Loads units, tenants or historical payments from CSV in chunks. Each chunk is checked
+    # with the same rules as the dialogs, written with executemany and committed together
+    # with how far into the file it got (app_state, keyed by path, size and mtime), so an
+    # interrupted import picks up after the last committed chunk. Rejected rows go to
+    # <file>.rejects.csv with their line number and reason; a chunk's rejects are flushed
+    # before its state commits and the state keeps the rejects file size, so a resume cuts
+    # off anything written by a chunk that never committed.
+    KINDS = ("units", "tenants", "payments")
+
+    def __init__(self, db: Database, unit_model: UnitModel, tenant_model: TenantModel, payment_model: PaymentModel):
+        self.db = db
+        self.unit_model = unit_model
+        self.tenant_model = tenant_model
+        self.payment_model = payment_model
+
+    def _state_key(self, kind, filepath):
+        st = os.stat(filepath)
+        return f"import:{kind}:{os.path.abspath(filepath)}:{st.st_size}:{int(st.st_mtime)}"
+
+    def _context(self, kind):
+        if kind == "units":
+            return {"codes": {u["unit_code"] for u in self.unit_model.all()}}
+        if kind == "tenants":
+            units = self.unit_model.all()
+            return {"ids": {u["unit_id"] for u in units}, "codes": {u["unit_code"]: u["unit_id"] for u in units}}
+        return {"tenants": {r["tenant_id"] for r in self.db.query("SELECT tenant_id FROM tenants")}}
+
+    def _prepare_units(self, raw, ctx):
+        u = clean_unit(raw.get("unit_code"), raw.get("type"), raw.get("price"), raw.get("capacity"))
+        if u["unit_code"] in ctx["codes"]:
+            raise InvalidRow(f"Duplicate unit code {u['unit_code']}")
+        ctx["codes"].add(u["unit_code"])
+        return (u["unit_code"], u["type"], u["price"], u["capacity"])
+
+    def _prepare_tenants(self, raw, ctx):
+        t = clean_tenant(raw.get("name"), raw.get("contact"), raw.get("tenant_type"), raw.get("move_in"),
+                         raw.get("guardian_name"), raw.get("guardian_contact"), raw.get("guardian_relation"),
+                         raw.get("emergency_contact"), raw.get("advance_paid"), raw.get("deposit_paid"))
+        if t["tenant_type"] not in UNIT_TYPES:
+            raise InvalidRow(f"Tenant type must be one of {', '.join(UNIT_TYPES)}")
+        unit_id = None
+        if _text(raw.get("unit_code")):
+            unit_id = ctx["codes"].get(_text(raw.get("unit_code")))
+            if unit_id is None:
+                raise InvalidRow(f"Unknown unit code {_text(raw.get('unit_code'))}")
+        elif _text(raw.get("unit_id")):
+            try:
+                unit_id = int(_text(raw.get("unit_id")))
+            except ValueError:
+                raise InvalidRow("Unit ID must be number") from None
+            if unit_id not in ctx["ids"]:
+                raise InvalidRow(f"Unknown unit ID {unit_id}")
+        status = _text(raw.get("status")) or "Active"
+        if status not in ("Active", "Moved out"):
+            raise InvalidRow("Status must be Active or Moved out")
+        move_out = _iso_date(_text(raw.get("move_out")), "Move-out date") if _text(raw.get("move_out")) else None
+        return (t["name"], t["contact"], unit_id, t["tenant_type"], t["move_in"], move_out, status, t["guardian_name"],
+                t["guardian_contact"], t["guardian_relation"], t["emergency_contact"], t["advance_paid"], t["deposit_paid"])
+
+    def _prepare_payments(self, raw, ctx):
+        p = clean_payment(raw.get("tenant_id"), raw.get("rent"), raw.get("electricity"), raw.get("water"),
+                          raw.get("status"), raw.get("note"), raw.get("date_paid"))
+        if p["tenant_id"] not in ctx["tenants"]:
+            raise InvalidRow(f"Unknown tenant ID {p['tenant_id']}")
+        return (p["tenant_id"], p["rent"], p["electricity"], p["water"], p["rent"] + p["electricity"] + p["water"],
+                p["date_paid"], p["status"], p["note"])
+
+    def _insert(self, kind, rows):
+        if kind == "units":
+            return self.unit_model.bulk_create(rows)
+        if kind == "tenants":
+            return self.tenant_model.bulk_create(rows)
+        return self.payment_model.bulk_insert(rows)
+
+    def _write(self, kind, good):
+        # one executemany for the chunk; if a row breaks a constraint (a full unit) the
+        # batch is rolled back to its savepoint and the chunk retried row by row
+        try:
+            with self.db.transaction():
+                return self._insert(kind, [values for _, _, values in good]), []
+        except sqlite3.IntegrityError:
+            pass
+        imported, failed = 0, []
+        for line, raw, values in good:
+            try:
+                with self.db.transaction():
+                    imported += self._insert(kind, [values])
+            except sqlite3.IntegrityError as e:
+                failed.append((line, raw, "Unit is full" if UNIT_FULL_MESSAGE in str(e) else str(e)))
+        return imported, failed
+
+    def import_csv(self, kind, filepath, progress=None, cancel_event=None, chunk_size=IMPORT_CHUNK_SIZE):
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown import kind {kind}")
+        key = self._state_key(kind, filepath)
+        state = json.loads(self.db.get_state(key) or "null") or {"rows": 0, "imported": 0, "rejected": 0, "rejects_size": 0}
+        skipped = state["rows"]
+        prepare = getattr(self, f"_prepare_{kind}")
+        ctx = self._context(kind)
+        rejects_path = filepath + ".rejects.csv"
+        cache_size = self.db.execute("PRAGMA cache_size").fetchone()[0]
+        self.db.execute(f"PRAGMA cache_size = -{IMPORT_CACHE_KB}")
+        try:
+            with open(filepath, newline="", encoding="utf-8-sig") as f, \
+                 open(rejects_path, "r+" if skipped and os.path.exists(rejects_path) else "w", newline="", encoding="utf-8") as rf:
+                # progress is the byte position, so quoted multi-line fields count right
+                total = os.fstat(f.fileno()).st_size
+                reader = csv.reader(f)
+                header = [h.strip() for h in next(reader, [])]
+                rejects = csv.writer(rf)
+                if skipped:
+                    rf.seek(state.get("rejects_size", 0))
+                    rf.truncate()
+                else:
+                    rejects.writerow(header + ["line", "error"])
+                def flush(chunk):
+                    if cancel_event is not None and cancel_event.is_set():
+                        raise ImportCancelled()
+                    good, bad = [], []
+                    for line, raw in chunk:
+                        try:
+                            good.append((line, raw, prepare(raw, ctx)))
+                        except InvalidRow as e:
+                            bad.append((line, raw, str(e)))
+                    with self.db.transaction():
+                        imported, failed = self._write(kind, good) if good else (0, [])
+                        if bad or failed:
+                            for line, raw, error in sorted(bad + failed, key=lambda r: r[0]):
+                                rejects.writerow([raw.get(h, "") for h in header] + [line, error])
+                            rf.flush()
+                            os.fsync(rf.fileno())
+                        state["rows"] += len(chunk)
+                        state["imported"] += imported
+                        state["rejected"] += len(bad) + len(failed)
+                        state["rejects_size"] = rf.tell()
+                        self.db.set_state(key, json.dumps(state))
+                    if progress:
+                        progress(f.buffer.tell(), total)
+                chunk = []
+                for n, values in enumerate(reader, 1):
+                    if n <= skipped:
+                        continue
+                    chunk.append((reader.line_num, dict(zip(header, values))))
+                    if len(chunk) >= chunk_size:
+                        flush(chunk)
+                        chunk = []
+                if chunk:
+                    flush(chunk)
+        finally:
+            self.db.execute(f"PRAGMA cache_size = {cache_size}")
+        if not state["rejected"]:
+            try:
+                os.remove(rejects_path)
+            except OSError:
+                pass
+            rejects_path = None
+        return ImportResult(state["imported"], state["rejected"], skipped, rejects_path)
+
+class MaintenanceController:
+    def __init__(self, maintenance_model: MaintenanceModel):
+        self.maintenance_model = maintenance_model
+
+    def submit_request(self, tenant_id, description, priority, fee=0.0):
+        date_req = datetime.date.today().isoformat()
+        return self.maintenance_model.create(tenant_id, description, priority, date_req, "Pending", None, fee)
+
+    def update_status(self, request_id, status):
+        return self.maintenance_model.update_status(request_id, status)
+
+class MoveOutController:
+    # Marks every tenant whose move-out date has passed as moved out and frees their
+    # units, in two set-based statements inside one transaction. The last run date is
+    # kept in app_state so the sweep happens once a day across all workstations.
+    STATE_KEY = "moveouts_last_run"
+
+    def __init__(self, db: Database):
+        self.db = db
+
+    def run(self, force=False, today=None):
+        today = today or datetime.date.today().isoformat()
+        if not force and self.db.get_state(self.STATE_KEY) == today:
+            return 0
+        due = """FROM tenants WHERE move_out <= ? AND date(move_out) IS NOT NULL
+                 AND IFNULL(status, '') != 'Moved out'"""
+        with self.db.transaction():
+            if not force and self.db.get_state(self.STATE_KEY) == today:
+                return 0
+            cur = self.db.execute(f"UPDATE tenants SET status='Moved out' WHERE tenant_id IN (SELECT tenant_id {due})", (today,))
+            self.db.set_state(self.STATE_KEY, today)
+            if cur.rowcount:
+                self.db.publish("units", "update")
+                self.db.publish("tenants", "update")
+            return cur.rowcount
+
+class IntegrityController:
+    # Checks the file itself, dangling references, and whether the trigger-maintained
+    # summaries (balances, revenue rollup, unit occupancy) still agree with the rows they
+    # summarise. Returns a list of problems; empty means healthy.
+    def __init__(self, db: Database, payment_model: PaymentModel):
+        self.db = db
+        self.payment_model = payment_model
+
+    def _drift(self, table, columns, amounts, select):
+        # rows present on one side only; amounts are compared to the cent
+        cols = ", ".join(f"ROUND({c}, 2)" if c in amounts else c for c in columns)
+        rows = self.db.query(f"""WITH expected({", ".join(columns)}) AS ({select})
+                                 SELECT (SELECT COUNT(*) FROM (SELECT {cols} FROM {table} EXCEPT SELECT {cols} FROM expected))
+                                      + (SELECT COUNT(*) FROM (SELECT {cols} FROM expected EXCEPT SELECT {cols} FROM {table})) AS c""")
+        return rows[0]["c"]
+
+    OCCUPANT_COUNT = f"(SELECT COUNT(*) FROM tenants t WHERE t.unit_id = units.unit_id AND {_occupies('t')})"
+
+    def check(self):
+        problems = []
+        result = [r[0] for r in self.db.query("PRAGMA quick_check")]
+        if result != ["ok"]:
+            problems.extend(f"quick_check: {r}" for r in result)
+        for r in self.db.query("""SELECT 'payments' AS tbl, COUNT(*) AS c FROM payments p
+                                     WHERE p.tenant_id IS NOT NULL AND NOT EXISTS (SELECT 1 FROM tenants t WHERE t.tenant_id = p.tenant_id)
+                                  UNION ALL
+                                  SELECT 'tenants', COUNT(*) FROM tenants t
+                                     WHERE t.unit_id IS NOT NULL AND NOT EXISTS (SELECT 1 FROM units u WHERE u.unit_id = t.unit_id)"""):
+            if r["c"]:
+                problems.append(f"{r['c']} {r['tbl']} row(s) point at a missing parent")
+        summaries = [
+            ("tenant_balances", ("tenant_id", "last_payment_date", "total_paid", "unpaid_count", "outstanding", "oldest_unpaid"), ("total_paid", "outstanding"),
+             f"{TENANT_BALANCE_SELECT} WHERE tenant_id IS NOT NULL GROUP BY tenant_id"),
+            ("revenue_daily", ("day", "unit_type", "status", "rent", "electricity", "water", "total", "payments"), ("rent", "electricity", "water", "total"),
+             REVENUE_DAILY_SELECT),
+        ]
+        for table, columns, amounts, select in summaries:
+            count = self._drift(table, columns, amounts, select)
+            if count:
+                problems.append(f"{table} differs from payments in {count} row(s)")
+        occupancy = self.db.query(f"SELECT COUNT(*) AS c FROM units WHERE occupants != {self.OCCUPANT_COUNT}")[0]["c"]
+        if occupancy:
+            problems.append(f"{occupancy} unit(s) have a stale occupant count")
+        if self.db.has_search_index:
+            for fts, table, _, _ in SEARCH_INDEXES:
+                try:
+                    # rank 1 also compares the index against the content table
+                    self.db.execute(f"INSERT INTO {fts} ({fts}, rank) VALUES ('integrity-check', 1)")
+                except sqlite3.DatabaseError:
+                    problems.append(f"search index {fts} is out of step with {table}")
+        return problems
+
+    def repair(self):
+        # Rebuilds the summaries from the base tables. A unit whose real head count is over
+        # its capacity is left alone (the capacity trigger refuses it) and shows up in check().
+        self.payment_model.rebuild_balances()
+        self.payment_model.rebuild_revenue()
+        with self.db.transaction():
+            cur = self.db.execute(f"""UPDATE units SET occupants = {self.OCCUPANT_COUNT}
+                                      WHERE occupants != {self.OCCUPANT_COUNT}
+                                        AND (capacity IS NULL OR {self.OCCUPANT_COUNT} <= MAX(capacity, occupants))""")
+            if cur.rowcount:
+                self.db.publish("units", "update")
+            rebuilt = ["tenant_balances", "revenue_daily"] + ([f"occupancy of {cur.rowcount} unit(s)"] if cur.rowcount else [])
+            if self.db.has_search_index:
+                for fts, _, _, _ in SEARCH_INDEXES:
+                    self.db.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+                rebuilt.append("search indexes")
+        return rebuilt
+
+class ChangeMonitor:
+    # Detects commits made by other connections (other workstations included) by polling
+    # PRAGMA data_version on a private read connection; only when it moves are the
+    # per-table counters read to work out which tables changed. This process's own
+    # writes are reported on db.events instead and are filtered out here. poll() is
+    # cheap enough to run on the UI thread every second.
+    def __init__(self, db: Database):
+        self.db = db
+        self._conn = None if db.db_file == ":memory:" else db._connect(read_only=True)
+        self._data_version = None
+        self._local = db.local_versions()
+        self._versions = self._read_versions()
+        self._subscribers = {}
+        self._next_token = 0
+
+    def _read_versions(self):
+        if self._conn is None:
+            rows = self.db.query("SELECT table_name, version FROM table_versions")
+        else:
+            rows = self._conn.execute("SELECT table_name, version FROM table_versions").fetchall()
+        return {r["table_name"]: r["version"] for r in rows}
+
+    def subscribe(self, tables, callback):
+        self._next_token += 1
+        self._subscribers[self._next_token] = (frozenset(tables), callback)
+        return self._next_token
+
+    def unsubscribe(self, token):
+        self._subscribers.pop(token, None)
+
+    def poll(self):
+        version = None
+        if self._conn is not None:
+            version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            if version == self._data_version:
+                return set()
+        # local counters first: a commit landing between the two reads then shows up as
+        # foreign once (a spare refresh) rather than hiding a real foreign change. While
+        # a background write holds the writer, skip the tick instead of blocking the UI;
+        # data_version stays unseen, so the next poll looks again.
+        local = self.db.local_versions(wait=False)
+        if local is None:
+            return set()
+        self._data_version = version
+        versions = self._read_versions()
+        changed = set()
+        for t, v in versions.items():
+            foreign = (v - self._versions.get(t, v)) - (local.get(t, 0) - self._local.get(t, 0))
+            if foreign > 0:
+                changed.add(t)
+        self._versions = versions
+        self._local = local
+        if changed:
+            for tables, callback in list(self._subscribers.values()):
+                hit = tables & changed
+                if hit:
+                    callback(hit)
+        return changed
+
+    def close(self):
+        self._subscribers.clear()
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
@@ -0,0 +1,260 @@
+import datetime
+import heapq
+import random
+
+from apart_core import (DORM_MAX_OCCUPANTS, NOTICE_PERIOD_DAYS, IMPORT_CACHE_KB, Database, UnitModel, TenantModel,
+                        PaymentModel)
+
+# Synthetic, reproducible data for load testing. The same seed, scale and anchor date
+# always produce the same rows in the same order, so a timing taken on one machine can
+# be repeated on another:
+#   python apart_cli.py --db load.db generate --scale large --seed 7 --today 2025-06-30
+
+# name: (units, tenants, payments)
+SCALES = {
+    "small": (500, 2_000, 50_000),
+    "medium": (10_000, 50_000, 1_000_000),
+    "large": (100_000, 500_000, 10_000_000),
+}
+GENERATE_BATCH = 200_000
+
+# (type, share of units, monthly rent range, mean stay in days)
+UNIT_MIX = (
+    ("Family", 0.45, (6000, 12000), 900),
+    ("Solo", 0.35, (4000, 7000), 330),
+    ("Dorm", 0.20, (2500, 4000), 270),
+)
+OCCUPANCY_RATE = 0.88
+NOTICE_GIVEN_RATE = 0.03
+# (share of tenants, chance a month is paid late, most days late, chance a late month is never paid)
+PAYER_PROFILES = (
+    (0.70, 0.05, 5, 0.0),
+    (0.22, 0.35, 20, 0.05),
+    (0.08, 0.80, 45, 0.35),
+)
+REFUND_RATE = 0.3
+MAINTENANCE_PER_TENANT_YEAR = 0.8
+MAINTENANCE_ISSUES = ("Broken door lock", "Leaky faucet", "Clogged drain", "No hot water", "Aircon not cooling",
+                      "Flickering lights", "Pest control", "Broken window", "Tripped breaker", "Ceiling leak")
+PRIORITIES = (("Low", 0.5), ("Medium", 0.35), ("High", 0.15))
+STAFF_ROLES = ("Technician", "Caretaker", "Electrician", "Plumber")
+UNITS_PER_STAFF = 250
+
+FIRST_NAMES = ("Jasmine", "Mariz", "Rafael", "Elaine", "Mark", "Jenny", "Paolo", "Carlos", "April", "Irene",
+               "Nathan", "Hannah", "Chris", "Lara", "Ricardo", "Andrea", "Melvin", "Sophia", "Aaron", "Nina",
+               "Miguel", "Bea", "Jose", "Camille", "Luis", "Kristine", "Ramon", "Patricia", "Gabriel", "Joy")
+LAST_NAMES = ("Santos", "Reyes", "Cruz", "Bautista", "Ocampo", "Garcia", "Mendoza", "Torres", "Tomas", "Andrada",
+              "Castillo", "Flores", "Villanueva", "Ramos", "Castro", "Rivera", "Aquino", "Navarro", "Salazar", "Mercado")
+RELATIONS = ("Parent", "Parent", "Guardian", "Sibling")
+
+class SyntheticData:
+    def __init__(self, db: Database, seed=0, units=None, tenants=None, payments=None, scale="small",
+                 maintenance_rate=MAINTENANCE_PER_TENANT_YEAR, today=None, batch_size=GENERATE_BATCH):
+        default_units, default_tenants, default_payments = SCALES[scale]
+        self.db = db
+        self.rng = random.Random(seed)
+        self.units = default_units if units is None else units
+        self.tenants = default_tenants if tenants is None else tenants
+        self.payments = default_payments if payments is None else payments
+        self.maintenance_rate = maintenance_rate
+        self.today = (today or datetime.date.today()).toordinal()
+        self.batch_size = batch_size
+        self.unit_model = UnitModel(db)
+        self.tenant_model = TenantModel(db)
+        self.payment_model = PaymentModel(db)
+        self._iso = {}
+
+    def _date(self, ordinal):
+        iso = self._iso.get(ordinal)
+        if iso is None:
+            iso = self._iso[ordinal] = datetime.date.fromordinal(ordinal).isoformat()
+        return iso
+
+    def _pick(self, weighted):
+        r = self.rng.random()
+        for value, weight in weighted:
+            r -= weight
+            if r < 0:
+                return value
+        return weighted[-1][0]
+
+    def _phone(self):
+        return f"09{self.rng.randint(100000000, 999999999)}"
+
+    def _name(self):
+        return f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}"
+
+    def _new_ids(self, table, key, before):
+        return [r[0] for r in self.db.query(f"SELECT {key} FROM {table} WHERE {key} > ? ORDER BY {key}", (before,))]
+
+    def _max_id(self, table, key):
+        return self.db.query(f"SELECT IFNULL(MAX({key}), 0) FROM {table}")[0][0]
+
+    def _make_units(self):
+        start = self.db.query("SELECT COUNT(*) FROM units")[0][0]
+        rows, kinds = [], []
+        for i in range(self.units):
+            utype, _, (low, high), mean_stay = self._pick([(m, m[1]) for m in UNIT_MIX])
+            price = self.rng.randrange(low, high + 1, 250)
+            rows.append((f"U{start + i + 1:06d}", utype, price, DORM_MAX_OCCUPANTS if utype == "Dorm" else None))
+            kinds.append((utype, price, mean_stay))
+        before = self._max_id("units", "unit_id")
+        for i in range(0, len(rows), self.batch_size):
+            self.unit_model.bulk_create(rows[i:i + self.batch_size])
+        return [(unit_id,) + kind for unit_id, kind in zip(self._new_ids("units", "unit_id", before), kinds)]
+
+    def _tenancies(self, units):
+        # Every unit has one slot (a dorm has DORM_MAX_OCCUPANTS); tenants are spread over
+        # the slots and laid out backwards from today as back-to-back stays separated by
+        # short vacancies. The newest stay in a slot is still running OCCUPANCY_RATE of the time.
+        slots = [u for u in units for _ in range(DORM_MAX_OCCUPANTS if u[1] == "Dorm" else 1)]
+        self.rng.shuffle(slots)
+        per_slot, extra = divmod(self.tenants, len(slots)) if slots else (0, 0)
+        stays = []
+        for n, (unit_id, utype, price, mean_stay) in enumerate(slots):
+            count = per_slot + (1 if n < extra else 0)
+            if not count:
+                continue
+            active = self.rng.random() < OCCUPANCY_RATE
+            end = self.today if active else self.today - self.rng.randint(1, 90)
+            for j in range(count):
+                stay = max(30, int(self.rng.expovariate(1 / mean_stay)))
+                start = end - stay
+                move_out = end
+                if j == 0 and active:
+                    move_out = self.today + self.rng.randint(1, NOTICE_PERIOD_DAYS) if self.rng.random() < NOTICE_GIVEN_RATE else None
+                stays.append((start, move_out, unit_id, utype, price))
+                end = start - self.rng.randint(0, 45)
+        stays.sort(key=lambda s: s[0])
+        return stays
+
+    def _make_tenants(self, stays):
+        rows = []
+        for start, move_out, unit_id, utype, price in stays:
+            guardian = ("", "", "")
+            if utype == "Dorm":
+                guardian = (self._name(), self._phone()[1:], self.rng.choice(RELATIONS))
+            status = "Moved out" if move_out is not None and move_out <= self.today else "Active"
+            deposit = price if self.rng.random() < 0.8 else 0
+            rows.append((self._name(), self._phone(), unit_id, utype, self._date(start),
+                         self._date(move_out) if move_out is not None else None, status) + guardian +
+                        (self._phone() if self.rng.random() < 0.5 else "", price if self.rng.random() < 0.6 else 0, deposit))
+        before = self._max_id("tenants", "tenant_id")
+        for i in range(0, len(rows), self.batch_size):
+            self.tenant_model.bulk_create(rows[i:i + self.batch_size])
+        ids = self._new_ids("tenants", "tenant_id", before)
+        return [(tenant_id, start, min(move_out or self.today, self.today), price, row[-1], row[6] == "Moved out")
+                for tenant_id, (start, move_out, _, _, price), row in zip(ids, stays, rows)]
+
+    def _payment_rows(self, tenants):
+        # Bills fall due at even steps over each stay, scaled so the total comes out near
+        # the requested count, and are yielded in due-date order across all tenants the
+        # way a live system would have recorded them.
+        months = [max(1, (end - start) // 30) for _, start, end, _, _, _ in tenants]
+        factor = self.payments / max(1, sum(months))
+        heap = []
+        for n, (tenant_id, start, end, price, deposit, moved_out) in enumerate(tenants):
+            count = int(months[n] * factor + self.rng.random())
+            if count:
+                profile = self._pick([(p[1:], p[0]) for p in PAYER_PROFILES])
+                heap.append((start, n, 0, count, (end - start) / count, profile))
+        heapq.heapify(heap)
+        while heap:
+            due, n, i, count, step, (late_rate, late_days, unpaid_rate) = heapq.heappop(heap)
+            tenant_id, start, end, price, deposit, moved_out = tenants[n]
+            paid = int(due)
+            status = "Paid"
+            if self.rng.random() < late_rate:
+                paid += self.rng.randint(1, late_days)
+                if self.rng.random() < unpaid_rate:
+                    status = "Overdue"
+            month = datetime.date.fromordinal(int(due)).month
+            electricity = round(self.rng.uniform(300, 900) * (1.3 if month in (4, 5, 6) else 1.0), 2)
+            water = round(self.rng.uniform(100, 350), 2)
+            yield (tenant_id, price, electricity, water, price + electricity + water, self._date(min(paid, self.today)), status, "")
+            if i + 1 < count:
+                heapq.heappush(heap, (start + step * (i + 1), n, i + 1, count, step, (late_rate, late_days, unpaid_rate)))
+            elif moved_out and deposit and self.rng.random() < REFUND_RATE:
+                yield (tenant_id, deposit, 0, 0, deposit, self._date(end), "Refund", "Deposit refund")
+
+    def _make_payments(self, tenants, progress=None):
+        batch, written = [], 0
+        for row in self._payment_rows(tenants):
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                written += self.payment_model.bulk_insert(batch)
+                batch = []
+                if progress:
+                    progress("payments", written, self.payments)
+        if batch:
+            written += self.payment_model.bulk_insert(batch)
+        return written
+
+    def _make_staff(self):
+        have = self.db.query("SELECT COUNT(*) FROM staff")[0][0]
+        rows = [(self._name(), self.rng.choice(STAFF_ROLES), self._phone())
+                for _ in range(max(0, max(3, self.units // UNITS_PER_STAFF) - have))]
+        with self.db.transaction():
+            self.db.executemany("INSERT INTO staff (name, role, contact) VALUES (?,?,?)", rows)
+            if rows:
+                self.db.publish("staff", "insert")
+        return [r[0] for r in self.db.query("SELECT staff_id FROM staff ORDER BY staff_id")]
+
+    def _make_maintenance(self, tenants, staff):
+        rows = []
+        for tenant_id, start, end, _, _, _ in tenants:
+            expected = self.maintenance_rate * (end - start) / 365
+            for _ in range(int(expected + self.rng.random())):
+                day = self.rng.randint(start, max(start, end))
+                age = self.today - day
+                if age > 60:
+                    status = "Done" if self.rng.random() < 0.95 else "Ongoing"
+                else:
+                    status = self.rng.choice(("Pending", "Ongoing", "Done"))
+                rows.append((tenant_id, self.rng.choice(MAINTENANCE_ISSUES), self._pick(PRIORITIES), self._date(day), status,
+                             self.rng.choice(staff) if status != "Pending" else None, self.rng.choice((0, 0, 0, 150, 250, 500))))
+        for i in range(0, len(rows), self.batch_size):
+            with self.db.transaction():
+                self.db.executemany("""INSERT INTO maintenance (tenant_id, description, priority, date_requested, status, assigned_staff, fee)
+                                       VALUES (?,?,?,?,?,?,?)""", rows[i:i + self.batch_size])
+                self.db.publish("maintenance", "insert")
+        return len(rows)
+
+    def generate(self, progress=None):
+        # Each stage writes through the models' executemany paths in transactions of up
+        # to batch_size rows. Returns the number of rows written per table.
+        cache_size = self.db.execute("PRAGMA cache_size").fetchone()[0]
+        self.db.execute(f"PRAGMA cache_size = -{IMPORT_CACHE_KB}")
+        try:
+            counts = {}
+            staff = self._make_staff()
+            units = self._make_units()
+            counts["units"] = len(units)
+            if progress:
+                progress("units", len(units), self.units)
+            tenants = self._make_tenants(self._tenancies(units))
+            counts["tenants"] = len(tenants)
+            if progress:
+                progress("tenants", len(tenants), self.tenants)
+            counts["payments"] = self._make_payments(tenants, progress)
+            counts["maintenance"] = self._make_maintenance(tenants, staff)
+            if progress:
+                progress("maintenance", counts["maintenance"], counts["maintenance"])
+        finally:
+            self.db.execute(f"PRAGMA cache_size = {cache_size}")
+        return counts
+
+def create_database(path, **options):
+    # A new database file holding only synthetic data: the demo rows every new file is
+    # seeded with are removed first (keeping the admin login) so the result depends on
+    # the seed alone.
+    db = Database(path)
+    try:
+        with db.transaction():
+            for table in ("maintenance", "payments", "tenants", "units", "staff", "tenant_balances", "revenue_daily"):
+                db.execute(f"DELETE FROM {table}")
+            db.execute("DELETE FROM sqlite_sequence WHERE name IN ('maintenance','payments','tenants','units','staff')")
+        progress = options.pop("progress", None)
+        return SyntheticData(db, **options).generate(progress)
+    finally:
+        db.close()
@@ -0,0 +1,16 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from apart_core import Database  # noqa: E402
+
+
+@pytest.fixture
+def db(tmp_path):
+    # a fresh, fully migrated database holding the demo rows
+    database = Database(str(tmp_path / "apartment.db"))
+    yield database
+    database.close()
@@ -0,0 +1,55 @@
+import pytest
+
+import apart_core
+from apart_core import AuthController, LoginThrottled
+
+pytest.importorskip("bcrypt")
+
+
+@pytest.fixture
+def auth(db):
+    db.set_bcrypt_rounds(4)
+    return AuthController(db)
+
+
+def test_login_rehashes_plaintext(db, auth):
+    assert auth.verify("admin", "admin")
+    stored = db.query("SELECT password FROM users WHERE username='admin'")[0][0]
+    assert stored.startswith("$2b$04$")
+    assert auth.verify("admin", "admin")
+    assert not auth.verify("admin", "wrong")
+
+
+def test_unknown_user_still_hashes(monkeypatch, auth):
+    calls = []
+    real = apart_core.check_password
+    monkeypatch.setattr(apart_core, "check_password", lambda pw, stored: calls.append(stored) or real(pw, stored))
+    assert not auth.verify("nobody", "guess")
+    assert len(calls) == 1 and calls[0].startswith("$2b$04$")
+
+
+def test_unknown_and_real_users_throttle_alike(auth):
+    for name in ("admin", "nobody"):
+        for _ in range(apart_core.LOGIN_FREE_ATTEMPTS):
+            assert not auth.verify(name, "wrong")
+        with pytest.raises(LoginThrottled):
+            auth.verify(name, "wrong")
+
+
+def test_failures_expire_and_are_capped(monkeypatch, auth):
+    now = [1000.0]
+    monkeypatch.setattr(apart_core.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(apart_core, "LOGIN_TRACKED_USERS", 5)
+    for i in range(20):
+        auth.verify(f"user{i}", "wrong")
+    assert list(auth._failures) == [f"user{i}" for i in range(15, 20)]
+    now[0] += apart_core.LOGIN_FAILURE_TTL_S
+    auth.verify("late", "wrong")
+    assert list(auth._failures) == ["late"]
+
+
+def test_rounds_are_validated(db):
+    with pytest.raises(ValueError):
+        db.set_bcrypt_rounds(3)
+    db.set_bcrypt_rounds(10)
+    assert db.bcrypt_rounds() == 10
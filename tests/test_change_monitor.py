@@ -0,0 +1,44 @@
+import threading
+import time
+
+from apart_core import ChangeMonitor, Database
+
+
+def test_poll_does_not_wait_for_a_background_write(db):
+    monitor = ChangeMonitor(db)
+    started, release = threading.Event(), threading.Event()
+
+    def writer():
+        with db.transaction():
+            db.execute("UPDATE staff SET role=role")
+            started.set()
+            release.wait(5)
+
+    t = threading.Thread(target=writer)
+    t.start()
+    try:
+        started.wait(5)
+        began = time.perf_counter()
+        assert monitor.poll() == set()
+        assert time.perf_counter() - began < 0.5
+    finally:
+        release.set()
+        t.join()
+    # our own write is not reported as foreign once the writer is free again
+    assert monitor.poll() == set()
+    monitor.close()
+
+
+def test_poll_reports_foreign_writes(db):
+    monitor = ChangeMonitor(db)
+    seen = []
+    monitor.subscribe({"staff"}, seen.append)
+    other = Database(db.db_file)
+    try:
+        with other.transaction():
+            other.execute("UPDATE staff SET role=role")
+    finally:
+        other.close()
+    assert monitor.poll() == {"staff"}
+    assert seen == [{"staff"}]
+    monitor.close()
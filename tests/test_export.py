@@ -0,0 +1,95 @@
+import csv
+import gzip
+import threading
+
+import pytest
+
+from apart_core import ExportCancelled, ExportController, PaymentModel
+
+
+def exporter(db):
+    return ExportController(db, PaymentModel(db))
+
+
+def read_csv(path, zipped):
+    opener = gzip.open if zipped else open
+    with opener(path, "rt", newline="", encoding="utf-8") as f:
+        return list(csv.reader(f))
+
+
+def is_gzip(path):
+    with open(path, "rb") as f:
+        return f.read(2) == b"\x1f\x8b"
+
+
+def test_filters_select_the_same_rows_as_the_model(db, tmp_path):
+    tenant_id = db.query("SELECT tenant_id FROM payments GROUP BY tenant_id ORDER BY COUNT(*) DESC LIMIT 1")[0][0]
+    PaymentModel(db).bulk_insert([(tenant_id, 100, 0, 0, 100, f"2026-03-{d:02d}", "Overdue", "") for d in range(1, 8)])
+    path = str(tmp_path / "overdue.csv")
+    filters = {"tenant_id": tenant_id, "status": "Overdue", "date_from": "2026-03-02", "date_to": "2026-03-06"}
+    count = exporter(db).export_payments(path, filters, batch_size=2)
+    rows = read_csv(path, zipped=False)
+    assert rows[0] == ExportController.PAYMENT_HEADER
+    expected = [r["payment_id"] for r in PaymentModel(db).iter_rows(filters)]
+    assert count == len(expected) == 5
+    assert [int(r[0]) for r in rows[1:]] == expected
+    assert {r[7] for r in rows[1:]} == {"Overdue"}
+
+
+@pytest.mark.parametrize("name, compress, zipped", [
+    ("payments.csv.gz", None, True),
+    ("payments.CSV.GZ", None, True),
+    ("payments.csv", True, True),
+    ("payments.gz", False, False),
+    ("payments.csv", None, False),
+])
+def test_gzip_by_suffix_or_flag(db, tmp_path, name, compress, zipped):
+    path = str(tmp_path / name)
+    count = exporter(db).export_payments(path, compress=compress)
+    assert is_gzip(path) == zipped
+    assert len(read_csv(path, zipped)) == count + 1 == db.query("SELECT COUNT(*) FROM payments")[0][0] + 1
+
+
+def test_cancel_leaves_no_file_behind(db, tmp_path):
+    path = str(tmp_path / "payments.csv")
+    cancel = threading.Event()
+    cancel.set()
+    with pytest.raises(ExportCancelled):
+        exporter(db).export_payments(path, cancel_event=cancel, batch_size=1)
+    assert not [p.name for p in tmp_path.iterdir() if p.name.startswith("payments")]
+
+
+def test_cancel_mid_export_keeps_the_previous_file(db, tmp_path):
+    path = tmp_path / "payments.csv"
+    path.write_text("previous export\n", encoding="utf-8")
+    cancel = threading.Event()
+    progress = []
+
+    def on_progress(done, total):
+        progress.append(done)
+        cancel.set()
+
+    with pytest.raises(ExportCancelled):
+        exporter(db).export_payments(str(path), progress=on_progress, cancel_event=cancel, batch_size=2)
+    assert progress == [2]
+    assert path.read_text(encoding="utf-8") == "previous export\n"
+    assert not (tmp_path / "payments.csv.part").exists()
+
+
+def test_error_removes_the_part_file(db, tmp_path, monkeypatch):
+    path = tmp_path / "payments.csv.gz"
+    model = PaymentModel(db)
+    real = model.iter_rows
+
+    def failing(filters=None, batch_size=5000):
+        rows = real(filters, batch_size)
+        yield next(rows)
+        rows.close()
+        raise OSError("disk full")
+
+    monkeypatch.setattr(model, "iter_rows", failing)
+    with pytest.raises(OSError, match="disk full"):
+        ExportController(db, model).export_payments(str(path))
+    assert not path.exists()
+    assert not (tmp_path / "payments.csv.gz.part").exists()
+    assert not db.query("SELECT 1 FROM reports WHERE filepath=?", (str(path),))
@@ -0,0 +1,94 @@
+import csv
+import os
+import threading
+
+import pytest
+
+from apart_core import ImportCancelled, ImportController, PaymentModel, TenantModel, UnitModel
+
+
+def controller(db):
+    return ImportController(db, UnitModel(db), TenantModel(db), PaymentModel(db))
+
+
+def write_payments(path, tenant_id, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["tenant_id", "rent", "electricity", "water", "status", "date_paid", "note"])
+        for i in range(rows):
+            # every fifth row names a tenant that does not exist
+            tid = 999999 if i % 5 == 4 else tenant_id
+            writer.writerow([tid, 1000 + i, 10, 5, "Paid", f"2026-01-{i % 28 + 1:02d}", f"row {i}"])
+
+
+def imported_notes(db):
+    return [r[0] for r in db.query("SELECT note FROM payments WHERE note LIKE 'row %' ORDER BY payment_id")]
+
+
+def reject_lines(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return [row[-2] for row in list(csv.reader(f))[1:]]
+
+
+def test_cancelled_import_resumes_after_last_chunk(db, tmp_path):
+    tenant_id = db.query("SELECT MIN(tenant_id) FROM tenants")[0][0]
+    path = str(tmp_path / "payments.csv")
+    write_payments(path, tenant_id, 20)
+    before = db.query("SELECT COUNT(*) FROM payments")[0][0]
+    cancel = threading.Event()
+    chunks = []
+
+    def progress(done, total):
+        chunks.append(done)
+        if len(chunks) == 2:
+            cancel.set()
+
+    with pytest.raises(ImportCancelled):
+        controller(db).import_csv("payments", path, progress=progress, cancel_event=cancel, chunk_size=3)
+    assert db.query("SELECT COUNT(*) FROM payments")[0][0] - before == 5
+
+    result = controller(db).import_csv("payments", path, chunk_size=3)
+    assert result.skipped == 6
+    assert (result.imported, result.rejected) == (16, 4)
+    assert imported_notes(db) == [f"row {i}" for i in range(20) if i % 5 != 4]
+    assert reject_lines(result.rejects_path) == ["6", "11", "16", "21"]
+
+
+def test_rejects_of_an_uncommitted_chunk_are_not_kept(db, tmp_path, monkeypatch):
+    # the process dies after a chunk's rejects hit the file but before its state commits
+    tenant_id = db.query("SELECT MIN(tenant_id) FROM tenants")[0][0]
+    path = str(tmp_path / "payments.csv")
+    write_payments(path, tenant_id, 20)
+    set_state = db.set_state
+    calls = []
+
+    def crash_on_second_chunk(key, value):
+        calls.append(key)
+        if len(calls) == 2:
+            raise KeyboardInterrupt
+        set_state(key, value)
+
+    monkeypatch.setattr(db, "set_state", crash_on_second_chunk)
+    with pytest.raises(KeyboardInterrupt):
+        controller(db).import_csv("payments", path, chunk_size=5)
+    monkeypatch.setattr(db, "set_state", set_state)
+
+    result = controller(db).import_csv("payments", path, chunk_size=5)
+    assert (result.skipped, result.imported, result.rejected) == (5, 16, 4)
+    assert imported_notes(db) == [f"row {i}" for i in range(20) if i % 5 != 4]
+    assert reject_lines(result.rejects_path) == ["6", "11", "16", "21"]
+
+
+def test_progress_follows_the_file_not_its_lines(db, tmp_path):
+    tenant_id = db.query("SELECT MIN(tenant_id) FROM tenants")[0][0]
+    path = str(tmp_path / "payments.csv")
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["tenant_id", "rent", "electricity", "water", "status", "date_paid", "note"])
+        for i in range(4):
+            writer.writerow([tenant_id, 1000, 10, 5, "Paid", "2026-01-05", f"row {i}\nsecond line\nthird line"])
+    seen = []
+    result = controller(db).import_csv("payments", path, progress=lambda done, total: seen.append((done, total)), chunk_size=2)
+    assert result.imported == 4
+    assert seen[-1] == (os.path.getsize(path), os.path.getsize(path))
+    assert [done for done, _ in seen] == sorted(done for done, _ in seen)
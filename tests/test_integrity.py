@@ -0,0 +1,72 @@
+import datetime
+
+from apart_core import IntegrityController, MoveOutController, PaymentModel, REVENUE_DAILY_SELECT, TENANT_BALANCE_SELECT
+
+
+def balances(db):
+    return [tuple(r) for r in db.query("SELECT * FROM tenant_balances ORDER BY tenant_id")]
+
+
+def rebuilt_balances(db):
+    return [tuple(r) for r in db.query(f"{TENANT_BALANCE_SELECT} WHERE tenant_id IS NOT NULL GROUP BY tenant_id ORDER BY tenant_id")]
+
+
+def revenue(db):
+    return [tuple(r) for r in db.query("SELECT day, unit_type, status, rent, electricity, water, total, payments FROM revenue_daily ORDER BY 1, 2, 3")]
+
+
+def rebuilt_revenue(db):
+    return sorted(tuple(r) for r in db.query(REVENUE_DAILY_SELECT))
+
+
+def test_balances_follow_payment_edits(db):
+    tenant_id = db.query("SELECT MIN(tenant_id) FROM tenants")[0][0]
+    PaymentModel(db).create(tenant_id, 4500, 300, 100, "2026-01-05", "Overdue")
+    with db.transaction():
+        db.execute("UPDATE payments SET status='Overdue' WHERE payment_id % 3 = 0")
+        db.execute("UPDATE payments SET tenant_id=? WHERE payment_id % 5 = 0", (tenant_id,))
+        db.execute("DELETE FROM payments WHERE payment_id % 7 = 0")
+    assert balances(db) == rebuilt_balances(db)
+
+
+def test_rebuild_balances_fixes_drift(db):
+    with db.transaction():
+        db.execute("UPDATE tenant_balances SET outstanding = outstanding + 5, unpaid_count = unpaid_count + 1")
+        db.execute("DELETE FROM tenant_balances WHERE tenant_id = (SELECT MIN(tenant_id) FROM tenant_balances)")
+    assert balances(db) != rebuilt_balances(db)
+    PaymentModel(db).rebuild_balances()
+    assert balances(db) == rebuilt_balances(db)
+
+
+def test_rebuild_revenue_fixes_drift(db):
+    with db.transaction():
+        db.execute("UPDATE revenue_daily SET total = total + 1 WHERE rowid IN (SELECT rowid FROM revenue_daily LIMIT 2)")
+        db.execute("DELETE FROM revenue_daily WHERE rowid = (SELECT MAX(rowid) FROM revenue_daily)")
+    assert revenue(db) != rebuilt_revenue(db)
+    PaymentModel(db).rebuild_revenue()
+    assert revenue(db) == rebuilt_revenue(db)
+
+
+def test_check_reports_drift_and_repair_fixes_it(db):
+    ctrl = IntegrityController(db, PaymentModel(db))
+    assert ctrl.check() == []
+    with db.transaction():
+        db.execute("UPDATE revenue_daily SET total = total + 1 WHERE rowid IN (SELECT rowid FROM revenue_daily LIMIT 2)")
+        db.execute("UPDATE tenant_balances SET outstanding = outstanding + 5 WHERE rowid IN (SELECT rowid FROM tenant_balances LIMIT 1)")
+        db.execute("UPDATE units SET occupants = occupants + 1 WHERE unit_id = (SELECT MIN(unit_id) FROM units)")
+    problems = ctrl.check()
+    assert len(problems) == 3
+    assert any(p.startswith("revenue_daily") for p in problems)
+    assert any(p.startswith("tenant_balances") for p in problems)
+    ctrl.repair()
+    assert ctrl.check() == []
+
+
+def test_check_stays_clean_through_moveouts_and_payment_edits(db):
+    with db.transaction():
+        db.execute("UPDATE tenants SET move_out = ? WHERE tenant_id % 4 = 0", ((datetime.date.today() - datetime.timedelta(days=1)).isoformat(),))
+    MoveOutController(db).run(force=True)
+    with db.transaction():
+        db.execute("UPDATE payments SET status='Overdue' WHERE payment_id % 3 = 0")
+        db.execute("DELETE FROM payments WHERE payment_id % 7 = 0")
+    assert IntegrityController(db, PaymentModel(db)).check() == []
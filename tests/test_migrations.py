@@ -0,0 +1,58 @@
+import sqlite3
+
+import pytest
+
+from apart_core import MIGRATIONS, Database, IntegrityController, PaymentModel
+
+
+def migrate_to(path, version):
+    # a database file left at an older schema version, as an older release wrote it
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    cur = conn.cursor()
+    for number in range(1, version + 1):
+        cur.execute("BEGIN")
+        MIGRATIONS[number - 1](cur)
+        cur.execute(f"PRAGMA user_version = {number}")
+        conn.commit()
+    if version:
+        cur.execute("INSERT INTO units (unit_code, type, price, status) VALUES ('OLD-1', 'Family', 6000, 'Occupied')")
+        cur.execute("""INSERT INTO tenants (name, contact, unit_id, tenant_type, move_in, status)
+                       VALUES ('Old Tenant', '0917', last_insert_rowid(), 'Family', '2025-01-01', 'Active')""")
+        # from the revenue rollup on, payments carry the unit type they were paid under
+        stamped = any(r[1] == "unit_type" for r in cur.execute("PRAGMA table_info(payments)"))
+        for day, status in (("2025-02-01", "Paid"), ("2025-03-01", "Overdue")):
+            if stamped:
+                cur.execute("""INSERT INTO payments (tenant_id, rent, electricity, water, total, date_paid, status, unit_type)
+                               VALUES ((SELECT MAX(tenant_id) FROM tenants), 6000, 300, 100, 6400, ?, ?, 'Family')""", (day, status))
+            else:
+                cur.execute("""INSERT INTO payments (tenant_id, rent, electricity, water, total, date_paid, status)
+                               VALUES ((SELECT MAX(tenant_id) FROM tenants), 6000, 300, 100, 6400, ?, ?)""", (day, status))
+        conn.commit()
+    conn.close()
+
+
+def test_fresh_database_is_fully_migrated(db):
+    assert db.schema_version() == len(MIGRATIONS)
+    assert IntegrityController(db, PaymentModel(db)).check() == []
+
+
+@pytest.mark.parametrize("version", range(len(MIGRATIONS)))
+def test_upgrade_from_every_version(tmp_path, version):
+    path = str(tmp_path / "old.db")
+    migrate_to(path, version)
+    db = Database(path)
+    try:
+        assert db.schema_version() == len(MIGRATIONS)
+        assert IntegrityController(db, PaymentModel(db)).check() == []
+        if version:
+            old = "SELECT p.status, p.unit_type FROM payments p JOIN tenants t USING (tenant_id) WHERE t.name='Old Tenant' ORDER BY p.date_paid"
+            assert [tuple(r) for r in db.query(old)] == [("Paid", "Family"), ("Overdue", "Family")]
+    finally:
+        db.close()
+    # reopening finds nothing left to run
+    db = Database(path)
+    try:
+        assert db.schema_version() == len(MIGRATIONS)
+    finally:
+        db.close()
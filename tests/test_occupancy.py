@@ -0,0 +1,52 @@
+import pytest
+
+from apart_core import TenantModel, UnitFull, UnitModel
+
+OCCUPANCY_DRIFT = """SELECT COUNT(*) FROM units u
+                     WHERE u.occupants != (SELECT COUNT(*) FROM tenants t WHERE t.unit_id = u.unit_id
+                                           AND IFNULL(t.status, '') != 'Moved out')"""
+
+
+def empty_dorm(db):
+    UnitModel(db).bulk_create([("TEST-DORM", "Dorm", 2500, 4)])
+    return db.query("SELECT unit_id FROM units WHERE unit_code='TEST-DORM'")[0][0]
+
+
+def add_tenant(db, unit_id, name="Occupant"):
+    TenantModel(db).create(name, "09170000000", unit_id, "Dorm", "2026-01-01")
+    return db.query("SELECT MAX(tenant_id) FROM tenants")[0][0]
+
+
+def occupants(db, unit_id):
+    return db.query("SELECT occupants, status FROM units WHERE unit_id=?", (unit_id,))[0]
+
+
+def test_triggers_track_occupants_and_status(db):
+    unit = empty_dorm(db)
+    first = add_tenant(db, unit)
+    second = add_tenant(db, unit)
+    assert tuple(occupants(db, unit)) == (2, "Occupied")
+    TenantModel(db).update(first, status="Moved out")
+    assert occupants(db, unit)["occupants"] == 1
+    TenantModel(db).delete(second)
+    assert tuple(occupants(db, unit)) == (0, "Vacant")
+    assert db.query(OCCUPANCY_DRIFT)[0][0] == 0
+
+
+def test_capacity_is_enforced(db):
+    unit = empty_dorm(db)
+    for i in range(4):
+        add_tenant(db, unit, f"Occupant {i}")
+    with pytest.raises(UnitFull):
+        add_tenant(db, unit, "One too many")
+    assert occupants(db, unit)["occupants"] == 4
+
+
+def test_tenant_rows_report_unit_occupants(db):
+    unit = empty_dorm(db)
+    staying, leaving = add_tenant(db, unit, "Staying"), add_tenant(db, unit, "Leaving")
+    TenantModel(db).update(leaving, status="Moved out")
+    model = TenantModel(db)
+    for rows in (model.all(), model.rows_for([staying]), model.search("Staying")):
+        row = next(r for r in rows if r["tenant_id"] == staying)
+        assert row["unit_occupants"] == 1
@@ -0,0 +1,44 @@
+import datetime
+
+from apart_core import BillingController, IntegrityController, PaymentModel, TenantModel, UnitModel
+
+
+def days_ago(n):
+    return (datetime.date.today() - datetime.timedelta(days=n)).isoformat()
+
+
+def new_tenant(db):
+    UnitModel(db).bulk_create([("TEST-OVERDUE", "Solo", 5000, None)])
+    unit = db.query("SELECT unit_id FROM units WHERE unit_code='TEST-OVERDUE'")[0][0]
+    TenantModel(db).create("Late Payer", "09170000000", unit, "Solo", days_ago(200))
+    return db.query("SELECT MAX(tenant_id) FROM tenants")[0][0]
+
+
+def overdue_row(db, tenant_id, policy_days=7):
+    billing = BillingController(db, PaymentModel(db), TenantModel(db))
+    return next(r for r in billing.overdue_list(policy_days) if r["tenant_id"] == tenant_id)
+
+
+def test_days_overdue_counts_from_oldest_unpaid_period(db):
+    tid = new_tenant(db)
+    payments = PaymentModel(db)
+    payments.create(tid, 5000, 0, 0, days_ago(60), "Overdue")
+    payments.create(tid, 5000, 0, 0, days_ago(30), "Overdue")
+    payments.create(tid, 5000, 0, 0, days_ago(2), "Paid")
+    row = overdue_row(db, tid)
+    assert row["status"] == "Overdue"
+    assert row["outstanding"] == 10000
+    assert row["days_overdue"] == 53
+    # settling the oldest period moves the count to the next unpaid one
+    oldest = db.query("SELECT payment_id FROM payments WHERE tenant_id=? AND date_paid=?", (tid, days_ago(60)))[0][0]
+    with db.transaction():
+        db.execute("UPDATE payments SET status='Paid' WHERE payment_id=?", (oldest,))
+    assert overdue_row(db, tid)["days_overdue"] == 23
+    assert IntegrityController(db, payments).check() == []
+
+
+def test_bulk_insert_tracks_oldest_unpaid(db):
+    tid = new_tenant(db)
+    PaymentModel(db).bulk_insert([(tid, 100, 0, 0, 100, days_ago(d), "Overdue", "") for d in (20, 40, 10)])
+    assert db.query("SELECT oldest_unpaid FROM tenant_balances WHERE tenant_id=?", (tid,))[0][0] == days_ago(40)
+    assert IntegrityController(db, PaymentModel(db)).check() == []
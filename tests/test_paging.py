@@ -0,0 +1,53 @@
+from apart_core import PaymentModel
+
+
+def ids(rows):
+    return [r["payment_id"] for r in rows]
+
+
+def all_ids(db, where="1", params=()):
+    return [r[0] for r in db.query(f"SELECT payment_id FROM payments p WHERE {where} ORDER BY payment_id DESC", params)]
+
+
+def add_payments(db, count):
+    tenants = [r[0] for r in db.query("SELECT tenant_id FROM tenants ORDER BY tenant_id LIMIT 3")]
+    PaymentModel(db).bulk_insert([(tenants[i % 3], 1000, 0, 0, 1000, f"2026-0{i // 3 % 3 + 1}-1{i % 10}",
+                                   "Overdue" if i % 4 == 0 else "Paid", "") for i in range(count)])
+
+
+def test_after_id_walks_down_in_adjacent_pages(db):
+    add_payments(db, 45)
+    model = PaymentModel(db)
+    seen, page = [], model.page(limit=10)
+    while page:
+        assert ids(page) == sorted(ids(page), reverse=True)
+        seen += ids(page)
+        page = model.page(after_id=ids(page)[-1], limit=10)
+    assert seen == all_ids(db)
+
+
+def test_before_id_walks_back_up_newest_first(db):
+    add_payments(db, 45)
+    model = PaymentModel(db)
+    everything = all_ids(db)
+    bottom = model.page(after_id=everything[25], limit=10)
+    assert ids(bottom) == everything[26:36]
+    above = model.page(before_id=ids(bottom)[0], limit=10)
+    # the ten rows directly above, still newest first
+    assert ids(above) == everything[16:26]
+    top = model.page(before_id=everything[3], limit=10)
+    assert ids(top) == everything[:3]
+
+
+def test_filters_apply_in_both_directions(db):
+    add_payments(db, 60)
+    tenant_id = db.query("SELECT MIN(tenant_id) FROM tenants")[0][0]
+    filters = {"tenant_id": tenant_id, "status": "Paid", "date_from": "2026-02-01", "date_to": "2026-02-28"}
+    expected = all_ids(db, "tenant_id=? AND status='Paid' AND date_paid BETWEEN '2026-02-01' AND '2026-02-28'", (tenant_id,))
+    assert len(expected) > 4
+    model = PaymentModel(db)
+    first = model.page(limit=3, filters=filters)
+    second = model.page(after_id=ids(first)[-1], limit=3, filters=filters)
+    assert ids(first) + ids(second) == expected[:6]
+    assert ids(model.page(before_id=ids(second)[0], limit=3, filters=filters)) == expected[:3]
+    assert all(r["tenant_id"] == tenant_id and r["status"] == "Paid" for r in first + second)
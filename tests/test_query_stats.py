@@ -0,0 +1,67 @@
+import time
+
+from apart_core import QueryStats, normalize_sql
+
+
+def stat(db, fragment):
+    return next(s for s in db.stats.snapshot() if fragment in s["sql"])
+
+
+def test_literals_normalize_into_one_key():
+    assert normalize_sql("SELECT * FROM units WHERE unit_code = 'A1' AND price > 4500") == \
+        normalize_sql("SELECT  *\n FROM units WHERE unit_code = 'B''2' AND price > 6000.50")
+    assert normalize_sql("DELETE FROM payments WHERE payment_id IN (1, 2, 3)") == \
+        normalize_sql("DELETE FROM payments WHERE payment_id IN (?,?)") == \
+        "DELETE FROM payments WHERE payment_id IN (?, ...)"
+    # digits inside a name are not literals
+    assert "trg_payments_balance_ins" in normalize_sql("DROP TRIGGER trg_payments_balance_ins")
+
+
+def test_statements_differing_only_in_literals_share_stats(db):
+    db.stats.reset()
+    for code in ("A1", "B2", "C3"):
+        db.query(f"SELECT unit_id FROM units WHERE unit_code = '{code}'")
+    s = stat(db, "FROM units WHERE unit_code")
+    assert s["calls"] == 3
+    assert s["sql"] == "SELECT unit_id FROM units WHERE unit_code = ?"
+    assert len([x for x in db.stats.snapshot() if "WHERE unit_code" in x["sql"]]) == 1
+
+
+def test_slow_statement_keeps_its_plan_and_call_site(db, tmp_path):
+    log = tmp_path / "slow.log"
+    db.stats.reset()
+    db.stats.slow_ms, db.stats.log_path = 0, str(log)
+
+    def load_overdue():
+        return db.query("SELECT * FROM payments WHERE tenant_id = ? AND status = 'Overdue'", (1,))
+
+    load_overdue()
+    s = stat(db, "FROM payments WHERE tenant_id")
+    assert s["slow"] == 1
+    assert any("payments" in step for step in s["plan"])
+    entry = db.stats.slow[-1]
+    assert entry["plan"] == s["plan"]
+    assert "load_overdue" in entry["site"] and "test_query_stats.py" in entry["site"]
+    assert [site for site, _ in s["sites"]] == [entry["site"]]
+    text = log.read_text(encoding="utf-8")
+    assert "slow query" in text and "plan: " in text and "load_overdue" in text
+
+
+def test_fast_statements_are_not_logged():
+    stats = QueryStats(slow_ms=1000)
+    assert stats.record("SELECT 1", 0.001, 1, "here") is False
+    assert stats.record("SELECT 2", 1.5, 1, "here") is True
+    assert stats.snapshot()[0]["calls"] == 2
+
+
+def test_stream_records_fetch_time_not_consumer_time(db):
+    db.stats.reset()
+    rows = 0
+    for _ in db.stream("SELECT payment_id FROM payments", batch_size=2):
+        rows += 1
+        time.sleep(0.01)
+    s = stat(db, "SELECT payment_id FROM payments")
+    assert s["calls"] == 1 and s["rows"] == rows
+    assert rows >= 5
+    # the consumer slept rows * 10 ms between batches; none of that is the query's
+    assert 0 < s["total_ms"] < rows * 10 / 2
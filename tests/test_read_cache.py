@@ -0,0 +1,76 @@
+from apart_core import ChangeMonitor, Database, ReadCache, StaffModel, TenantModel, UnitModel
+
+
+def vacant_unit(db):
+    UnitModel(db).bulk_create([("CACHE-1", "Solo", 5000, None)])
+    return db.query("SELECT unit_id FROM units WHERE unit_code='CACHE-1'")[0][0]
+
+
+def test_local_writes_are_never_served_stale(db):
+    units = UnitModel(db)
+    unit_id = vacant_unit(db)
+    assert units.get(unit_id)["status"] == "Vacant"
+    assert unit_id in {u["unit_id"] for u in units.available()}
+    TenantModel(db).create("Cache Tester", "09170000000", unit_id, "Solo", "2026-01-01")
+    assert units.get(unit_id)["status"] == "Occupied"
+    assert unit_id not in {u["unit_id"] for u in units.available()}
+    assert [t["name"] for t in units.detail(unit_id)["tenants"]] == ["Cache Tester"]
+
+
+def test_reads_inside_a_transaction_see_its_writes_and_cache_nothing(db):
+    staff = StaffModel(db)
+    before = len(staff.all())
+    try:
+        with db.transaction():
+            db.execute("INSERT INTO staff (name, role, contact) VALUES ('Uncommitted', 'Cleaner', '0917')")
+            assert len(staff.all()) == before + 1
+            raise RuntimeError("roll back")
+    except RuntimeError:
+        pass
+    assert len(staff.all()) == before
+
+
+def test_writes_from_another_connection_reach_the_cache(db):
+    staff = StaffModel(db)
+    monitor = ChangeMonitor(db)
+    monitor.subscribe({"staff"}, lambda tables: staff.invalidate())
+    names = [s["name"] for s in staff.all()]
+    other = Database(db.db_file)
+    try:
+        other.execute("INSERT INTO staff (name, role, contact) VALUES ('Remote', 'Guard', '0917')")
+    finally:
+        other.close()
+    assert "staff" in monitor.poll()
+    assert [s["name"] for s in staff.all()] == names + ["Remote"]
+
+
+def test_a_fill_racing_a_write_is_discarded(db):
+    cache = ReadCache(db, {"staff"})
+    values = iter(["stale", "fresh"])
+
+    def load_during_write():
+        value = next(values)
+        # the write commits while the load is still running
+        db.publish("staff", "update")
+        return value
+
+    assert cache.get("k", load_during_write) == "stale"
+    assert cache.peek("k") is None
+    assert cache.get("k", lambda: next(values)) == "fresh"
+    assert cache.get("k", lambda: "never loaded") == "fresh"
+
+
+def test_racing_snapshot_and_batch_fills_are_discarded(db):
+    cache = ReadCache(db, {"units"})
+
+    def racing(result):
+        def load(*args):
+            db.publish("units", "update")
+            return result
+        return load
+
+    assert cache.snapshot("all", racing(["old"])) == ("old",)
+    assert cache.snapshot("all", lambda: ["new"]) == ("new",)
+    assert cache.get_many([1, 2], racing({1: "old", 2: "old"})) == {1: "old", 2: "old"}
+    assert cache.peek(1) is None and cache.peek(2) is None
+    assert cache.get_many([1, 2], lambda keys: {k: "new" for k in keys}) == {1: "new", 2: "new"}
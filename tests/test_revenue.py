@@ -0,0 +1,62 @@
+from apart_core import PaymentModel, TenantModel, UnitModel, REVENUE_DAILY_SELECT
+
+ROLLUP = "SELECT day, unit_type, status, rent, electricity, water, total, payments FROM revenue_daily ORDER BY 1, 2, 3"
+
+
+def rebuilt(db):
+    return sorted(tuple(r) for r in db.query(REVENUE_DAILY_SELECT))
+
+
+def rollup(db):
+    return [tuple(r) for r in db.query(ROLLUP)]
+
+
+def unit_of_type(db, unit_type):
+    # a fresh vacant unit, so the test does not depend on the random demo rows
+    code = f"TEST-{unit_type}-{db.query('SELECT COUNT(*) FROM units')[0][0]}"
+    UnitModel(db).bulk_create([(code, unit_type, 5000, None)])
+    return db.query("SELECT unit_id FROM units WHERE unit_code=?", (code,))[0][0]
+
+
+def new_tenant(db, unit_type):
+    TenantModel(db).create("Rollup Tester", "09170000000", unit_of_type(db, unit_type), unit_type, "2026-01-01")
+    return db.query("SELECT MAX(tenant_id) FROM tenants")[0][0]
+
+
+def test_rollup_matches_rebuild_after_seed(db):
+    assert rollup(db) == rebuilt(db)
+
+
+def test_payment_keeps_unit_type_after_move(db):
+    tid = new_tenant(db, "Family")
+    PaymentModel(db).create(tid, 100, 1, 1, "2026-02-01", "Paid")
+    pid = db.query("SELECT MAX(payment_id) FROM payments")[0][0]
+    with db.transaction():
+        db.execute("UPDATE tenants SET unit_id=? WHERE tenant_id=?", (unit_of_type(db, "Solo"), tid))
+    assert rollup(db) == rebuilt(db)
+    with db.transaction():
+        db.execute("UPDATE payments SET status='Overdue' WHERE payment_id=?", (pid,))
+    assert rollup(db) == rebuilt(db)
+    rows = db.query("SELECT unit_type, status, total FROM revenue_daily WHERE day='2026-02-01'")
+    assert [tuple(r) for r in rows] == [("Family", "Overdue", 102)]
+
+
+def test_delete_after_move_and_tenant_delete(db):
+    tid = new_tenant(db, "Family")
+    PaymentModel(db).create(tid, 100, 1, 1, "2026-02-01", "Paid")
+    pid = db.query("SELECT MAX(payment_id) FROM payments")[0][0]
+    with db.transaction():
+        db.execute("UPDATE tenants SET unit_id=? WHERE tenant_id=?", (unit_of_type(db, "Solo"), tid))
+    TenantModel(db).delete(tid)
+    assert rollup(db) == rebuilt(db)
+    with db.transaction():
+        db.execute("DELETE FROM payments WHERE payment_id=?", (pid,))
+    assert rollup(db) == rebuilt(db)
+    assert not db.query("SELECT 1 FROM revenue_daily WHERE day='2026-02-01'")
+
+
+def test_bulk_insert_stamps_unit_type(db):
+    tid = new_tenant(db, "Dorm")
+    PaymentModel(db).bulk_insert([(tid, 50, 0, 0, 50, "2026-03-0%d" % d, "Paid", "") for d in range(1, 4)])
+    assert {r[0] for r in db.query("SELECT unit_type FROM payments WHERE tenant_id=?", (tid,))} == {"Dorm"}
+    assert rollup(db) == rebuilt(db)
@@ -0,0 +1,97 @@
+import datetime
+
+import pytest
+
+from apart_core import SEARCH_INDEXES, MaintenanceModel, TenantModel, fts5_available
+
+needs_fts5 = pytest.mark.skipif(not fts5_available(), reason="SQLite built without FTS5")
+
+
+def names(rows):
+    return {r["name"] for r in rows}
+
+
+def add_tenant(db, name, contact="09170000000"):
+    TenantModel(db).create(name, contact, None, "Solo", "2026-01-01")
+    return db.query("SELECT MAX(tenant_id) FROM tenants")[0][0]
+
+
+def assert_indexes_consistent(db):
+    # FTS5 compares an external-content index against its table and raises on any drift
+    for fts, _, _, _ in SEARCH_INDEXES:
+        db.execute(f"INSERT INTO {fts} ({fts}, rank) VALUES ('integrity-check', 1)")
+
+
+@needs_fts5
+def test_tenant_index_follows_insert_update_and_delete(db):
+    tenants = TenantModel(db)
+    tenant_id = add_tenant(db, "Quentin Zabala", "0918-555-0101")
+    assert names(tenants.search("quen")) == {"Quentin Zabala"}
+    assert names(tenants.search("zab 0918")) == {"Quentin Zabala"}
+    tenants.update(tenant_id, name="Quentin Yturralde")
+    assert not tenants.search("zabala")
+    assert names(tenants.search("yturr")) == {"Quentin Yturralde"}
+    # a column the index does not hold leaves it alone
+    tenants.update(tenant_id, status="Moved out")
+    assert names(tenants.search("yturralde")) == {"Quentin Yturralde"}
+    tenants.delete(tenant_id, reason="Test cleanup")
+    assert not tenants.search("yturralde")
+    assert names(tenants.search_deleted("yturralde cleanup")) == {"Quentin Yturralde"}
+    assert_indexes_consistent(db)
+
+
+@needs_fts5
+def test_restore_and_purge_move_rows_between_indexes(db):
+    tenants = TenantModel(db)
+    tenants.delete(add_tenant(db, "Ximena Ocampo"), reason="Moved abroad")
+    deleted_id = db.query("SELECT MAX(deleted_id) FROM deleted_tenants")[0][0]
+    tenants.restore(deleted_id)
+    assert names(tenants.search("ximena")) == {"Ximena Ocampo"}
+    assert not tenants.search_deleted("ximena")
+    tenants.delete(db.query("SELECT tenant_id FROM tenants WHERE name='Ximena Ocampo'")[0][0])
+    deleted_id = db.query("SELECT MAX(deleted_id) FROM deleted_tenants")[0][0]
+    tenants.purge_deleted(deleted_id)
+    assert not tenants.search_deleted("ximena")
+    assert_indexes_consistent(db)
+
+
+@needs_fts5
+def test_maintenance_index_follows_writes(db):
+    maintenance = MaintenanceModel(db)
+    tenant_id = add_tenant(db, "Wanda Reyes")
+    maintenance.create(tenant_id, "Cracked jalousie window", "High", datetime.date.today().isoformat())
+    request_id = db.query("SELECT MAX(request_id) FROM maintenance")[0][0]
+    assert [r["request_id"] for r in maintenance.search("jalou")] == [request_id]
+    maintenance.update_status(request_id, "Done")
+    assert [r["request_id"] for r in maintenance.search("jalousie window")] == [request_id]
+    with db.transaction():
+        db.execute("DELETE FROM maintenance WHERE request_id=?", (request_id,))
+    assert not maintenance.search("jalousie")
+    assert_indexes_consistent(db)
+
+
+@needs_fts5
+def test_accents_and_case_fold_in_the_index(db):
+    add_tenant(db, "José Peña")
+    assert names(TenantModel(db).search("JOSE pena")) == {"José Peña"}
+
+
+def test_like_fallback_matches_short_and_special_terms(db):
+    # what a SQLite without FTS5 runs
+    db.has_search_index = False
+    tenants = TenantModel(db)
+    add_tenant(db, "Vivian O'Neil", "0917-111-2222")
+    add_tenant(db, "snake_case Sy")
+    add_tenant(db, "Snakeycase Sy")
+    assert names(tenants.search("o'neil")) == {"Vivian O'Neil"}
+    assert "Vivian O'Neil" in names(tenants.search("v"))
+    assert names(tenants.search("111 2222")) == {"Vivian O'Neil"}
+    # "_" is literal, not LIKE's any-character wildcard
+    assert names(tenants.search("snake_case")) == {"snake_case Sy"}
+    assert names(tenants.search("_")) == {"snake_case Sy"}
+    assert tenants.search("%") == [] and tenants.search("  ") == []
+
+
+def test_empty_search_runs_no_query(db):
+    assert TenantModel(db).search("!!") == []
+    assert MaintenanceModel(db).search("") == []
@@ -0,0 +1,20 @@
+import datetime
+
+from apart_core import Database
+from apart_synth import create_database
+
+TODAY = datetime.date(2026, 10, 1)
+
+
+def test_generator_is_deterministic(tmp_path):
+    dumps = []
+    for name in ("a.db", "b.db"):
+        path = str(tmp_path / name)
+        create_database(path, seed=9, units=10, tenants=25, payments=300, today=TODAY)
+        db = Database(path)
+        try:
+            dumps.append([[tuple(r) for r in db.query(f"SELECT * FROM {table} ORDER BY 1")]
+                          for table in ("units", "tenants", "payments", "maintenance")])
+        finally:
+            db.close()
+    assert dumps[0][2] and dumps[0] == dumps[1]
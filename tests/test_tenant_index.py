@@ -0,0 +1,88 @@
+from apart_core import TenantIndex, TenantModel, UnitModel
+
+
+def build(db):
+    return TenantIndex(TenantModel(db).index_rows())
+
+
+def add_tenant(db, name, contact="09170000000", unit_code=None):
+    unit_id = None
+    if unit_code:
+        UnitModel(db).bulk_create([(unit_code, "Solo", 5000, None)])
+        unit_id = db.query("SELECT unit_id FROM units WHERE unit_code=?", (unit_code,))[0][0]
+    TenantModel(db).create(name, contact, unit_id, "Solo", "2026-01-01")
+    return db.query("SELECT MAX(tenant_id) FROM tenants")[0][0]
+
+
+def hits(index, text, limit=50):
+    return [s.name for s in index.search(text, limit)]
+
+
+def follow(db, index):
+    # what AdminInterface._on_index_events does with our own change events
+    def on_event(event):
+        ids = event.ids or ()
+        tenant_ids = set(ids) if event.entity == "tenants" else set()
+        unit_ids = set(ids) if event.entity == "units" else set()
+        index.update(TenantModel(db).index_rows(tenant_ids, unit_ids), tenant_ids)
+    db.events.subscribe({"tenants", "units"}, on_event)
+
+
+def assert_same_as_rebuild(db, index):
+    fresh = build(db)
+    assert (index._keys, index._ids) == (fresh._keys, fresh._ids)
+    assert {t: index.get(t) for t in fresh._tenants} == fresh._tenants and len(index) == len(fresh)
+
+
+def test_prefix_hits_on_name_unit_and_contact(db):
+    tenant_id = add_tenant(db, "Rosalind Quiambao", "0917-555-8123", unit_code="ZQ9")
+    index = build(db)
+    assert hits(index, "rosal") == ["Rosalind Quiambao"]
+    assert hits(index, "quia ros") == ["Rosalind Quiambao"]
+    assert hits(index, "zq") == ["Rosalind Quiambao"]
+    assert hits(index, "0917555") == ["Rosalind Quiambao"]
+    assert hits(index, "0917 555 81") == ["Rosalind Quiambao"]
+    assert hits(index, f"#{tenant_id}")[0] == "Rosalind Quiambao"
+    assert hits(index, "rosalindx") == [] and hits(index, "") == []
+    # every word has to match some key of the same tenant
+    assert hits(index, "rosal zzz") == []
+
+
+def test_case_and_accents_fold(db):
+    add_tenant(db, "José Ñañez")
+    index = build(db)
+    assert hits(index, "JOSE") == ["José Ñañez"]
+    assert hits(index, "nan jos") == ["José Ñañez"]
+    assert hits(index, "josé ÑAÑ") == ["José Ñañez"]
+
+
+def test_limit_caps_a_common_prefix(db):
+    for i in range(8):
+        add_tenant(db, f"Commonname {i}")
+    index = build(db)
+    assert len(index.search("commonn", limit=5)) == 5
+    assert len(index.search("commonn", limit=50)) == 8
+
+
+def test_updates_and_removals_follow_tenant_events(db):
+    tenants = TenantModel(db)
+    index = build(db)
+    follow(db, index)
+    renamed = add_tenant(db, "Ulysses Dimaculangan", unit_code="UX1")
+    assert hits(index, "ulyss") == ["Ulysses Dimaculangan"]
+    tenants.update(renamed, name="Ulysses Katigbak")
+    assert hits(index, "dimac") == [] and hits(index, "katig") == ["Ulysses Katigbak"]
+    # an edit the index does not show keeps the tenant in it
+    tenants.update(renamed, deposit_paid=4500)
+    assert hits(index, "katig") == ["Ulysses Katigbak"]
+    moved_out = add_tenant(db, "Theodora Lacson")
+    tenants.update(moved_out, status="Moved out")
+    assert hits(index, "theodora") == []
+    deleted = add_tenant(db, "Sigrid Manalo")
+    tenants.delete(deleted)
+    assert hits(index, "sigrid") == [] and index.get(deleted) is None
+    with db.transaction():
+        db.execute("UPDATE units SET unit_code='UX2' WHERE unit_code='UX1'")
+        db.publish("units", "update", [db.query("SELECT unit_id FROM units WHERE unit_code='UX2'")[0][0]])
+    assert hits(index, "ux2") == ["Ulysses Katigbak"] and hits(index, "ux1") == []
+    assert_same_as_rebuild(db, index)
@@ -0,0 +1,79 @@
+import pytest
+
+from apart_core import PaymentModel
+
+
+def staff_names(db):
+    return {r[0] for r in db.query("SELECT name FROM staff")}
+
+
+def add_staff(db, name):
+    cur = db.execute("INSERT INTO staff (name, role, contact) VALUES (?, 'Cleaner', '0917')", (name,))
+    db.publish("staff", "insert", [cur.lastrowid])
+    return cur.lastrowid
+
+
+def delivered(db):
+    events = []
+    db.events.subscribe(None, events.append)
+    return events
+
+
+def test_exception_rolls_back_and_drops_events(db):
+    before = staff_names(db)
+    events = delivered(db)
+    with pytest.raises(RuntimeError):
+        with db.transaction():
+            add_staff(db, "Temp")
+            raise RuntimeError("boom")
+    assert staff_names(db) == before
+    assert events == []
+    assert not db.in_transaction()
+
+
+def test_inner_rollback_keeps_outer_work(db):
+    events = delivered(db)
+    with db.transaction():
+        first = add_staff(db, "Outer A")
+        with pytest.raises(ValueError):
+            with db.transaction():
+                add_staff(db, "Inner")
+                raise ValueError("inner only")
+        second = add_staff(db, "Outer B")
+        # nothing is delivered before the outermost commit
+        assert events == []
+    names = staff_names(db)
+    assert {"Outer A", "Outer B"} <= names and "Inner" not in names
+    assert [(e.entity, e.operation, e.ids) for e in events] == [("staff", "insert", frozenset([first])),
+                                                               ("staff", "insert", frozenset([second]))]
+
+
+def test_committed_savepoint_rolls_back_with_its_outer_block(db):
+    events = delivered(db)
+    with pytest.raises(RuntimeError):
+        with db.transaction():
+            with db.transaction():
+                add_staff(db, "Released")
+            raise RuntimeError("outer fails after the inner block released")
+    assert "Released" not in staff_names(db)
+    assert events == []
+
+
+def test_publish_outside_a_transaction_is_immediate(db):
+    events = delivered(db)
+    add_staff(db, "Direct")
+    assert [e.entity for e in events] == ["staff"]
+
+
+def test_model_writes_join_the_callers_transaction(db):
+    tenant_id = db.query("SELECT MIN(tenant_id) FROM tenants")[0][0]
+    payments = db.query("SELECT COUNT(*) FROM payments")[0][0]
+    balance = tuple(db.query("SELECT * FROM tenant_balances WHERE tenant_id=?", (tenant_id,))[0])
+    events = delivered(db)
+    with pytest.raises(RuntimeError):
+        with db.transaction():
+            PaymentModel(db).create(tenant_id, 5000, 0, 0, "2026-02-01", "Paid")
+            raise RuntimeError("abandon the payment")
+    assert db.query("SELECT COUNT(*) FROM payments")[0][0] == payments
+    assert tuple(db.query("SELECT * FROM tenant_balances WHERE tenant_id=?", (tenant_id,))[0]) == balance
+    assert events == []
@@ -0,0 +1,53 @@
+import pytest
+
+pytest.importorskip("customtkinter")
+from APART import TreeviewBinder  # noqa: E402
+
+
+class FakeTree:
+    # just enough of ttk.Treeview to track item order
+    def __init__(self):
+        self.items = []
+
+    def insert(self, parent, index, iid, values):
+        self.items.insert(len(self.items) if index == "end" else index, iid)
+
+    def delete(self, *iids):
+        for iid in iids:
+            self.items.remove(iid)
+
+    def item(self, iid, values):
+        pass
+
+    def move(self, iid, parent, index):
+        self.items.remove(iid)
+        self.items.insert(index, iid)
+
+    def identify_row(self, y):
+        return ""
+
+    def yview_moveto(self, fraction):
+        pass
+
+
+@pytest.mark.parametrize("descending", [False, True])
+def test_patch_keeps_key_order(descending):
+    tree = FakeTree()
+    binder = TreeviewBinder(tree, descending=descending)
+    keys = sorted(range(0, 100, 3), reverse=descending)
+    binder.apply([(k, (k,)) for k in keys])
+    binder.patch([(k, (k,)) for k in (1, 50, 200, -5)], removed=[0, 3, 99, 42])
+    expect = sorted((set(keys) | {1, 50, 200, -5}) - {0, 3, 99, 42}, reverse=descending)
+    assert binder.keys() == [str(k) for k in expect] == tree.items
+    binder.trim(2)
+    binder.extend([(1000 if descending else -1000, ())], top=True)
+    binder.patch([(7, (7,))])
+    assert binder.keys() == tree.items
+    assert binder.keys() == [str(k) for k in sorted(map(int, binder.keys()), reverse=descending)]
+
+
+def test_patch_removes_from_unsorted_rows():
+    binder = TreeviewBinder(FakeTree())
+    binder.apply([(k, (k,)) for k in (5, 1, 9, 3)])
+    binder.patch([], removed=[9, 1])
+    assert binder.keys() == ["5", "3"]